@@ -30,14 +30,21 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from models.base import Base  # Base from SQLAlchemy
+from models.branch import Branch
 from models.customer import Customer
 from models.vehicle import Vehicle
-from models.order import Order
+from models.order import Order, OrderTombstone
+from models.order_event import OrderStatusEvent
 from models.part import Part
+from models.part_reorder import PartReorderStat
 from models.invoice import Invoice
 from models.user import User
 from models.work_station import WorkStation
 from models.order_part import OrderPart
+from models.table_version import TableVersion
+from models.archive import OrderArchive, OrderPartArchive, InvoiceArchive
+from models.job import Job
+from models.outbox import OutboxMessage
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -45,6 +52,13 @@ from models.order_part import OrderPart
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+from migration_helpers import PROGRESS_TABLE
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Tabela postępu backfilli nie jest modelem - autogenerate ma jej nie usuwać
+    return not (type_ == "table" and name == PROGRESS_TABLE)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -67,6 +81,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -90,7 +105,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
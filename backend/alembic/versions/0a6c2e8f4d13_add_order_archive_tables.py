@@ -0,0 +1,77 @@
+"""add order archive tables
+
+Revision ID: 0a6c2e8f4d13
+Revises: f3b6d92e4c05
+Create Date: 2026-10-19 14:22:06.871532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6c2e8f4d13'
+down_revision = 'f3b6d92e4c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('vehicle_id', sa.Integer(), nullable=True),
+    sa.Column('work_station_id', sa.Integer(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('priority', sa.Enum('NORMAL', 'HIGH', 'URGENT', name='priority'), nullable=True),
+    sa.Column('status', sa.Enum('NEW', 'IN_PROGRESS', 'WAITING_FOR_PARTS', 'COMPLETED', 'INVOICED', name='orderstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('estimated_cost', sa.Float(), nullable=True),
+    sa.Column('final_cost', sa.Float(), nullable=True),
+    sa.Column('parts_total', sa.Float(), nullable=False),
+    sa.Column('parts_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_archive_customer_id'), 'orders_archive', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_orders_archive_vehicle_id'), 'orders_archive', ['vehicle_id'], unique=False)
+    op.create_index(op.f('ix_orders_archive_created_at'), 'orders_archive', ['created_at'], unique=False)
+    op.create_table('order_parts_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('part_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_parts_archive_order_id'), 'order_parts_archive', ['order_id'], unique=False)
+    op.create_table('invoices_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('invoice_number', sa.String(length=50), nullable=False),
+    sa.Column('issue_date', sa.DateTime(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('invoice_number'),
+    sa.UniqueConstraint('order_id')
+    )
+    # Wyszukiwanie zafakturowanych zleceń do przeniesienia
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.execute("INSERT INTO table_versions (table_name, version) VALUES ('orders_archive', 1)")
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM table_versions WHERE table_name = 'orders_archive'")
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_table('invoices_archive')
+    op.drop_index(op.f('ix_order_parts_archive_order_id'), table_name='order_parts_archive')
+    op.drop_table('order_parts_archive')
+    op.drop_index(op.f('ix_orders_archive_created_at'), table_name='orders_archive')
+    op.drop_index(op.f('ix_orders_archive_vehicle_id'), table_name='orders_archive')
+    op.drop_index(op.f('ix_orders_archive_customer_id'), table_name='orders_archive')
+    op.drop_table('orders_archive')
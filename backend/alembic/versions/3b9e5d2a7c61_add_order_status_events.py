@@ -0,0 +1,51 @@
+"""add order status events
+
+Revision ID: 3b9e5d2a7c61
+Revises: 7a4d1c9e3b52
+Create Date: 2026-10-19 21:12:40.318027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import add_column_online, drop_column_online
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e5d2a7c61'
+down_revision = '7a4d1c9e3b52'
+branch_labels = None
+depends_on = None
+
+ORDER_STATUS = ('NEW', 'IN_PROGRESS', 'WAITING_FOR_PARTS', 'COMPLETED', 'INVOICED')
+
+
+def upgrade() -> None:
+    op.create_table('order_status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('branch_id', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sa.Enum(*ORDER_STATUS, name='orderstatus'), nullable=False),
+    sa.Column('to_status', sa.Enum(*ORDER_STATUS, name='orderstatus'), nullable=False),
+    sa.Column('from_work_station_id', sa.Integer(), nullable=True),
+    sa.Column('to_work_station_id', sa.Integer(), nullable=True),
+    sa.Column('from_at', sa.DateTime(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], name='fk_order_status_events_branch_id'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_status_events_branch_occurred_at', 'order_status_events', ['branch_id', 'occurred_at'], unique=False)
+    op.create_index('ix_order_status_events_order_id', 'order_status_events', ['order_id'], unique=False)
+
+    # Kolumna bez wartości - istniejące zlecenia zostają z NULL (raport bierze wtedy completed_at/started_at/created_at)
+    for table in ('orders', 'orders_archive'):
+        add_column_online(table, sa.Column('status_changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('orders_archive', 'orders'):
+        drop_column_online(table, 'status_changed_at')
+
+    op.drop_index('ix_order_status_events_order_id', table_name='order_status_events')
+    op.drop_index('ix_order_status_events_branch_occurred_at', table_name='order_status_events')
+    op.drop_table('order_status_events')
@@ -0,0 +1,40 @@
+"""add order updated_at and tombstones
+
+Revision ID: 4f2a9c7d1e36
+Revises: 1c91015e8b58
+Create Date: 2026-10-19 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a9c7d1e36'
+down_revision = '1c91015e8b58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Kolumny DateTime przechowują naiwny UTC - NOW() dałby czas strefy serwera
+    op.execute("UPDATE orders SET updated_at = COALESCE(completed_at, started_at, created_at, UTC_TIMESTAMP())")
+    op.create_index(op.f('ix_orders_updated_at'), 'orders', ['updated_at'], unique=False)
+
+    op.create_table('order_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_tombstones_id'), 'order_tombstones', ['id'], unique=False)
+    op.create_index(op.f('ix_order_tombstones_deleted_at'), 'order_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_tombstones_deleted_at'), table_name='order_tombstones')
+    op.drop_index(op.f('ix_order_tombstones_id'), table_name='order_tombstones')
+    op.drop_table('order_tombstones')
+    op.drop_index(op.f('ix_orders_updated_at'), table_name='orders')
+    op.drop_column('orders', 'updated_at')
@@ -0,0 +1,29 @@
+"""add order part versions
+
+Revision ID: 5e7c2a9d4b18
+Revises: b8e14d7a2f63
+Create Date: 2026-10-19 17:21:45.308126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import add_column_online, drop_column_online
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7c2a9d4b18'
+down_revision = 'b8e14d7a2f63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Kolumna z wartością domyślną - MariaDB dodaje ją bez przepisywania tabeli i bez backfillu
+    for table in ('orders', 'parts', 'orders_archive'):
+        add_column_online(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    for table in ('orders_archive', 'parts', 'orders'):
+        drop_column_online(table, 'version')
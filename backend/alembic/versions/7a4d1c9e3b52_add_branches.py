@@ -0,0 +1,85 @@
+"""add branches
+
+Revision ID: 7a4d1c9e3b52
+Revises: 5e7c2a9d4b18
+Create Date: 2026-10-19 19:04:12.583301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import (
+    add_column_online, drop_column_online, create_index_online, drop_index_online,
+    add_foreign_key_online, drop_foreign_key_online
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4d1c9e3b52'
+down_revision = '5e7c2a9d4b18'
+branch_labels = None
+depends_on = None
+
+# (tabela, indeks zaczynający się od branch_id, kolumny, unikalny)
+BRANCH_INDEXES = [
+    ('work_stations', 'ix_work_stations_branch_id', ['branch_id'], False),
+    ('users', 'ix_users_branch_id', ['branch_id'], False),
+    ('parts', 'uq_parts_branch_code', ['branch_id', 'code'], True),
+    ('orders', 'ix_orders_branch_status_created_at', ['branch_id', 'status', 'created_at'], False),
+    ('orders', 'ix_orders_branch_updated_at', ['branch_id', 'updated_at'], False),
+    ('order_tombstones', 'ix_order_tombstones_branch_deleted_at', ['branch_id', 'deleted_at'], False),
+    ('orders_archive', 'ix_orders_archive_branch_created_at', ['branch_id', 'created_at'], False),
+]
+
+# Indeksy zastąpione wersjami z branch_id na początku (parts.code - dotychczasowy unikalny kod)
+REPLACED_INDEXES = [
+    ('parts', 'code', ['code'], True),
+    ('orders', 'ix_orders_status_created_at', ['status', 'created_at'], False),
+    ('orders', 'ix_orders_updated_at', ['updated_at'], False),
+    ('order_tombstones', 'ix_order_tombstones_deleted_at', ['deleted_at'], False),
+    ('orders_archive', 'ix_orders_archive_created_at', ['created_at'], False),
+]
+
+BRANCH_TABLES = ['work_stations', 'users', 'parts', 'orders', 'order_tombstones', 'orders_archive']
+
+
+def upgrade() -> None:
+    op.create_table('branches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    op.create_index(op.f('ix_branches_id'), 'branches', ['id'], unique=False)
+    # Dotychczasowe dane należą do oddziału domyślnego (DEFAULT_BRANCH_ID)
+    op.execute("INSERT INTO branches (id, code, name, is_active) VALUES (1, 'main', 'Warsztat główny', true)")
+
+    # Wartość domyślna 1 - istniejące wiersze dostają oddział bez backfillu i przepisywania tabeli
+    for table in BRANCH_TABLES:
+        add_column_online(table, sa.Column('branch_id', sa.Integer(), nullable=False, server_default='1'))
+
+    for table, name, columns, unique in BRANCH_INDEXES:
+        create_index_online(name, table, columns, unique=unique)
+    for table, name, _, _ in REPLACED_INDEXES:
+        drop_index_online(name, table)
+
+    for table in BRANCH_TABLES:
+        add_foreign_key_online(f'fk_{table}_branch_id', table, 'branch_id', 'branches')
+
+
+def downgrade() -> None:
+    for table in BRANCH_TABLES:
+        drop_foreign_key_online(f'fk_{table}_branch_id', table)
+
+    for table, name, columns, unique in REPLACED_INDEXES:
+        create_index_online(name, table, columns, unique=unique)
+    for table, name, _, _ in BRANCH_INDEXES:
+        drop_index_online(name, table)
+
+    for table in reversed(BRANCH_TABLES):
+        drop_column_online(table, 'branch_id')
+
+    op.drop_index(op.f('ix_branches_id'), table_name='branches')
+    op.drop_table('branches')
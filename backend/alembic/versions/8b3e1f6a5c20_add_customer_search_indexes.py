@@ -0,0 +1,37 @@
+"""add customer search indexes
+
+Revision ID: 8b3e1f6a5c20
+Revises: 4f2a9c7d1e36
+Create Date: 2026-10-19 10:41:07.302944
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e1f6a5c20'
+down_revision = '4f2a9c7d1e36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('customers', sa.Column('phone_normalized', sa.String(length=20), nullable=True))
+
+    # Ta sama normalizacja co models.customer.normalize_phone
+    op.execute("UPDATE customers SET phone_normalized = REGEXP_REPLACE(phone, '[^0-9]', '') WHERE phone IS NOT NULL")
+    op.execute("UPDATE customers SET phone_normalized = SUBSTRING(phone_normalized, 3) WHERE phone_normalized LIKE '00%'")
+    op.execute("UPDATE customers SET phone_normalized = SUBSTRING(phone_normalized, 3) WHERE phone_normalized LIKE '48%' AND CHAR_LENGTH(phone_normalized) > 9")
+    op.execute("UPDATE customers SET phone_normalized = NULL WHERE phone_normalized = ''")
+
+    op.create_index(op.f('ix_customers_phone_normalized'), 'customers', ['phone_normalized'], unique=False)
+    op.create_index(op.f('ix_customers_name'), 'customers', ['name'], unique=False)
+    op.create_index(op.f('ix_customers_email'), 'customers', ['email'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_customers_email'), table_name='customers')
+    op.drop_index(op.f('ix_customers_name'), table_name='customers')
+    op.drop_index(op.f('ix_customers_phone_normalized'), table_name='customers')
+    op.drop_column('customers', 'phone_normalized')
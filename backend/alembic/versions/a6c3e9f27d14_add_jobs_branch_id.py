@@ -0,0 +1,37 @@
+"""add jobs branch_id
+
+Revision ID: a6c3e9f27d14
+Revises: 3b9e5d2a7c61
+Create Date: 2026-10-19 23:05:17.402316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import (
+    add_column_online, drop_column_online, create_index_online, drop_index_online,
+    add_foreign_key_online, drop_foreign_key_online, backfill, clear_progress
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c3e9f27d14'
+down_revision = '3b9e5d2a7c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column_online('jobs', sa.Column('branch_id', sa.Integer(), nullable=False, server_default='1'))
+    # Dotąd oddział zadania był w payload (dodawał go services.jobs.enqueue)
+    backfill('jobs', "branch_id = JSON_EXTRACT(payload, '$.branch_id')",
+             where="JSON_EXTRACT(payload, '$.branch_id') IS NOT NULL", name='jobs.branch_id')
+    create_index_online('ix_jobs_branch_id', 'jobs', ['branch_id'])
+    add_foreign_key_online('fk_jobs_branch_id', 'jobs', 'branch_id', 'branches')
+
+
+def downgrade() -> None:
+    drop_foreign_key_online('fk_jobs_branch_id', 'jobs')
+    drop_index_online('ix_jobs_branch_id', 'jobs')
+    drop_column_online('jobs', 'branch_id')
+    clear_progress('jobs.branch_id')
@@ -0,0 +1,46 @@
+"""add outbox messages
+
+Revision ID: b8e14d7a2f63
+Revises: 9d2f6b1c8e47
+Create Date: 2026-10-19 16:04:11.573920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e14d7a2f63'
+down_revision = '9d2f6b1c8e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event', sa.String(length=50), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('channel', sa.Enum('SMS', 'EMAIL', name='outboxchannel'), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', name='outboxstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbox_messages_id'), 'outbox_messages', ['id'], unique=False)
+    op.create_index(op.f('ix_outbox_messages_order_id'), 'outbox_messages', ['order_id'], unique=False)
+    op.create_index('ix_outbox_messages_status_next_attempt_at', 'outbox_messages', ['status', 'next_attempt_at'], unique=False)
+    op.create_index('ix_outbox_messages_status_sent_at', 'outbox_messages', ['status', 'sent_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_messages_status_sent_at', table_name='outbox_messages')
+    op.drop_index('ix_outbox_messages_status_next_attempt_at', table_name='outbox_messages')
+    op.drop_index(op.f('ix_outbox_messages_order_id'), table_name='outbox_messages')
+    op.drop_index(op.f('ix_outbox_messages_id'), table_name='outbox_messages')
+    op.drop_table('outbox_messages')
@@ -0,0 +1,55 @@
+"""add vehicle lookup columns
+
+Revision ID: c5d84a2e9f17
+Revises: 8b3e1f6a5c20
+Create Date: 2026-10-19 11:26:53.114870
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d84a2e9f17'
+down_revision = '8b3e1f6a5c20'
+branch_labels = None
+depends_on = None
+
+# Ta sama normalizacja co models.vehicle.normalize_identifier
+NORMALIZED_REGISTRATION = "UPPER(REGEXP_REPLACE(registration_number, '[[:space:]]', ''))"
+
+
+def _check_duplicate_registrations():
+    # Przed jakąkolwiek zmianą - unikalny indeks nie powstanie, jeśli dwie tablice normalizują się
+    # do tej samej wartości, a automatyczne scalanie pojazdów (i ich zleceń) byłoby zgadywaniem
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT {NORMALIZED_REGISTRATION} AS plate, GROUP_CONCAT(id ORDER BY id) AS ids FROM vehicles "
+        f"WHERE {NORMALIZED_REGISTRATION} <> '' GROUP BY plate HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        listing = "; ".join(f"{plate}: vehicles.id {ids}" for plate, ids in duplicates[:50])
+        raise RuntimeError(
+            f"{len(duplicates)} registration number(s) are duplicated after normalization ({listing}). "
+            "Merge or correct these vehicles, then run the migration again."
+        )
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        _check_duplicate_registrations()
+
+    op.add_column('vehicles', sa.Column('registration_normalized', sa.String(length=20), nullable=True))
+    op.add_column('vehicles', sa.Column('vin_normalized', sa.String(length=17), nullable=True))
+
+    op.execute(f"UPDATE vehicles SET registration_normalized = NULLIF({NORMALIZED_REGISTRATION}, '')")
+    op.execute("UPDATE vehicles SET vin_normalized = NULLIF(UPPER(REGEXP_REPLACE(vin, '[[:space:]]', '')), '')")
+
+    op.create_index(op.f('ix_vehicles_registration_normalized'), 'vehicles', ['registration_normalized'], unique=True)
+    op.create_index(op.f('ix_vehicles_vin_normalized'), 'vehicles', ['vin_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_vehicles_vin_normalized'), table_name='vehicles')
+    op.drop_index(op.f('ix_vehicles_registration_normalized'), table_name='vehicles')
+    op.drop_column('vehicles', 'vin_normalized')
+    op.drop_column('vehicles', 'registration_normalized')
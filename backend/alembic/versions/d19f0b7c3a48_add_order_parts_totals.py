@@ -0,0 +1,35 @@
+"""add order parts totals
+
+Revision ID: d19f0b7c3a48
+Revises: c5d84a2e9f17
+Create Date: 2026-10-19 12:03:18.660412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd19f0b7c3a48'
+down_revision = 'c5d84a2e9f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('parts_total', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('orders', sa.Column('parts_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("""
+        UPDATE orders o
+        JOIN (
+            SELECT order_id, SUM(quantity * unit_price) AS total, COUNT(*) AS lines
+            FROM order_parts
+            GROUP BY order_id
+        ) t ON t.order_id = o.id
+        SET o.parts_total = t.total, o.parts_count = t.lines
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'parts_count')
+    op.drop_column('orders', 'parts_total')
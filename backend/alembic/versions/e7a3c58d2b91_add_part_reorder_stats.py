@@ -0,0 +1,34 @@
+"""add part reorder stats
+
+Revision ID: e7a3c58d2b91
+Revises: d19f0b7c3a48
+Create Date: 2026-10-19 12:48:30.905127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c58d2b91'
+down_revision = 'd19f0b7c3a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('part_reorder_stats',
+    sa.Column('part_id', sa.Integer(), nullable=False),
+    sa.Column('daily_usage', sa.Float(), nullable=False),
+    sa.Column('usage_std', sa.Float(), nullable=False),
+    sa.Column('reorder_point', sa.Integer(), nullable=False),
+    sa.Column('order_up_to', sa.Integer(), nullable=False),
+    sa.Column('window_days', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['part_id'], ['parts.id'], ),
+    sa.PrimaryKeyConstraint('part_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('part_reorder_stats')
@@ -0,0 +1,31 @@
+"""add table versions
+
+Revision ID: f3b6d92e4c05
+Revises: e7a3c58d2b91
+Create Date: 2026-10-19 13:37:52.441260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6d92e4c05'
+down_revision = 'e7a3c58d2b91'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ['customers', 'vehicles', 'orders', 'order_parts', 'parts', 'work_stations']
+
+
+def upgrade() -> None:
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [{'table_name': name, 'version': 1} for name in TRACKED_TABLES])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
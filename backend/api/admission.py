@@ -0,0 +1,137 @@
+"""
+Kontrola przyjmowania żądań (admission control) w obrębie workera.
+
+Każda klasa tras ma limit równoległych żądań i ograniczoną kolejkę
+oczekujących. Gdy kolejka jest pełna albo żądanie czeka dłużej niż
+ADMISSION_QUEUE_TIMEOUT_SECONDS, dostaje od razu 503 z Retry-After, zamiast
+zajmować wątek z puli i połączenie z bazy, aż wszystko przekroczy timeouty.
+Suma limitów klas nie powinna przekraczać puli połączeń silnika
+(domyślnie 5 + 10 przepełnienia).
+
+- heavy: generowanie PDF faktury, przeliczenie sugestii zamówień i raporty
+  stanowisk (NumPy),
+- write: pozostałe POST/PUT/PATCH/DELETE,
+- read: pozostałe GET.
+
+/health, / i /api/metrics/* nie są limitowane - muszą odpowiadać także
+pod obciążeniem.
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from typing import Optional
+
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2.0"))
+# Waga nowego pomiaru w średniej kroczącej czasu obsługi (do wyliczania Retry-After)
+EWMA_ALPHA = 0.1
+
+EXEMPT_PATHS = ("/health", "/api/metrics")
+HEAVY_ROUTES = [
+    ("POST", re.compile(r"^/api/orders/\d+/invoice$")),
+    ("POST", re.compile(r"^/api/parts/reorder-suggestions/rebuild$")),
+    ("GET", re.compile(r"^/api/reports/")),
+]
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+class AdmissionClass:
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.wait_seconds_total = 0.0
+        self.service_seconds = 0.0
+
+    def retry_after(self) -> int:
+        # Ile mniej więcej potrwa rozładowanie kolejki przy obecnym czasie obsługi
+        backlog = (self.waiting + 1) / max(self.concurrency, 1)
+        return max(1, math.ceil(backlog * self.service_seconds))
+
+    async def acquire(self, timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS) -> bool:
+        # Liczniki, nie semaphore.locked() - żądania z tej samej fali jeszcze nie doszły do acquire()
+        if self.in_flight + self.waiting >= self.concurrency + self.queue_size:
+            self.rejected_queue_full += 1
+            return False
+
+        started = time.monotonic()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.wait_seconds_total += time.monotonic() - started
+        self.admitted += 1
+        self.in_flight += 1
+        return True
+
+    def release(self, service_seconds: float):
+        self.in_flight -= 1
+        self.semaphore.release()
+        if self.service_seconds:
+            self.service_seconds += EWMA_ALPHA * (service_seconds - self.service_seconds)
+        else:
+            self.service_seconds = service_seconds
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_ms": round(self.wait_seconds_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "avg_service_ms": round(self.service_seconds * 1000, 2),
+        }
+
+def _limits(name: str, concurrency: int, queue_size: int) -> AdmissionClass:
+    prefix = f"ADMISSION_{name.upper()}"
+    return AdmissionClass(
+        name,
+        int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+        int(os.getenv(f"{prefix}_QUEUE", str(queue_size)))
+    )
+
+CLASSES = {
+    "read": _limits("read", 8, 32),
+    "write": _limits("write", 4, 32),
+    "heavy": _limits("heavy", 2, 2),
+}
+
+def classify(method: str, path: str, query_string: bytes = b"") -> Optional[AdmissionClass]:
+    if path == "/" or path.startswith(EXEMPT_PATHS):
+        return None
+
+    for route_method, pattern in HEAVY_ROUTES:
+        # Faktura z ?background=true tylko zapisuje zadanie - to zwykły zapis
+        if method == route_method and pattern.match(path) and b"background=true" not in query_string:
+            return CLASSES["heavy"]
+
+    if method in WRITE_METHODS:
+        return CLASSES["write"]
+    if method in ("GET", "HEAD"):
+        return CLASSES["read"]
+    return None
+
+def admission_stats() -> dict:
+    # Liczniki są per worker - przy kilku workerach gunicorna każdy raportuje swoje
+    return {
+        "queue_timeout_seconds": ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        "classes": {name: admission.stats() for name, admission in CLASSES.items()}
+    }
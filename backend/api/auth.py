@@ -0,0 +1,232 @@
+"""
+Uwierzytelnianie tokenami JWT.
+
+POST /api/auth/login zwraca token podpisany SECRET_KEY (ALGORITHM, domyślnie
+HS256) z identyfikatorem, oddziałem i rolą użytkownika. Kolejne żądania
+wysyłają go w nagłówku Authorization: Bearer <token>.
+
+- Hasła są hashowane PBKDF2-SHA256 (hashlib, PASSWORD_ITERATIONS rund) -
+  celowo wolno, więc hash i weryfikacja idą do puli wątków, a pętla zdarzeń
+  obsługuje w tym czasie inne żądania.
+- Zweryfikowany token trafia do małego cache (AUTH_CACHE_SIZE wpisów, TTL
+  AUTH_CACHE_TTL_SECONDS, nie dłużej niż ważność tokenu). Trafienie to jedno
+  wyszukanie w słowniku w wątku pętli - bez dekodowania JWT, bez bazy.
+  Pierwsze użycie tokenu w workerze sprawdza jeszcze w bazie, czy konto jest
+  aktywne, więc dezaktywacja działa najpóźniej po AUTH_CACHE_TTL_SECONDS.
+
+Bez AUTH_REQUIRED token jest opcjonalny (frontend działa jak dotąd), ale
+podany musi być poprawny. Z tokenem użytkownik bez uprawnień administratora
+pracuje tylko w swoim oddziale (X-Branch-Id). Bez SECRET_KEY logowanie
+i każde żądanie z tokenem dostają 503 - żaden token nie jest przyjmowany.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import jwt
+from fastapi import Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+from models.base import BRANCH_HEADER, SessionLocal
+from models.user import User
+
+SECRET_KEY = os.getenv("SECRET_KEY", "")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "false").lower() in ("1", "true", "yes")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+PASSWORD_ITERATIONS = int(os.getenv("PASSWORD_ITERATIONS", "600000"))
+PASSWORD_SCHEME = "pbkdf2_sha256"
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    branch_id: int
+    is_admin: bool
+
+# --- Hasła ---
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+def _unb64(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+def hash_password(password: str, iterations: int = PASSWORD_ITERATIONS) -> str:
+    # pbkdf2_sha256$<rundy>$<sól>$<hash> - mieści się w users.hashed_password (String(100))
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{PASSWORD_SCHEME}${iterations}${_b64(salt)}${_b64(digest)}"
+
+def verify_password(password: str, hashed: str) -> bool:
+    try:
+        scheme, iterations, salt, digest = hashed.split("$")
+    except ValueError:
+        return False
+    if scheme != PASSWORD_SCHEME:
+        return False
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), _unb64(salt), int(iterations))
+    return hmac.compare_digest(candidate, _unb64(digest))
+
+# Porównanie, gdy użytkownika nie ma - tyle samo rund, więc czas odpowiedzi nie zdradza istniejących loginów
+_DUMMY_HASH = f"{PASSWORD_SCHEME}${PASSWORD_ITERATIONS}${_b64(bytes(16))}${_b64(bytes(32))}"
+
+async def hash_password_async(password: str) -> str:
+    return await run_in_threadpool(hash_password, password)
+
+async def verify_password_async(password: str, hashed: Optional[str]) -> bool:
+    valid = await run_in_threadpool(verify_password, password, hashed or _DUMMY_HASH)
+    return valid and hashed is not None
+
+# --- Tokeny ---
+
+def _require_secret():
+    # Pusty klucz podpisu - token podpisany "" przeszedłby weryfikację, więc tokenów nie wydajemy ani nie przyjmujemy
+    if not SECRET_KEY:
+        raise HTTPException(status_code=503, detail="Authentication is not configured")
+
+def create_access_token(user: User) -> tuple[str, int]:
+    _require_secret()
+    expires_in = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": str(user.id),
+        "username": user.username,
+        "branch_id": user.branch_id,
+        "is_admin": bool(user.is_admin),
+        "iat": now,
+        "exp": now + timedelta(seconds=expires_in),
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM), expires_in
+
+def decode_token(token: str) -> tuple[Principal, float]:
+    # Zwraca principal i czas wygaśnięcia (epoch); błędny lub wygasły token - 401
+    _require_secret()
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["sub", "exp"]})
+        principal = Principal(
+            id=int(claims["sub"]),
+            username=claims.get("username", ""),
+            branch_id=int(claims["branch_id"]),
+            is_admin=bool(claims.get("is_admin", False))
+        )
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        raise _unauthorized("Invalid or expired token")
+    return principal, float(claims["exp"])
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+# --- Cache zweryfikowanych tokenów ---
+
+class PrincipalCache:
+    # LRU z TTL; używany tylko z wątku pętli zdarzeń, więc bez blokad
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, principal: Principal, expires_at: float):
+        self._entries[token] = (min(time.time() + self.ttl, expires_at), principal)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+principal_cache = PrincipalCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+def _load_user(user_id: int) -> Optional[User]:
+    # Rejestr użytkowników w bazie głównej, bez zawężania do oddziału
+    with SessionLocal() as db:
+        return db.get(User, user_id)
+
+async def verify_token(token: str) -> Principal:
+    _require_secret()
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    principal, expires_at = decode_token(token)
+    user = await run_in_threadpool(_load_user, principal.id)
+    if user is None or not user.is_active:
+        raise _unauthorized("Inactive or unknown user")
+    principal_cache.put(token, principal, expires_at)
+    return principal
+
+def _bearer_token(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Invalid authorization header")
+    return token.strip()
+
+# --- Zależności FastAPI ---
+
+async def authenticate(request: Request) -> Optional[Principal]:
+    # Zależność routerów z danymi (main.py): z AUTH_REQUIRED token obowiązkowy, bez niego - opcjonalny
+    token = _bearer_token(request)
+    if token is None:
+        if AUTH_REQUIRED:
+            raise _unauthorized("Not authenticated")
+        return None
+
+    principal = await verify_token(token)
+    branch = request.headers.get(BRANCH_HEADER)
+    if not principal.is_admin and branch is not None and branch.strip() != str(principal.branch_id):
+        raise HTTPException(status_code=403, detail="No access to this branch")
+
+    # models.base.get_branch_id bierze stąd oddział, gdy żądanie nie ma X-Branch-Id
+    request.state.principal = principal
+    return principal
+
+async def require_user(principal: Optional[Principal] = Depends(authenticate)) -> Principal:
+    if principal is None:
+        raise _unauthorized("Not authenticated")
+    return principal
+
+async def require_admin(principal: Optional[Principal] = Depends(authenticate)) -> Optional[Principal]:
+    # Bez AUTH_REQUIRED operacje administracyjne zostają otwarte jak dotąd
+    if principal is None and not AUTH_REQUIRED:
+        return None
+    if principal is None or not principal.is_admin:
+        raise HTTPException(status_code=403, detail="Administrator role required")
+    return principal
+
+def auth_stats() -> dict:
+    # Per worker - każdy proces gunicorna ma własny cache
+    return {"auth_required": AUTH_REQUIRED, "cache": principal_cache.stats()}
@@ -0,0 +1,78 @@
+"""
+Łączenie jednoczesnych, identycznych zapytań GET w obrębie workera (single-flight).
+
+Pierwsze żądanie liczy wynik, pozostałe czekają na ten sam Future, a gotowy
+wynik jest jeszcze przez COALESCE_TTL_SECONDS podawany kolejnym żądaniom.
+Klucz powinien zawierać ETag (wersje tabel), żeby nigdy nie oddać danych
+starszych niż te, na które wskazuje nagłówek.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+COALESCE_TTL_SECONDS = float(os.getenv("COALESCE_TTL_SECONDS", "1.0"))
+
+_lock = threading.Lock()
+_inflight: dict[tuple, Future] = {}
+_results: dict[tuple, tuple[float, object]] = {}
+_stats: dict[str, dict[str, int]] = defaultdict(lambda: {"requests": 0, "computed": 0, "joined": 0, "cached": 0})
+
+def coalesce(endpoint: str, key: Hashable, compute: Callable[[], T], ttl: float = None) -> T:
+    ttl = COALESCE_TTL_SECONDS if ttl is None else ttl
+    cache_key = (endpoint, key)
+    now = time.monotonic()
+
+    with _lock:
+        stats = _stats[endpoint]
+        stats["requests"] += 1
+
+        cached = _results.get(cache_key)
+        if cached is not None and cached[0] > now:
+            stats["cached"] += 1
+            return cached[1]
+
+        future = _inflight.get(cache_key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[cache_key] = future
+        else:
+            stats["joined"] += 1
+
+    if not leader:
+        return future.result()
+
+    try:
+        value = compute()
+    except BaseException as e:
+        with _lock:
+            _inflight.pop(cache_key, None)
+        future.set_exception(e)
+        raise
+
+    with _lock:
+        _inflight.pop(cache_key, None)
+        stats["computed"] += 1
+        # Wygasłe wpisy sprzątamy przy okazji zapisu - słownik nie rośnie ponad liczbę aktywnych kluczy
+        for expired in [k for k, (expires, _) in _results.items() if expires <= now]:
+            del _results[expired]
+        if ttl > 0:
+            _results[cache_key] = (time.monotonic() + ttl, value)
+
+    future.set_result(value)
+    return value
+
+def coalesce_stats() -> dict:
+    with _lock:
+        return {
+            endpoint: {
+                **stats,
+                "coalesce_ratio": round(1 - stats["computed"] / stats["requests"], 3) if stats["requests"] else 0.0
+            }
+            for endpoint, stats in _stats.items()
+        }
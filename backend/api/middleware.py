@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+from api import profiling
+from api.admission import classify
+from models.base import PIN_PRIMARY_COOKIE, PIN_PRIMARY_SECONDS
+
+try:
+    import brotli
+except ImportError:  # w requirements.txt; bez pakietu (np. lokalne środowisko) zostaje sam gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+def _vary_accept_encoding(headers: list) -> list:
+    # Dopisuje Accept-Encoding do istniejącego Vary (bez powtórzeń)
+    vary = b", ".join(value for key, value in headers if key == b"vary")
+    if b"accept-encoding" in vary.lower():
+        return headers
+    headers = [(key, value) for key, value in headers if key != b"vary"]
+    headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+    return headers
+
+class CompressionMiddleware:
+    """Negocjowana kompresja odpowiedzi (br, potem gzip) powyżej progu rozmiaru.
+
+    Kompresowane są tylko odpowiedzi wysłane w jednym kawałku, np. JSON;
+    odpowiedzi strumieniowane (PDF) przechodzą bez zmian. Każda odpowiedź,
+    która mogłaby być skompresowana, dostaje Vary: Accept-Encoding.
+    """
+
+    def __init__(self, app, minimum_size: int = None, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        accepted = _accepted_encodings(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            response_headers = dict(start_message["headers"])
+            content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+            passthrough = True
+
+            if (
+                message.get("more_body", False)
+                or b"content-encoding" in response_headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            # Od tego miejsca treść zależy od Accept-Encoding - także gdy tym razem zostaje bez kompresji,
+            # inaczej cache pośredni poda wersję bez kompresji klientom z gzip/br i odwrotnie
+            headers = _vary_accept_encoding(start_message["headers"])
+            if encoding is None or len(body) < self.minimum_size:
+                await send({**start_message, "headers": headers})
+                await send(message)
+                return
+
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level)
+
+            new_headers = [(key, value) for key, value in headers if key != b"content-length"]
+            new_headers.append((b"content-encoding", encoding.encode("latin-1")))
+            new_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+
+            await send({**start_message, "headers": new_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+class PrimaryPinMiddleware:
+    """Po udanym zapisie ustawia krótkotrwałe ciasteczko, które kieruje odczyty klienta do bazy głównej.
+
+    Dzięki temu klient widzi własne zmiany, zanim replika je dogoni (get_read_db).
+    """
+
+    UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+    def __init__(self, app, seconds: int = PIN_PRIMARY_SECONDS):
+        self.app = app
+        self.cookie = f"{PIN_PRIMARY_COOKIE}=1; Max-Age={seconds}; Path=/; HttpOnly; SameSite=Lax".encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = {**message, "headers": [*message["headers"], (b"set-cookie", self.cookie)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+class AdmissionMiddleware:
+    """Limit równoległych żądań per klasa tras (api.admission) - nadmiar dostaje szybkie 503 z Retry-After."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        admission = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if admission is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await admission.acquire():
+            await self._reject(admission, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(time.monotonic() - started)
+
+    async def _reject(self, admission, send):
+        body = json.dumps({"detail": f"Server busy ({admission.name}), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(admission.retry_after()).encode("latin-1")),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class ProfilingMiddleware:
+    """Profiluje żądania z poprawnym X-Profile / ?__profile (api.profiling); pozostałe przechodzą bez zmian."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling.requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.Profile(scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"))
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {**message, "headers": [*message["headers"], (b"x-profile-id", profile.id.encode("latin-1"))]}
+            await send(message)
+
+        with profiling.activate(profile):
+            await self.app(scope, receive, send_with_id)
+        await asyncio.to_thread(profile.save)
@@ -18,6 +18,17 @@ class VehicleCreate(BaseModel):
             raise ValueError("Invalid year for vehicle")
         return v
 
+class BranchCreate(BaseModel):
+    # Jawne id, gdy BRANCH_DATABASE_URLS już kieruje ten oddział na osobną instancję bazy
+    id: Optional[int] = None
+    code: str
+    name: str
+    stations: int = 2
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
 class CustomerCreate(BaseModel):
     name: str
     phone: Optional[str] = None
@@ -73,8 +84,16 @@ class OrderRead(BaseModel):
     created_at: datetime
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
+    updated_at: Optional[datetime] = None
     estimated_cost: float
     final_cost: Optional[float]
+    parts_total: float = 0.0
+    parts_count: int = 0
+    version: int = 1
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: dict = {}
@@ -0,0 +1,270 @@
+"""
+Profilowanie pojedynczego żądania na życzenie.
+
+Żądanie z nagłówkiem X-Profile: <PROFILE_TOKEN> (albo ?__profile=<token>)
+jest obsługiwane normalnie, ale w tle działa próbkujący profiler: co
+PROFILE_INTERVAL_MS zapisuje stosy wątku pętli zdarzeń i wątków z puli,
+które wykonują zapytania SQL tego żądania. Wynik trafia do
+PROFILE_DIR/<id>.speedscope.json (otwierany w https://www.speedscope.app),
+razem z czasami zapytań SQL - jako osobny profil "SQL" w tym samym pliku
+i w <id>.meta.json. Trzymanych jest PROFILE_MAX_FILES ostatnich profili.
+
+Bez PROFILE_TOKEN middleware nie jest w ogóle rejestrowany, a nasłuchy SQL
+są podpinane tylko na czas trwającego profilowania.
+"""
+import contextvars
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "logs/profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+ADMIN_PATH = "/api/admin/profiles"
+SQL_TEXT_LIMIT = 500
+
+_active: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar("active_profile", default=None)
+_listeners_lock = threading.Lock()
+_listeners_count = 0
+
+def token_matches(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+def requested(scope) -> bool:
+    if scope["path"].startswith(ADMIN_PATH):
+        # Przeglądanie profili tym samym nagłówkiem nie tworzy nowych
+        return False
+    for key, value in scope["headers"]:
+        if key == PROFILE_HEADER:
+            return token_matches(value.decode("latin-1"))
+    query = scope.get("query_string", b"").decode("latin-1")
+    if PROFILE_QUERY_PARAM in query:
+        return token_matches(dict(parse_qsl(query)).get(PROFILE_QUERY_PARAM))
+    return False
+
+def _public_query(query: str) -> str:
+    # Token nie może trafić do zapisanych plików
+    return urlencode([(key, value) for key, value in parse_qsl(query) if key != PROFILE_QUERY_PARAM])
+
+def _is_idle(stack: tuple) -> bool:
+    # Pętla zdarzeń czekająca w select() i wątek puli czekający na zadanie to nie czas żądania
+    return any(
+        filename.endswith("selectors.py") or (filename.endswith("queue.py") and name == "get")
+        for filename, name, _ in stack
+    )
+
+class Profile:
+    def __init__(self, method: str, path: str, query: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        self.method = method
+        self.path = path
+        self.query = _public_query(query)
+        self.threads = {threading.get_ident()}
+        self.samples: dict[int, list[tuple]] = {}
+        self.sql: list[dict] = []
+        self.status: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def _sample(self):
+        interval = PROFILE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            at = self.elapsed_ms()
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                    frame = frame.f_back
+                stack = tuple(reversed(stack))
+                if not _is_idle(stack):
+                    self.samples.setdefault(thread_id, []).append((at, stack))
+
+    def speedscope(self) -> dict:
+        frames, index = [], {}
+
+        def frame_id(key) -> int:
+            if key not in index:
+                filename, name, line = key
+                index[key] = len(frames)
+                frames.append({"name": name, "file": filename, "line": line})
+            return index[key]
+
+        interval = PROFILE_INTERVAL_MS
+        end = self.duration * 1000
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"thread {thread_id}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": end,
+                "samples": [[frame_id(key) for key in stack] for _, stack in samples],
+                "weights": [interval] * len(samples)
+            })
+
+        # Zapytania jako osobna oś czasu - w speedscope widać, kiedy i jak długo żądanie czekało na bazę
+        events = []
+        for query in self.sql:
+            frame = frame_id(("SQL", query["statement"][:120], 0))
+            events.append({"type": "O", "frame": frame, "at": query["start_ms"]})
+            events.append({"type": "C", "frame": frame, "at": query["start_ms"] + query["duration_ms"]})
+        if events:
+            profiles.append({
+                "type": "evented",
+                "name": "SQL",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": max(end, events[-1]["at"]),
+                "events": events
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.path}",
+            "exporter": "autoservice",
+            "shared": {"frames": frames},
+            "profiles": profiles
+        }
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 2),
+            "samples": sum(len(samples) for samples in self.samples.values()),
+            "sql_count": len(self.sql),
+            "sql_ms": round(sum(query["duration_ms"] for query in self.sql), 2),
+            "sql": self.sql,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    def save(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.speedscope.json"), "w") as f:
+            json.dump(self.speedscope(), f)
+        with open(os.path.join(PROFILE_DIR, f"{self.id}.meta.json"), "w") as f:
+            json.dump(self.meta(), f)
+        _apply_retention()
+
+# --- SQL ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    if profile is not None:
+        # Wątek, który wykonuje SQL tego żądania, od teraz też jest próbkowany
+        profile.threads.add(threading.get_ident())
+        conn.info.setdefault("profile_query_start", []).append(profile.elapsed_ms())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is not None and starts:
+        start = starts.pop()
+        profile.sql.append({
+            "statement": " ".join(statement.split())[:SQL_TEXT_LIMIT],
+            "start_ms": round(start, 3),
+            "duration_ms": round(profile.elapsed_ms() - start, 3)
+        })
+
+def _attach_listeners():
+    global _listeners_count
+    with _listeners_lock:
+        if _listeners_count == 0:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listeners_count += 1
+
+def _detach_listeners():
+    global _listeners_count
+    with _listeners_lock:
+        _listeners_count -= 1
+        if _listeners_count == 0:
+            event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+# --- Przechowywanie ---
+
+def _apply_retention():
+    metas = sorted(
+        (name for name in os.listdir(PROFILE_DIR) if name.endswith(".meta.json")),
+        reverse=True
+    )
+    for name in metas[PROFILE_MAX_FILES:]:
+        profile_id = name.removesuffix(".meta.json")
+        for suffix in (".meta.json", ".speedscope.json"):
+            path = os.path.join(PROFILE_DIR, profile_id + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+def list_profiles(limit: int = PROFILE_MAX_FILES) -> list[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".meta.json")), reverse=True)
+    result = []
+    for name in names[:limit]:
+        with open(os.path.join(PROFILE_DIR, name)) as f:
+            meta = json.load(f)
+        meta.pop("sql", None)
+        result.append(meta)
+    return result
+
+def profile_path(profile_id: str, suffix: str = ".speedscope.json") -> Optional[str]:
+    # id pochodzi z URL-a - tylko nazwy, które sami nadaliśmy, bez ścieżek
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    path = os.path.join(PROFILE_DIR, profile_id + suffix)
+    return path if os.path.exists(path) else None
+
+def profile_meta(profile_id: str) -> Optional[dict]:
+    path = profile_path(profile_id, ".meta.json")
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+@contextmanager
+def activate(profile: Profile):
+    _attach_listeners()
+    token = _active.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _active.reset(token)
+        _detach_listeners()
@@ -0,0 +1,158 @@
+"""
+Rozgrzewka workera i sygnał gotowości dla /health.
+
+Kroki z WARMUP_STEPS wykonują się w lifespan, zanim worker przyjmie ruch:
+połączenia w puli, konfiguracja mapperów, zapytania kolejki, dashboardu
+i listy zleceń oraz ETagów z table_versions (SQLAlchemy zapamiętuje
+skompilowany SQL). Ciężkie zależności (ReportLab, NumPy) z BACKGROUND_STEPS
+ładują się potem w tle.
+
+/health odpowiada 503, dopóki wszystkie kroki się nie zakończą -
+healthcheck w docker-compose (i load balancer) nie kieruje ruchu do zimnego
+workera.
+"""
+import os
+import threading
+import time
+from datetime import date
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+from api.routes.dashboard import DASHBOARD_TABLES, build_dashboard_stats
+from api.routes.orders import orders_page_query
+from api.routes.queue import QUEUE_TABLES, build_queue
+from api.utils import serialize_order, versions_etag
+from models.base import DEFAULT_BRANCH_ID, branch_engines, branch_session, engine, read_engine
+
+# Ile połączeń otworzyć przy starcie (0 = cała pula)
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "0"))
+# Jak długo worker czeka na rozgrzewkę, zanim i tak zacznie przyjmować ruch
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
+
+_ready = threading.Event()
+_started = threading.Event()
+_lock = threading.Lock()
+_checks: dict[str, dict] = {}
+_thread: threading.Thread = None
+
+def _warm_pool():
+    # Pierwsze żądania nie płacą za handshake z bazą - także z instancjami oddziałów (BRANCH_DATABASE_URLS)
+    for target in {engine, read_engine, *branch_engines()}:
+        pool_size = getattr(target.pool, "size", lambda: 1)()
+        count = min(WARMUP_CONNECTIONS or pool_size, pool_size)
+        connections = [target.connect() for _ in range(count)]
+        try:
+            for connection in connections:
+                connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                connection.close()
+
+def _warm_refdata():
+    # Snapshot zbudowany przez proces nadrzędny - tu tylko wczytanie wskaźnika (albo budowa bez gunicorna)
+    from services import refdata
+    refdata.ensure()
+
+def _warm_mappers():
+    configure_mappers()
+
+def _warm_queries():
+    # Cache kompilacji jest per silnik - osobno baza główna (klienci przypięci po zapisie) i replika
+    today = date.today()
+
+    for read in ([False] if read_engine is engine else [False, True]):
+        db = branch_session(DEFAULT_BRANCH_ID, read=read)
+        try:
+            versions_etag(db, QUEUE_TABLES)
+            versions_etag(db, DASHBOARD_TABLES, today)
+            build_queue(db)
+            build_dashboard_stats(db, today)
+            for order in db.execute(orders_page_query(limit=100)).scalars():
+                serialize_order(order)
+        finally:
+            db.close()
+
+def _warm_pdf():
+    from services import invoice_pdf
+    invoice_pdf.warmup()
+
+def _warm_reorder():
+    import services.reorder  # noqa: F401 - import NumPy
+
+WARMUP_STEPS: list[tuple[str, Callable[[], None]]] = [
+    ("database", _warm_pool),
+    ("mappers", _warm_mappers),
+    ("refdata", _warm_refdata),
+    ("queries", _warm_queries),
+]
+
+BACKGROUND_STEPS: list[tuple[str, Callable[[], None]]] = [
+    ("pdf", _warm_pdf),
+    ("reorder", _warm_reorder),
+]
+
+def _run_step(name: str, step: Callable[[], None]):
+    started = time.perf_counter()
+    try:
+        step()
+        result = {"status": "ok"}
+    except Exception as e:
+        result = {"status": "error", "error": str(e)}
+    result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    with _lock:
+        _checks[name] = result
+
+def _run(steps, background_steps):
+    for name, step in steps:
+        _run_step(name, step)
+    _started.set()
+
+    for name, step in background_steps:
+        _run_step(name, step)
+
+    with _lock:
+        failed = any(check["status"] != "ok" for check in _checks.values())
+    if not failed:
+        _ready.set()
+
+def start_warmup(steps=None, background_steps=None):
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        if steps is None and background_steps is None:
+            if _thread is not None:
+                return
+            steps, background_steps = list(WARMUP_STEPS), list(BACKGROUND_STEPS)
+        steps, background_steps = steps or [], background_steps or []
+        for name, _ in steps + background_steps:
+            _checks[name] = {"status": "pending"}
+        _started.clear()
+        _thread = threading.Thread(target=_run, args=(steps, background_steps), name="warmup", daemon=True)
+    _thread.start()
+
+def wait_until_started(timeout: float = WARMUP_TIMEOUT_SECONDS) -> bool:
+    # Wołane z lifespan (w wątku) - czeka tylko na kroki potrzebne przed przyjęciem ruchu
+    return _started.wait(timeout)
+
+def ensure_warmup():
+    # Rozgrzewka nie ruszyła (brak lifespan) albo baza wstała później niż backend - powtórz nieudane kroki
+    if _thread is None:
+        start_warmup()
+        return
+    with _lock:
+        failed = {name for name, check in _checks.items() if check.get("status") == "error"}
+    if failed:
+        start_warmup(
+            [(name, step) for name, step in WARMUP_STEPS if name in failed],
+            [(name, step) for name, step in BACKGROUND_STEPS if name in failed]
+        )
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+def readiness() -> dict:
+    with _lock:
+        return {name: dict(check) for name, check in _checks.items()}
@@ -0,0 +1,34 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import inspect
+
+def _default(obj: Any):
+    # orjson sam obsługuje datetime, enum i dataclass - tu tylko to, czego nie zna
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "_sa_instance_state"):
+        # Obiekt ORM - tylko załadowane kolumny; relacje pominięte, żeby nie wyciągać
+        # zagnieżdżonych obiektów ani nie zapętlić się na relacjach dwukierunkowych
+        state = inspect(obj)
+        return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse oparty na orjson.
+
+    Zwrócony bezpośrednio z handlera pomija też jsonable_encoder FastAPI,
+    który przy dużych listach zleceń jest droższy niż sama serializacja.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
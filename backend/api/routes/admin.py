@@ -0,0 +1,35 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from api import profiling
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"]
+)
+
+def require_profile_token(x_profile: Optional[str] = Header(None)):
+    # Ten sam token co do uruchomienia profilowania; bez PROFILE_TOKEN endpointy są wyłączone
+    if not profiling.token_matches(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+def list_profiles(limit: int = 50):
+    return profiling.list_profiles(limit)
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+def get_profile(profile_id: str):
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
+
+@router.get("/profiles/{profile_id}/meta", dependencies=[Depends(require_profile_token)])
+def get_profile_meta(profile_id: str):
+    # Czas trwania, status i lista zapytań SQL z czasami
+    meta = profiling.profile_meta(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return meta
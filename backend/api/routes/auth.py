@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from api.auth import Principal, create_access_token, require_user, verify_password_async
+from api.models import LoginRequest
+from models.base import SessionLocal
+from models.user import User
+
+router = APIRouter(
+    prefix="/api/auth",
+    tags=["auth"]
+)
+
+def _find_user(username: str):
+    # Bez zawężania do oddziału - login jest unikalny w całej firmie
+    with SessionLocal() as db:
+        return db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+
+@router.post("/login")
+async def login(credentials: LoginRequest):
+    # Zapytanie i PBKDF2 w puli wątków - pętla zdarzeń w tym czasie obsługuje inne żądania
+    user = await run_in_threadpool(_find_user, credentials.username)
+    valid = await verify_password_async(credentials.password, user.hashed_password if user else None)
+    if not valid or not user.is_active:
+        raise HTTPException(status_code=401, detail="Invalid username or password",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+    token, expires_in = create_access_token(user)
+    return {"access_token": token, "token_type": "bearer", "expires_in": expires_in}
+
+@router.get("/me")
+async def get_me(principal: Principal = Depends(require_user)):
+    return principal
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from api.auth import require_admin
+from api.models import BranchCreate
+from api.utils import commit_or_400
+from models.base import SessionLocal, branch_session, engine, engine_for
+from models.branch import Branch
+from models.work_station import WorkStation
+from services import refdata
+
+MAX_STATIONS = 20
+
+router = APIRouter(
+    prefix="/api/branches",
+    tags=["branches"]
+)
+
+def serialize_branch(branch: dict) -> dict:
+    return {**branch, "stations": refdata.stations(branch["id"], active_only=False)}
+
+@router.get("")
+def get_branches():
+    # Z współdzielonego snapshotu - ta sama lista, którą sprawdzany jest nagłówek X-Branch-Id
+    return [serialize_branch(branch) for branch in refdata.branches(active_only=False)]
+
+@router.post("", dependencies=[Depends(require_admin)])
+def create_branch(branch: BranchCreate):
+    if not 0 <= branch.stations <= MAX_STATIONS:
+        raise HTTPException(status_code=400, detail=f"Stations must be between 0 and {MAX_STATIONS}")
+
+    # Rejestr oddziałów jest w bazie głównej, niezależnie od oddziału z nagłówka
+    with SessionLocal() as db:
+        db_branch = Branch(**branch.model_dump(exclude={"stations"}))
+        db.add(db_branch)
+        commit_or_400(db, "Branch already exists")
+        data = {"id": db_branch.id, "code": db_branch.code, "name": db_branch.name, "is_active": db_branch.is_active}
+
+    if engine_for(db_branch.id) is not engine:
+        # Instancja oddziału trzyma kopię wiersza - na nią wskazują klucze obce branch_id
+        with SessionLocal(bind=engine_for(db_branch.id)) as db:
+            db.merge(Branch(**data))
+            db.commit()
+
+    with branch_session(db_branch.id) as db:
+        db.add_all([WorkStation(name=f"Stanowisko {number}") for number in range(1, branch.stations + 1)])
+        db.commit()
+
+    # Nowy oddział od razu widoczny dla X-Branch-Id w tym workerze; pozostałe podchwycą nową generację
+    refdata.build(force=False)
+    refdata.invalidate()
+    return serialize_branch(data)
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+import re
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.orm import Session
 from api.models import CustomerCreate
-from api.utils import get_object_or_404, count_active_orders
-from models.customer import Customer
+from api.utils import (
+    ACTIVE_STATUSES, get_object_or_404, commit_or_400, count_active_orders, like_prefix,
+    serialize_customer, serialize_order, serialize_vehicle, etag_matches, versions_etag, not_modified,
+    parse_fields, projection_columns, rows_to_dicts
+)
+from api.responses import FastJSONResponse
+from models.customer import Customer, normalize_phone
+from models.archive import OrderArchive
+from models.order import Order, OrderStatus
 from models.vehicle import Vehicle
-from models.base import get_db
+from models.base import get_db, get_read_db
+
+OVERVIEW_RECENT_ORDERS = 10
 
 router = APIRouter(
     prefix="/api/customers",
@@ -15,25 +27,92 @@ router = APIRouter(
 def create_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
     db_customer = Customer(**customer.model_dump())
     db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
+    commit_or_400(db)
     return db_customer
 
 @router.get("")
-def get_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_customers(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+    names = parse_fields(fields, Customer)
+    if names:
+        # Tylko wybrane kolumny, bez budowania obiektów ORM
+        rows = db.execute(
+            select(*projection_columns(Customer, names)).offset(skip).limit(limit)
+        ).mappings().all()
+        return FastJSONResponse(rows_to_dicts(rows))
+
     customers = db.query(Customer).offset(skip).limit(limit).all()
     return customers
 
+@router.get("/search")
+def search_customers(q: str, limit: int = 20, db: Session = Depends(get_read_db)):
+    q = q.strip()
+    if not q:
+        return []
+
+    # LIKE 'abc%' korzysta z indeksów; kolacja MariaDB jest case-insensitive, więc bez lower()
+    conditions = [
+        Customer.name.like(like_prefix(q), escape="\\"),
+        Customer.email.like(like_prefix(q), escape="\\"),
+    ]
+
+    phone = normalize_phone(q) if re.fullmatch(r"[\d\s+\-()]+", q) else None
+    if phone:
+        conditions.append(Customer.phone_normalized.like(like_prefix(phone), escape="\\"))
+
+    customers = db.query(Customer).filter(or_(*conditions)).order_by(Customer.name).limit(limit).all()
+    return [serialize_customer(customer) for customer in customers]
+
 @router.get("/{customer_id}")
-def get_customer(customer_id: int, db: Session = Depends(get_db)):
+def get_customer(customer_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    etag = versions_etag(db, ["customers"], customer_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     customer = get_object_or_404(db, Customer, customer_id, "Customer")
+    response.headers["ETag"] = etag
     return customer
 
 @router.get("/{customer_id}/vehicles")
-def get_customer_vehicles(customer_id: int, db: Session = Depends(get_db)):
+def get_customer_vehicles(customer_id: int, db: Session = Depends(get_read_db)):
     vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
     return vehicles
 
+@router.get("/{customer_id}/overview")
+def get_customer_overview(customer_id: int, request: Request, db: Session = Depends(get_read_db)):
+    etag = versions_etag(db, ["customers", "vehicles", "orders", "orders_archive"], customer_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Stała liczba zapytań niezależnie od liczby pojazdów i zleceń klienta
+    customer = get_object_or_404(db, Customer, customer_id, "Customer")
+
+    vehicles = db.query(Vehicle).filter(Vehicle.customer_id == customer_id).all()
+
+    recent_orders = db.query(Order).filter(
+        Order.customer_id == customer_id
+    ).order_by(
+        Order.created_at.desc()
+    ).limit(OVERVIEW_RECENT_ORDERS).all()
+
+    active_orders, lifetime_revenue = db.query(
+        func.coalesce(func.sum(case((Order.status.in_(ACTIVE_STATUSES), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Order.status == OrderStatus.INVOICED, Order.final_cost), else_=0)), 0)
+    ).filter(Order.customer_id == customer_id).one()
+
+    # Zarchiwizowane zlecenia są zawsze zafakturowane - liczą się tylko do przychodu
+    archived_revenue = db.query(
+        func.coalesce(func.sum(OrderArchive.final_cost), 0)
+    ).filter(OrderArchive.customer_id == customer_id).scalar()
+
+    # Klient i pojazdy są już w sesji, więc serialize_order nie dociąga ich osobnymi zapytaniami
+    return FastJSONResponse({
+        "customer": serialize_customer(customer),
+        "vehicles": [serialize_vehicle(vehicle) for vehicle in vehicles],
+        "recent_orders": [serialize_order(order) for order in recent_orders],
+        "active_orders": int(active_orders),
+        "lifetime_revenue": float(lifetime_revenue) + float(archived_revenue)
+    }, headers={"ETag": etag})
+
 @router.put("/{customer_id}")
 def update_customer(customer_id: int, customer_db: CustomerCreate, db: Session = Depends(get_db)):
     customer = get_object_or_404(db, Customer, customer_id, "Customer")
@@ -41,8 +120,7 @@ def update_customer(customer_id: int, customer_db: CustomerCreate, db: Session =
     for key, value in customer_db.model_dump().items():
         setattr(customer, key, value)
 
-    db.commit()
-    db.refresh(customer)
+    commit_or_400(db)
     return customer
 
 @router.delete("/{customer_id}")
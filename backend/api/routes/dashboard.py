@@ -1,14 +1,21 @@
 from datetime import date, timedelta
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy import func
 from sqlalchemy.orm import Session
-from api.utils import ACTIVE_STATUSES, count_active_orders
-from models.base import get_db
+from api.coalesce import coalesce
+from api.responses import FastJSONResponse
+from api.utils import ACTIVE_STATUSES, count_active_orders, etag_matches, versions_etag, not_modified
+from models.base import DEFAULT_BRANCH_ID, get_read_db
+from models.branch import session_branch
 from models.customer import Customer
 from models.order import Order
 from models.vehicle import Vehicle
+from services import refdata
 
 RECENT_ORDERS = 6
+# Tabele, od których zależą statystyki (ETag i klucz coalesce)
+DASHBOARD_TABLES = ["customers", "vehicles", "orders"]
 
 router = APIRouter(
     prefix="/api/dashboard",
@@ -29,8 +36,9 @@ def get_priority_stats(db: Session) -> dict:
         Order.status.in_(ACTIVE_STATUSES)
     ).group_by(Order.priority).all()
 
+    # Klucz .value - klucz-enum obok "normal" dałby w JSON zdublowane klucze
     for priority, count in orders_by_priority:
-        stats[priority] = count
+        stats[priority.value] = count
 
     return stats
 
@@ -48,9 +56,7 @@ def get_recent_orders(db: Session) -> dict:
         })
     return recent_orders_data
 
-@router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    today = date.today()
+def build_dashboard_stats(db: Session, today: date, station_ids: Optional[list[int]] = None) -> bytes:
     tomorrow = today + timedelta(days=1)
 
     first_day_of_the_month = today.replace(day=1)
@@ -80,15 +86,13 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         Order.completed_at < tomorrow
     ).count()
 
-    station_1_busy = db.query(Order).filter(
-        Order.work_station_id == 1,
+    # Stanowiska oddziału ze współdzielonego snapshotu, zajętość wszystkich jednym zapytaniem
+    if station_ids is None:
+        station_ids = refdata.station_ids(session_branch(db, DEFAULT_BRANCH_ID))
+    busy_stations = {station_id for (station_id,) in db.query(Order.work_station_id).filter(
+        Order.work_station_id.in_(station_ids),
         Order.status.in_(["in_progress", "waiting_for_parts"])
-    ).count() > 0
-
-    station_2_busy = db.query(Order).filter(
-        Order.work_station_id == 2,
-        Order.status.in_(["in_progress", "waiting_for_parts"])
-    ).count() > 0
+    ).distinct().all()}
 
     revenue_today = db.query(func.sum(Order.final_cost)).filter(
         Order.status == "invoiced",
@@ -102,7 +106,7 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     Order.completed_at < first_day_of_the_next_month
     ).scalar() or 0
 
-    return {
+    return FastJSONResponse({
         "total_customers": total_customers,
         "total_vehicles": total_vehicles,
         "total_orders": total_orders,
@@ -110,11 +114,23 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         "orders_in_queue": orders_in_queue,
         "completed_today": completed_today,
         "priority_stats": get_priority_stats(db),
-        "station_1_busy": station_1_busy,
-        "station_2_busy": station_2_busy,
+        **{f"station_{station_id}_busy": station_id in busy_stations for station_id in station_ids},
         "revenue_today": revenue_today,
         "revenue_month": revenue_month,
         "recent_orders": get_recent_orders(db)
-    }
+    }).body
+
+@router.get("/stats")
+def get_dashboard_stats(request: Request, db: Session = Depends(get_read_db)):
+    today = date.today()
+
+    # Statystyki "dzisiaj" i "w tym miesiącu" zależą też od daty, a zajętość od listy stanowisk ze snapshotu
+    station_ids = refdata.station_ids(session_branch(db, DEFAULT_BRANCH_ID))
+    etag = versions_etag(db, DASHBOARD_TABLES, today, station_ids)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = coalesce("dashboard_stats", etag, lambda: build_dashboard_stats(db, today, station_ids))
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
@@ -0,0 +1,46 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from api.models import JobCreate
+from api.utils import get_object_or_404, job_accepted, serialize_job
+from models.base import get_db
+from models.job import Job, JobStatus
+from services import jobs
+
+router = APIRouter(
+    prefix="/api/jobs",
+    tags=["jobs"]
+)
+
+@router.post("", status_code=202)
+def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
+    # Np. {"kind": "export", "payload": {"entity": "orders"}} albo {"kind": "reconcile"}
+    if job_data.kind not in jobs.HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job_data.kind}")
+
+    job = jobs.enqueue(db, job_data.kind, job_data.payload)
+    db.commit()
+    return job_accepted(job)
+
+# Status zawsze z bazy głównej - replika mogłaby pokazywać zadanie jako wciąż oczekujące
+@router.get("/{job_id}")
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    return serialize_job(get_object_or_404(db, Job, job_id, "Job"))
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: int, db: Session = Depends(get_db)):
+    job = get_object_or_404(db, Job, job_id, "Job")
+
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+
+    if job.result_path is None:
+        return job.result
+
+    if not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Job result expired")
+
+    return FileResponse(job.result_path, media_type=job.result_media_type, filename=job.result_filename)
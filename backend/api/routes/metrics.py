@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from api.admission import admission_stats
+from api.auth import auth_stats
+from api.coalesce import coalesce_stats
+from models.base import get_db
+from services import outbox
+
+router = APIRouter(
+    prefix="/api/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/coalescing")
+def get_coalescing_metrics():
+    # Liczniki są per worker - przy kilku workerach gunicorna każdy raportuje swoje
+    return coalesce_stats()
+
+@router.get("/outbox")
+def get_outbox_metrics(db: Session = Depends(get_db)):
+    # Kolejka i opóźnienie wysyłki powiadomień (sent_at - created_at)
+    return outbox.outbox_stats(db)
+
+@router.get("/admission")
+def get_admission_metrics():
+    # Głębokość kolejek i odrzucenia per klasa tras - do doboru liczby workerów i limitów
+    return admission_stats()
+
+@router.get("/auth")
+def get_auth_metrics():
+    # Trafienia cache tokenów - przy niskim hit_ratio każde żądanie płaci za dekodowanie JWT i odczyt z bazy
+    return auth_stats()
+
+@router.get("/reports")
+def get_report_metrics():
+    # Cache zamkniętych okresów raportów - per worker
+    from services import reports
+    return reports.report_cache_stats()
@@ -1,66 +1,88 @@
-import os
-from datetime import datetime, timezone, date
+from datetime import datetime, timezone, timedelta
 from typing import Optional
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy import case, literal, select, union_all
+from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Body, Request, Response
 
+from api.responses import FastJSONResponse
 from api.models import OrderCreate, OrderUpdate, OrderPartCreate, OrderUpdatePartial, OrderRead
-from api.utils import get_object_or_404, serialize_order
-from models import OrderPart, Part
-from models.order import Order, OrderStatus
-from models.base import get_db
+from api.utils import (
+    CUSTOMER_FIELDS, VEHICLE_FIELDS, get_object_or_404, commit_or_400, serialize_order, touch_order, to_naive_utc,
+    parse_fields, projection_columns, rows_to_dicts, etag_matches, versions_etag, not_modified, job_accepted,
+    check_if_match, version_etag
+)
+from models import Customer, OrderPart, Part, Vehicle, WorkStation
+from models.archive import OrderArchive
+from models.order import Order, OrderStatus, OrderTombstone, Priority
+from models.base import get_db, get_read_db
+from services import jobs
+from services.order_status import UNCHANGED, set_order_state
 
-import io
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+# Zapas czasu na transakcje, które ustawiły updated_at, ale zatwierdziły się po odczycie kursora
+CHANGES_OVERLAP = timedelta(seconds=5)
 
+# Relacje serializowane przez serialize_order - ładowane razem ze zleceniem
+ORDER_RELATIONS = (joinedload(Order.customer), joinedload(Order.vehicle))
+# Koszty w OrderUpdate przychodzą jako tekst - kolumny są Float
+COST_FIELDS = ("estimated_cost", "final_cost")
 
 router = APIRouter(
     prefix="/api/orders",
     tags=["orders"]
 )
 
-try:
-    # Spróbuj znaleźć font systemowy
-    font_paths = [
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/System/Library/Fonts/Helvetica.ttc",
-        "C:\\Windows\\Fonts\\Arial.ttf",
-    ]
-
-    font_registered = False
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            pdfmetrics.registerFont(TTFont('CustomFont', font_path))
-            font_registered = True
-            break
-
-    if not font_registered:
-        # Fallback - użyj wbudowanego Helvetica
-        print("Warning: No Unicode font found, using Helvetica")
-except Exception as e:
-    print(f"Font registration error: {e}")
+def _check_work_station(db: Session, work_station_id: Optional[int]):
+    # Zapytanie o WorkStation jest zawężone do oddziału sesji - stanowisko innego oddziału daje 404
+    if work_station_id is not None:
+        get_object_or_404(db, WorkStation, work_station_id, "Work station")
+
+def _set_state(db: Session, order: Order, status, work_station_id):
+    try:
+        set_order_state(db, order, status, work_station_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+def _priority(value) -> Priority:
+    # Kolumna Enum zapisuje nazwę (NORMAL) - surowy string z żądania przeszedłby tylko na MariaDB
+    try:
+        return Priority(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid priority: {value}")
+
+def _cost(field: str, value: str) -> float:
+    # Bez refresh po commicie obiekt musi mieć już liczbę, jaką zwróciłaby baza
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}: {value}")
 
 @router.post("")
 def create_order(order: OrderCreate, db: Session = Depends(get_db)):
-    db_order = Order(**order.model_dump())
+    # Klient i pojazd jednym zapytaniem - potrzebne do odpowiedzi, a przy okazji sprawdzają klucze obce
+    row = db.execute(
+        select(Customer, Vehicle)
+        .outerjoin(Vehicle, Vehicle.id == order.vehicle_id)
+        .where(Customer.id == order.customer_id)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    if row.Vehicle is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    if row.Vehicle.customer_id != row.Customer.id:
+        raise HTTPException(status_code=400, detail="Vehicle does not belong to customer")
+
+    data = order.model_dump()
+    data["priority"] = _priority(data["priority"])
+    db_order = Order(**data, customer=row.Customer, vehicle=row.Vehicle)
     db.add(db_order)
     db.commit()
-    db.refresh(db_order)
-
-    db.refresh(db_order, ["customer", "vehicle"])
 
     return serialize_order(db_order)
 
 @router.post("/{order_id}/invoice")
-def create_invoice(order_id: int, invoice_data: dict = Body(...), db: Session = Depends(get_db)):
+def create_invoice(order_id: int, invoice_data: dict = Body(...), background: bool = False,
+                   db: Session = Depends(get_db)):
     # Pobierz zlecenie
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
@@ -76,181 +98,15 @@ def create_invoice(order_id: int, invoice_data: dict = Body(...), db: Session =
     # Ustaw końcowy koszt z formularza
     labor_cost = invoice_data.get("final_cost", order.estimated_cost or 0)
 
-    # Pobierz części użyte w zleceniu
-    order_parts = db.query(OrderPart).filter(OrderPart.order_id == order_id).all()
-    total_parts_cost = sum(op.quantity * op.unit_price for op in order_parts)
-
-    # Całkowity koszt = robocizna + części
-    total_cost = labor_cost + total_parts_cost
-
-    # Zapisz koszt końcowy
-    order.final_cost = total_cost
-
-    # Generuj PDF
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5 * cm, bottomMargin=1.5 * cm)
-    elements = []
+    if background:
+        # PDF powstaje w workerze zadań - klient odpytuje /api/jobs/{id} i pobiera wynik
+        job = jobs.enqueue(db, "invoice", {"order_id": order_id, "labor_cost": labor_cost})
+        db.commit()
+        return job_accepted(job)
 
-    # Style
-    styles = getSampleStyleSheet()
-
-    # Użyj custom font jeśli został zarejestrowany
-    try:
-        if 'CustomFont' in pdfmetrics.getRegisteredFontNames():
-            styles['Normal'].fontName = 'CustomFont'
-            styles['Heading1'].fontName = 'CustomFont'
-            styles['Heading2'].fontName = 'CustomFont'
-    except:
-        pass
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=15,
-        alignment=1
-    )
-
-    # NAGŁÓWEK
-    elements.append(Paragraph("PROTOKÓŁ NAPRAWY", title_style))
-    elements.append(Spacer(1, 10))
-
-    # Informacje o dokumencie
-    doc_info = [
-        ['Numer zlecenia:', f'#{order.id}'],
-        ['Data wystawienia:', date.today().strftime('%d.%m.%Y')],
-        ['Status:', 'Zakończone']
-    ]
-
-    doc_table = Table(doc_info, colWidths=[5 * cm, 10 * cm])
-    doc_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    elements.append(doc_table)
-    elements.append(Spacer(1, 10))
-
-    # Dane klienta
-    elements.append(Paragraph("<b>DANE KLIENTA</b>", styles['Heading2']))
-    client_data = [
-        ['Imię i nazwisko:', order.customer.name if order.customer else 'Brak danych'],
-        ['Telefon:', order.customer.phone or '-'],
-        ['Email:', order.customer.email or '-'],
-    ]
-
-    client_table = Table(client_data, colWidths=[5 * cm, 10 * cm])
-    client_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-    ]))
-    elements.append(client_table)
-    elements.append(Spacer(1, 10))
-
-    # Dane pojazdu
-    elements.append(Paragraph("<b>DANE POJAZDU</b>", styles['Heading2']))
-    vehicle_data = [
-        ['Marka:', order.vehicle.brand if order.vehicle else '-'],
-        ['Model:', order.vehicle.model if order.vehicle else '-'],
-        ['Rok produkcji:', str(order.vehicle.year) if order.vehicle and order.vehicle.year else '-'],
-        ['Nr rejestracyjny:', order.vehicle.registration_number if order.vehicle else '-'],
-        ['VIN:', order.vehicle.vin or '-' if order.vehicle else '-'],
-    ]
-
-    vehicle_table = Table(vehicle_data, colWidths=[5 * cm, 10 * cm])
-    vehicle_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-    ]))
-    elements.append(vehicle_table)
-    elements.append(Spacer(1, 10))
-
-    # Opis naprawy
-    elements.append(Paragraph("<b>OPIS WYKONANYCH PRAC</b>", styles['Heading2']))
-    desc_text = order.description.replace('\n', '<br/>')
-    elements.append(Paragraph(desc_text, styles['Normal']))
-    elements.append(Spacer(1, 15))
-
-    # Użyte części
-    if order_parts:
-        elements.append(Paragraph("<b>UŻYTE CZĘŚCI</b>", styles['Heading2']))
-
-        parts_data = [['Część', 'Ilość', 'Cena jedn.', 'Wartość']]
-        for op in order_parts:
-            parts_data.append([
-                f"{op.part.code} - {op.part.name}",
-                str(op.quantity),
-                f"{op.unit_price:.2f} PLN",
-                f"{(op.quantity * op.unit_price):.2f} PLN"
-            ])
-
-        parts_table = Table(parts_data, colWidths=[8 * cm, 2 * cm, 2.5 * cm, 2.5 * cm])
-        parts_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('FONTNAME', (0, 0), (-1, 0), styles['Heading2'].fontName),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-            ('ALIGN', (2, 0), (3, -1), 'RIGHT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ]))
-        elements.append(parts_table)
-        elements.append(Spacer(1, 15))
-
-    # Podsumowanie kosztów
-    elements.append(Paragraph("<b>PODSUMOWANIE</b>", styles['Heading2']))
-    cost_data = [
-        ['', 'Kwota'],
-        ['Koszt robocizny:', f'{labor_cost:.2f} PLN'],
-    ]
-
-    if total_parts_cost > 0:
-        cost_data.append(['Koszt części:', f'{total_parts_cost:.2f} PLN'])
-
-    cost_data.extend([
-        ['', ''],
-        ['DO ZAPŁATY:', f'{total_cost:.2f} PLN'],
-    ])
-
-    cost_table = Table(cost_data, colWidths=[10 * cm, 5 * cm])
-    cost_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('FONTNAME', (0, 0), (-1, 0), styles['Heading2'].fontName),
-        ('FONTNAME', (0, -1), (-1, -1), styles['Heading2'].fontName),
-        ('FONTSIZE', (0, -1), (-1, -1), 14),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    elements.append(cost_table)
-
-    # Stopka
-    elements.append(Spacer(1, 20))
-    footer_text = "Dokument wygenerowany automatycznie przez system AutoService Manager"
-    elements.append(Paragraph(footer_text, ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-        alignment=1
-    )))
-
-    # Generuj PDF
-    doc.build(elements)
-    buffer.seek(0)
-
-    # Zaktualizuj status zlecenia na "invoiced"
-    order.status = OrderStatus.INVOICED
+    # Generuj PDF - ReportLab ładowany dopiero tutaj
+    from services.invoice_pdf import invoice_filename, invoice_order
+    buffer = invoice_order(db, order, labor_cost)
     db.commit()
 
     # Zwróć PDF
@@ -258,67 +114,188 @@ def create_invoice(order_id: int, invoice_data: dict = Body(...), db: Session =
         buffer,
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename=zlecenie_{order_id}_dokument.pdf"
+            "Content-Disposition": f"attachment; filename={invoice_filename(order_id)}"
         }
     )
     
-@router.get("")
-def get_orders(skip: int = 0, limit: int = 100, status: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Order)
+def _orders_select(model, names: Optional[list[str]], nested: dict, status: Optional[str]):
+    # Ten sam kształt zapytania dla orders i orders_archive
+    query = select(*projection_columns(model, names, nested)) if names else select(model)
 
     if status:
-        query = query.filter(Order.status == status)
+        query = query.where(model.status == status)
+
+    if names:
+        if "customer" in names:
+            query = query.outerjoin(Customer, Customer.id == model.customer_id)
+        if "vehicle" in names:
+            query = query.outerjoin(Vehicle, Vehicle.id == model.vehicle_id)
 
-    orders = query.order_by(
+    return query
+
+def orders_page_query(names: Optional[list[str]] = None, nested: Optional[dict] = None, status: Optional[str] = None,
+                      skip: int = 0, limit: int = 100):
+    # Domyślna lista zleceń - używana też przez rozgrzewkę (api.readiness)
+    return _orders_select(Order, names, nested or {}, status).order_by(
         Order.priority.desc(),
         Order.created_at.asc()
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit)
+
+def _priority_rank(model):
+    # Jawny ranking zamiast sortowania po ENUM - w UNION MariaDB traci typ ENUM i sortowałaby alfabetycznie
+    return case(
+        (model.priority == Priority.URGENT, 3),
+        (model.priority == Priority.HIGH, 2),
+        else_=1
+    )
+
+def _archived_orders_page(db: Session, names: Optional[list[str]], nested: dict, status: Optional[str],
+                          skip: int, limit: int) -> list:
+    # Najpierw strona samych identyfikatorów z UNION obu tabel, potem dociągnięcie wierszy z każdej z nich
+    def page_select(model, archived: bool):
+        query = select(
+            model.id.label("id"),
+            _priority_rank(model).label("priority_rank"),
+            model.created_at.label("created_at"),
+            literal(archived).label("archived")
+        )
+        return query.where(model.status == status) if status else query
+
+    page = union_all(page_select(Order, False), page_select(OrderArchive, True)).subquery()
+    page_rows = db.execute(
+        select(page.c.id, page.c.archived).order_by(
+            page.c.priority_rank.desc(),
+            page.c.created_at.asc(),
+            page.c.id.asc()
+        ).offset(skip).limit(limit)
+    ).all()
+
+    loaded = {}
+    for model, archived in ((Order, False), (OrderArchive, True)):
+        ids = [order_id for order_id, is_archived in page_rows if bool(is_archived) == archived]
+        if not ids:
+            continue
+
+        query = _orders_select(model, names, nested, None)
+        if names:
+            query = query.add_columns(model.id.label("_page_id")).where(model.id.in_(ids))
+            for row in db.execute(query).mappings().all():
+                item = dict(row)
+                order_id = item.pop("_page_id")
+                loaded[(order_id, archived)] = rows_to_dicts([item])[0]
+        else:
+            for order in db.execute(query.where(model.id.in_(ids))).scalars().all():
+                loaded[(order.id, archived)] = serialize_order(order)
+
+    result = []
+    for order_id, archived in page_rows:
+        item = loaded[(order_id, bool(archived))]
+        item["archived"] = bool(archived)
+        result.append(item)
+    return result
+
+@router.get("")
+def get_orders(request: Request, skip: int = 0, limit: int = 100, status: Optional[str] = None,
+               fields: Optional[str] = None, include_archived: bool = False, db: Session = Depends(get_read_db)):
+    tables = ["orders", "customers", "vehicles"] + (["orders_archive"] if include_archived else [])
+    etag = versions_etag(db, tables, request.url.query)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Klient i pojazd w projekcji tylko na życzenie: ?fields=id,status,customer,vehicle
+    nested = {"customer": (Customer, CUSTOMER_FIELDS), "vehicle": (Vehicle, VEHICLE_FIELDS)}
+    names = parse_fields(fields, Order, nested)
+
+    if include_archived:
+        result = _archived_orders_page(db, names, nested, status, skip, limit)
+        return FastJSONResponse(result, headers={"ETag": etag})
+
+    query = orders_page_query(names, nested, status, skip, limit)
+
+    if names:
+        return FastJSONResponse(rows_to_dicts(db.execute(query).mappings().all()), headers={"ETag": etag})
+
+    orders = db.execute(query).scalars().all()
     
     # Dodaj dane klienta i pojazdu
     result = []
     for order in orders:
         result.append(serialize_order(order))
     
-    return result
+    return FastJSONResponse(result, headers={"ETag": etag})
+
+@router.get("/changes")
+def get_order_changes(since: Optional[datetime] = None, db: Session = Depends(get_db)):
+    # Kursor to czas serwera z chwili zapytania - klient odsyła go w kolejnym wywołaniu.
+    # Celowo baza główna: opóźnienie repliki mogłoby przekroczyć CHANGES_OVERLAP i zgubić zmiany.
+    cursor = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    orders_query = db.query(Order)
+    tombstones_query = db.query(OrderTombstone.order_id)
+
+    if since is not None:
+        # Okna nachodzą na siebie, więc klient może dostać to samo zlecenie dwa razy - nigdy go nie zgubi
+        since = to_naive_utc(since) - CHANGES_OVERLAP
+        orders_query = orders_query.filter(Order.updated_at >= since)
+        tombstones_query = tombstones_query.filter(OrderTombstone.deleted_at >= since)
+
+    orders = orders_query.order_by(Order.updated_at.asc(), Order.id.asc()).all()
+    deleted = [order_id for (order_id,) in tombstones_query.all()]
+
+    return FastJSONResponse({
+        "cursor": cursor.isoformat(),
+        "orders": [serialize_order(order) for order in orders],
+        "deleted": deleted
+    })
 
 @router.put("/{order_id}")
-def update_order(order_id: int, db_order: OrderUpdate, db: Session = Depends(get_db)):
-    order = get_object_or_404(db, Order, order_id, "Order")
+def update_order(order_id: int, db_order: OrderUpdate, request: Request, response: Response,
+                 db: Session = Depends(get_db)):
+    order = get_object_or_404(db, Order, order_id, "Order", options=ORDER_RELATIONS)
+    check_if_match(request, order)
 
     update_data = db_order.model_dump(exclude_unset=True)
-    
+    status = update_data.pop("status", None)
+    work_station_id = update_data.pop("work_station_id", UNCHANGED)
+    if work_station_id is not UNCHANGED:
+        _check_work_station(db, work_station_id)
+    if update_data.get("priority") is not None:
+        update_data["priority"] = _priority(update_data["priority"])
+    for key in COST_FIELDS:
+        if update_data.get(key) is not None:
+            update_data[key] = _cost(key, update_data[key])
+
     for key, value in update_data.items():
         if hasattr(order, key):
             setattr(order, key, value)
 
-    if update_data.get("status") == "in_progress" and not order.started_at:
-        order.started_at = datetime.now(timezone.utc)
-
-    if update_data.get("status") == "completed" and not order.completed_at:
-        order.completed_at = datetime.now(timezone.utc)
+    # Status i stanowisko razem - jeden wpis w dzienniku zdarzeń, started_at / completed_at ustawia serwis
+    _set_state(db, order, status, work_station_id)
 
-    db.commit()
-    db.refresh(order)
+    commit_or_400(db)
+    response.headers["ETag"] = version_etag(order)
     return serialize_order(order)
 
 @router.patch("/{order_id}", response_model=OrderRead)
-def patch_order(order_id: int, order_update: OrderUpdatePartial, db: Session = Depends(get_db)):
+def patch_order(order_id: int, order_update: OrderUpdatePartial, request: Request, response: Response,
+                db: Session = Depends(get_db)):
     order = get_object_or_404(db, Order, order_id, "Order")
+    check_if_match(request, order)
+    _check_work_station(db, order_update.work_station_id)
 
-    if order_update.status is not None:
-        order.status = order_update.status
-    if order_update.work_station_id is not None or order_update.work_station_id is None:
-        order.work_station_id = order_update.work_station_id
+    _set_state(db, order, order_update.status, order_update.work_station_id)
 
-    db.commit()
-    db.refresh(order)
+    commit_or_400(db)
+    response.headers["ETag"] = version_etag(order)
     return order
 
 @router.delete("/{order_id}")
-def delete_order(order_id: int, db: Session = Depends(get_db)):
+def delete_order(order_id: int, request: Request, db: Session = Depends(get_db)):
     order = get_object_or_404(db, Order, order_id, "Order")
+    check_if_match(request, order)
     
     db.delete(order)
+    db.add(OrderTombstone(order_id=order_id))
     db.commit()
     return {"message": "Order deleted successfully"}
 
@@ -356,9 +333,15 @@ def add_part_to_order(
     # Update stock
     part.stock_quantity -= order_part.quantity
 
+    # Suma części liczona w bazie, żeby równoległe dodawanie nie gubiło zmian
+    order.parts_total = Order.parts_total + order_part.quantity * unit_price
+    order.parts_count = Order.parts_count + 1
+    touch_order(order)
+
     db.add(db_order_part)
+    # Punkt zamówienia przelicza worker zadań - w tej samej transakcji, ale poza czasem odpowiedzi
+    jobs.enqueue(db, "reorder", {"part_ids": [part.id]})
     db.commit()
-    db.refresh(db_order_part)
 
     return {
         "id": db_order_part.id,
@@ -375,19 +358,17 @@ def add_part_to_order(
     }
 
 @router.get("/{order_id}/parts")
-def get_order_parts(order_id: int, db: Session = Depends(get_db)):
+def get_order_parts(order_id: int, db: Session = Depends(get_read_db)):
     # Verify order exists
     order = get_object_or_404(db, Order, order_id, "Order")
 
     order_parts = db.query(OrderPart).filter(OrderPart.order_id == order_id).all()
 
     result = []
-    total_cost = 0
 
     for op in order_parts:
         part = op.part
         item_total = op.quantity * op.unit_price
-        total_cost += item_total
 
         result.append({
             "id": op.id,
@@ -406,7 +387,7 @@ def get_order_parts(order_id: int, db: Session = Depends(get_db)):
     return {
         "order_id": order_id,
         "parts": result,
-        "total_parts_cost": total_cost
+        "total_parts_cost": order.parts_total
     }
 
 @router.delete("/{order_id}/parts/{order_part_id}")
@@ -415,19 +396,27 @@ def remove_part_from_order(
         order_part_id: int,
         db: Session = Depends(get_db)
 ):
+    # order_parts nie ma branch_id - zakres oddziału daje zlecenie (zlecenie innego oddziału -> 404)
+    order = get_object_or_404(db, Order, order_id, "Order")
+
     order_part = db.query(OrderPart).filter(
         OrderPart.id == order_part_id,
-        OrderPart.order_id == order_id
+        OrderPart.order_id == order.id
     ).first()
 
     if not order_part:
         raise HTTPException(status_code=404, detail="Order part not found")
 
     # Return stock
-    part = order_part.part
+    part = get_object_or_404(db, Part, order_part.part_id, "Part")
     part.stock_quantity += order_part.quantity
 
+    order.parts_total = Order.parts_total - order_part.quantity * order_part.unit_price
+    order.parts_count = Order.parts_count - 1
+    touch_order(order)
+
     db.delete(order_part)
+    jobs.enqueue(db, "reorder", {"part_ids": [part.id]})
     db.commit()
 
     return {"message": "Part removed from order successfully"}
\ No newline at end of file
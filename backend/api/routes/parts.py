@@ -1,12 +1,19 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import Optional
 
 from api.models import PartCreate, PartUpdate
-from api.utils import get_object_or_404, serialize_part
+from api.responses import FastJSONResponse
+from api.utils import (
+    get_object_or_404, commit_or_400, serialize_part, parse_fields, projection_columns, rows_to_dicts,
+    etag_matches, versions_etag, not_modified, check_if_match, version_etag, job_accepted
+)
 from models.part import Part
-from models.base import get_db
+from models.part_reorder import PartReorderStat
+from models.base import get_branch_id, get_db, get_read_db
 from models.order_part import OrderPart
+from services import jobs
 
 router = APIRouter(
     prefix="/api/parts",
@@ -15,19 +22,20 @@ router = APIRouter(
 
 @router.post("")
 def create_part(part: PartCreate, db: Session = Depends(get_db)):
-    existing = db.query(Part).filter(Part.code == part.code).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Part already exists")
-
     db_part = Part(**part.model_dump())
     db.add(db_part)
-    db.commit()
-    db.refresh(db_part)
+    commit_or_400(db, "Part already exists")
     return db_part
 
 @router.get("")
-def get_parts(skip: int = 0, limit: int = 100, search: Optional[str] = None, in_stock_only: bool = False, db: Session = Depends(get_db)):
-    query = db.query(Part)
+def get_parts(request: Request, response: Response, skip: int = 0, limit: int = 100, search: Optional[str] = None,
+              in_stock_only: bool = False, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+    etag = versions_etag(db, ["parts"], request.url.query)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    names = parse_fields(fields, Part)
+    query = select(*projection_columns(Part, names)) if names else db.query(Part)
 
     if search:
         query = query.filter(Part.name.ilike(f"%{search}%") | Part.code.ilike(f"%{search}%"))
@@ -35,28 +43,84 @@ def get_parts(skip: int = 0, limit: int = 100, search: Optional[str] = None, in_
     if in_stock_only:
         query = query.filter(Part.stock_quantity > 0)
 
+    if names:
+        rows = db.execute(query.offset(skip).limit(limit)).mappings().all()
+        return FastJSONResponse(rows_to_dicts(rows), headers={"ETag": etag})
+
     parts = query.offset(skip).limit(limit).all()
+    response.headers["ETag"] = etag
     return parts
 
+@router.get("/snapshot")
+def get_parts_snapshot(ids: Optional[str] = None, branch_id: int = Depends(get_branch_id)):
+    # Id, kod, cena i stan części oddziału ze współdzielonego snapshotu (services.refdata) - bez zapytania do bazy;
+    # stan magazynu może być o kilka sekund starszy niż w GET /api/parts
+    from services import refdata
+
+    part_ids = sorted({int(value) for value in ids.split(",") if value.strip()}) if ids else None
+    meta = refdata.meta()
+    return FastJSONResponse({
+        "generation": meta["generation"],
+        "built_at": meta["built_at"],
+        "parts": refdata.part_rows(branch_id, part_ids)
+    }, headers={"ETag": f'W/"refdata-{meta["generation"]}"'})
+
+@router.get("/reorder-suggestions")
+def get_reorder_suggestions(db: Session = Depends(get_read_db)):
+    # Wartości są przeliczone wcześniej przez services.reorder - tutaj tylko porównanie ze stanem
+    rows = db.query(Part, PartReorderStat).join(
+        PartReorderStat, PartReorderStat.part_id == Part.id
+    ).filter(
+        Part.stock_quantity <= PartReorderStat.reorder_point
+    ).order_by(
+        (PartReorderStat.reorder_point - Part.stock_quantity).desc()
+    ).all()
+
+    return [
+        {
+            "part_id": part.id,
+            "code": part.code,
+            "name": part.name,
+            "stock_quantity": part.stock_quantity,
+            "daily_usage": round(stat.daily_usage, 3),
+            "reorder_point": stat.reorder_point,
+            "suggested_quantity": max(stat.order_up_to - part.stock_quantity, 0),
+            "computed_at": stat.computed_at
+        }
+        for part, stat in rows
+    ]
+
+@router.post("/reorder-suggestions/rebuild", status_code=202)
+def rebuild_reorder_suggestions(db: Session = Depends(get_db)):
+    # Pełne przeliczenie robi worker zadań - wynik ({"parts": n}) pod /api/jobs/{id}
+    job = jobs.enqueue(db, "reorder")
+    db.commit()
+    return job_accepted(job)
+
 @router.get("/{part_id}")
-def get_part(part_id: int, db: Session = Depends(get_db)):
-    return get_object_or_404(db, Part, part_id, "Part")
+def get_part(part_id: int, response: Response, db: Session = Depends(get_read_db)):
+    part = get_object_or_404(db, Part, part_id, "Part")
+    response.headers["ETag"] = version_etag(part)
+    return part
 
 @router.put("/{part_id}")
-def update_part(part_id: int, part_update: PartUpdate, db: Session = Depends(get_db)):
+def update_part(part_id: int, part_update: PartUpdate, request: Request, response: Response,
+                db: Session = Depends(get_db)):
     part = get_object_or_404(db, Part, part_id, "Part")
+    check_if_match(request, part)
 
     update_data = part_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(part, key, value)
 
-    db.commit()
-    db.refresh(part)
+    commit_or_400(db, "Part already exists")
+    response.headers["ETag"] = version_etag(part)
     return part
 
 @router.delete("/{part_id}")
-def delete_part(part_id: int, db: Session = Depends(get_db)):
+def delete_part(part_id: int, request: Request, db: Session = Depends(get_db)):
     part = get_object_or_404(db, Part, part_id, "Part")
+    check_if_match(request, part)
 
     used_in_orders = db.query(OrderPart).filter(OrderPart.part_id == part_id).count()
     if used_in_orders > 0:
@@ -70,8 +134,10 @@ def delete_part(part_id: int, db: Session = Depends(get_db)):
     return {"message": "Part deleted successfully"}
 
 @router.put("/{part_id}/stock")
-def update_stock(part_id: int, quantity_change:int, db: Session = Depends(get_db)):
+def update_stock(part_id: int, quantity_change:int, request: Request, response: Response,
+                 db: Session = Depends(get_db)):
     part = get_object_or_404(db, Part, part_id, "Part")
+    check_if_match(request, part)
     new_stock_quantity = part.stock_quantity + quantity_change
 
     if new_stock_quantity < 0:
@@ -82,6 +148,6 @@ def update_stock(part_id: int, quantity_change:int, db: Session = Depends(get_db
 
     part.stock_quantity = new_stock_quantity
     db.commit()
-    db.refresh(part)
+    response.headers["ETag"] = version_etag(part)
 
     return serialize_part(part, quantity_change)
\ No newline at end of file
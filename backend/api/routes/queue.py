@@ -1,25 +1,36 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
-from models.base import get_db
+from api.coalesce import coalesce
+from api.responses import FastJSONResponse
+from api.utils import etag_matches, versions_etag, not_modified
+from models.base import DEFAULT_BRANCH_ID, get_read_db
+from models.branch import session_branch
 from models.order import Order
+from services import refdata
+
+# Tabele, od których zależy wynik kolejki (ETag i klucz coalesce). Stanowiska pochodzą ze snapshotu
+# refdata, który odświeża się z opóźnieniem - w ETagu są ich identyfikatory, nie licznik work_stations
+QUEUE_TABLES = ["orders"]
 
 router = APIRouter(
     prefix="/api/queue",
     tags=["queue"]
 )
 
-@router.get("")
-def get_queue(db: Session = Depends(get_db)):
-    station_1_orders = db.query(Order).filter(
-        Order.work_station_id == 1,
-        Order.status.in_(["in_progress", "waiting_for_parts"])
-    ).all()
-
-    station_2_orders = db.query(Order).filter(
-        Order.work_station_id == 2,
+def build_queue(db: Session, station_ids: Optional[list[int]] = None) -> bytes:
+    # Stanowiska oddziału ze współdzielonego snapshotu; zlecenia wszystkich stanowisk jednym zapytaniem.
+    # Zapytania o Order są zawężane do oddziału sesji (models.branch)
+    if station_ids is None:
+        station_ids = refdata.station_ids(session_branch(db, DEFAULT_BRANCH_ID))
+    station_orders = {station_id: [] for station_id in station_ids}
+    for order in db.query(Order).filter(
+        Order.work_station_id.in_(station_ids),
         Order.status.in_(["in_progress", "waiting_for_parts"])
-    ).all()
+    ).all():
+        station_orders[order.work_station_id].append(order)
 
     waiting_orders = db.query(Order).filter(
         Order.work_station_id == None,
@@ -41,10 +52,21 @@ def get_queue(db: Session = Depends(get_db)):
         Order.status.in_(["completed"])
     ).all()
     
-    return {
-        "station_1": station_1_orders,
-        "station_2": station_2_orders,
+    # Gotowe bajty - ten sam wynik może trafić do wielu żądań i sesji
+    return FastJSONResponse({
+        **{f"station_{station_id}": orders for station_id, orders in station_orders.items()},
         "waiting": waiting_orders,
         "waiting_for_parts": waiting_for_parts_orders,
         "completed": completed_orders
-    }
\ No newline at end of file
+    }).body
+
+@router.get("")
+def get_queue(request: Request, db: Session = Depends(get_read_db)):
+    # Wynik i ETag z tej samej listy stanowisk
+    station_ids = refdata.station_ids(session_branch(db, DEFAULT_BRANCH_ID))
+    etag = versions_etag(db, QUEUE_TABLES, station_ids)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = coalesce("queue", etag, lambda: build_queue(db, station_ids))
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
\ No newline at end of file
@@ -0,0 +1,34 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from api.responses import FastJSONResponse
+from models.base import DEFAULT_BRANCH_ID, get_read_db
+from models.branch import session_branch
+
+# Okresy obsługiwane przez services.reports (tu bez importu - NumPy dopiero przy pierwszym raporcie)
+PERIODS = ("day", "week", "month")
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"]
+)
+
+@router.get("/stations")
+def get_station_report(period: str = "week", day: Optional[date] = None, db: Session = Depends(get_read_db)):
+    # Okres zawierający `day` (domyślnie dziś, UTC); zamknięte okresy są serwowane z cache workera
+    if period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown period: {period} (allowed: {', '.join(PERIODS)})")
+
+    from services import reports
+
+    day = day or datetime.now(timezone.utc).date()
+    try:
+        report = reports.station_report(db, session_branch(db, DEFAULT_BRANCH_ID), period, day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"Cache-Control": "private, max-age=3600"} if report["closed"] else {"Cache-Control": "no-store"}
+    return FastJSONResponse(report, headers=headers)
@@ -1,12 +1,21 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.orm import Session
 
 from api.models import VehicleCreate
-from api.utils import get_object_or_404, serialize_vehicle
-from models.order import Order
+from api.responses import FastJSONResponse
+from api.utils import (
+    ACTIVE_STATUSES, CUSTOMER_FIELDS, get_object_or_404, commit_or_400, like_prefix, serialize_customer, serialize_vehicle,
+    parse_fields, projection_columns, rows_to_dicts
+)
+from models.archive import OrderArchive
+from models.order import Order, OrderStatus
 from models.customer import Customer
-from models.vehicle import Vehicle
-from models.base import get_db
+from models.vehicle import Vehicle, normalize_identifier
+from models.base import get_db, get_read_db
+
+VEHICLE_EXISTS = "Vehicle with this license plate or VIN already exists"
 
 router = APIRouter(
     prefix="/api/vehicles",
@@ -15,24 +24,83 @@ router = APIRouter(
 
 @router.post("")
 def create_vehicle(vehicle: VehicleCreate, db: Session = Depends(get_db)):
-    existing = db.query(Vehicle).filter(Vehicle.registration_number == vehicle.registration_number).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Vehicle with this license plate already exists")
-    
+    # Duplikat tablicy/VIN wykrywa unikalny indeks na registration_normalized / vin
     db_vehicle = Vehicle(**vehicle.model_dump())
     db.add(db_vehicle)
-    db.commit()
-    db.refresh(db_vehicle)
+    commit_or_400(db, VEHICLE_EXISTS)
     return db_vehicle
 
 @router.get("")
-def get_vehicles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_vehicles(skip: int = 0, limit: int = 100, fields: Optional[str] = None, db: Session = Depends(get_read_db)):
+    nested = {"owner": (Customer, CUSTOMER_FIELDS)}
+    names = parse_fields(fields, Vehicle, nested)
+    if names:
+        query = select(*projection_columns(Vehicle, names, nested))
+        if "owner" in names:
+            query = query.outerjoin(Customer, Customer.id == Vehicle.customer_id)
+
+        rows = db.execute(query.offset(skip).limit(limit)).mappings().all()
+        return FastJSONResponse(rows_to_dicts(rows))
+
     vehicles = db.query(Vehicle).outerjoin(Customer).offset(skip).limit(limit).all()
 
     result = []
     for vehicle in vehicles:
         result.append(serialize_vehicle(vehicle, include_owner=True))
 
+    return FastJSONResponse(result)
+
+@router.get("/lookup")
+def lookup_vehicles(q: str, limit: int = 20, db: Session = Depends(get_read_db)):
+    normalized = normalize_identifier(q)
+    if not normalized:
+        return []
+
+    pattern = like_prefix(normalized)
+
+    # Zarchiwizowane (zafakturowane) zlecenia dochodzą jako skorelowane podzapytania
+    archived_last_order_at = select(func.max(OrderArchive.created_at)).where(
+        OrderArchive.vehicle_id == Vehicle.id
+    ).scalar_subquery()
+    archived_spend = select(func.coalesce(func.sum(OrderArchive.final_cost), 0)).where(
+        OrderArchive.vehicle_id == Vehicle.id
+    ).scalar_subquery()
+
+    # Pojazd, właściciel i podsumowanie historii w jednym zapytaniu
+    rows = db.query(
+        Vehicle,
+        Customer,
+        func.max(Order.created_at).label("last_order_at"),
+        func.coalesce(func.sum(case((Order.status.in_(ACTIVE_STATUSES), 1), else_=0)), 0).label("open_orders"),
+        func.coalesce(func.sum(case((Order.status == OrderStatus.INVOICED, Order.final_cost), else_=0)), 0).label("lifetime_spend"),
+        archived_last_order_at.label("archived_last_order_at"),
+        archived_spend.label("archived_spend")
+    ).outerjoin(
+        Customer, Customer.id == Vehicle.customer_id
+    ).outerjoin(
+        Order, Order.vehicle_id == Vehicle.id
+    ).filter(
+        or_(
+            Vehicle.registration_normalized.like(pattern, escape="\\"),
+            Vehicle.vin_normalized.like(pattern, escape="\\")
+        )
+    ).group_by(
+        Vehicle.id, Customer.id
+    ).order_by(
+        Vehicle.registration_normalized
+    ).limit(limit).all()
+
+    result = []
+    for vehicle, owner, last_order_at, open_orders, lifetime_spend, archived_last_order_at, archived_spend in rows:
+        data = serialize_vehicle(vehicle)
+        data["owner"] = serialize_customer(owner) if owner else None
+        data["summary"] = {
+            "last_order_at": max(filter(None, [last_order_at, archived_last_order_at]), default=None),
+            "open_orders": int(open_orders),
+            "lifetime_spend": float(lifetime_spend) + float(archived_spend or 0)
+        }
+        result.append(data)
+
     return result
 
 @router.put("/{vehicle_id}")
@@ -42,8 +110,7 @@ def update_vehicle(vehicle_id: int, vehicle_db: VehicleCreate, db: Session = Dep
     for key, value in vehicle_db.model_dump().items():
         setattr(vehicle, key, value)
 
-    db.commit()
-    db.refresh(vehicle)
+    commit_or_400(db, VEHICLE_EXISTS)
     return vehicle
 
 @router.delete("/{vehicle_id}")
@@ -51,6 +118,7 @@ def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     vehicle = get_object_or_404(db, Vehicle, vehicle_id, "Vehicle")
 
     orders_count = db.query(Order).filter(Order.vehicle_id == vehicle_id).count()
+    orders_count += db.query(OrderArchive).filter(OrderArchive.vehicle_id == vehicle_id).count()
     if orders_count > 0:
         raise HTTPException(status_code=400, detail=f"Can't remove the vehicle, there's {orders_count} orders")
     
@@ -1,20 +1,54 @@
+import hashlib
+from datetime import datetime, timezone
 from typing import Optional
-from fastapi import HTTPException
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from models.customer import Customer
-from models.order import Order
+from models.order import Order, OrderStatus
 from models.vehicle import Vehicle
 from models.part import Part
+from models.base import utc_now
+from models.table_version import TableVersion
+from models.branch import session_branch
+from models.job import Job, JobStatus
+from api.responses import FastJSONResponse
 
-ACTIVE_STATUSES = ["new", "in_progress", "waiting_for_parts"]
+# Członkowie enuma, nie "new" itd. - kolumna przechowuje nazwy (NEW), a małe litery pasują tylko w MariaDB
+ACTIVE_STATUSES = [OrderStatus.NEW, OrderStatus.IN_PROGRESS, OrderStatus.WAITING_FOR_PARTS]
 
-def get_object_or_404(db: Session, model, object_id: int, name: str = "Object"):
-    obj = db.query(model).filter(model.id == object_id).first()
+# Pola zagnieżdżonych projekcji (?fields=...,customer) - te same co w serialize_customer/serialize_vehicle
+CUSTOMER_FIELDS = ["id", "name", "phone", "email"]
+VEHICLE_FIELDS = ["id", "brand", "model", "registration_number", "year", "vin", "customer_id"]
+
+def get_object_or_404(db: Session, model, object_id: int, name: str = "Object", options=()):
+    # options - np. joinedload relacji potrzebnych w odpowiedzi, żeby nie doczytywać ich osobno
+    obj = db.query(model).options(*options).filter(model.id == object_id).first()
     if obj is None:
         raise HTTPException(status_code=404, detail=f"{name} not found")
     return obj
 
+def _is_duplicate(error: IntegrityError) -> bool:
+    # MySQL/MariaDB: 1062 Duplicate entry; SQLite: UNIQUE constraint failed
+    code = error.orig.args[0] if getattr(error.orig, "args", None) else None
+    return code == 1062 or "UNIQUE constraint" in str(error.orig)
+
+def commit_or_400(db: Session, duplicate_detail: str = "Object already exists"):
+    # Zapis bez wstępnego SELECT-a "czy już istnieje" - duplikat zgłasza unikalny indeks, brak powiązanego
+    # obiektu klucz obcy; w obu przypadkach 400 zamiast 500, a odpowiedź budujemy z obiektu w pamięci
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        detail = duplicate_detail if _is_duplicate(e) else "Related object does not exist"
+        raise HTTPException(status_code=400, detail=detail)
+
+def like_prefix(value: str) -> str:
+    # Wzorzec "zaczyna się od" - pozwala bazie użyć indeksu zamiast pełnego skanu
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
 def serialize_customer(customer: Customer) -> dict:
     return {
         "id": customer.id,
@@ -51,12 +85,26 @@ def serialize_order(order: Order) -> dict:
             "created_at": order.created_at,
             "started_at": order.started_at,
             "completed_at": order.completed_at,
+            "updated_at": order.updated_at,
             "estimated_cost": order.estimated_cost,
             "final_cost": order.final_cost,
+            "parts_total": order.parts_total,
+            "parts_count": order.parts_count,
+            "version": order.version,
             "customer": serialize_customer(order.customer) if order.customer else None,
             "vehicle": serialize_vehicle(order.vehicle) if order.vehicle else None
     }
 
+def touch_order(order: Order):
+    # Zmiany w order_parts nie aktualizują wiersza zlecenia, więc znacznik trzeba ustawić ręcznie
+    order.updated_at = utc_now()
+
+def to_naive_utc(value: datetime) -> datetime:
+    # Kolumny DateTime przechowują czas UTC bez strefy
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 def serialize_part(part: Part, quantity_change: int) -> dict:
     return {
         "part_id": part.id,
@@ -67,6 +115,25 @@ def serialize_part(part: Part, quantity_change: int) -> dict:
         "new_stock": part.stock_quantity
     }
 
+def serialize_job(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+        "result": job.result,
+        "result_url": f"/api/jobs/{job.id}/result" if job.status == JobStatus.SUCCEEDED else None
+    }
+
+def job_accepted(job: Job) -> FastJSONResponse:
+    # 202 + Location - klient odpytuje status zamiast trzymać połączenie
+    return FastJSONResponse(serialize_job(job), status_code=202, headers={"Location": f"/api/jobs/{job.id}"})
+
 def count_active_orders(db : Session, customer_id: Optional[int] = None):
     if customer_id is None:
         result = db.query(Order).filter(
@@ -77,4 +144,87 @@ def count_active_orders(db : Session, customer_id: Optional[int] = None):
             Order.customer_id == customer_id,
             Order.status.in_(ACTIVE_STATUSES)
         ).count()
-    return result
\ No newline at end of file
+    return result
+
+def parse_fields(fields: Optional[str], model, nested: Optional[dict] = None) -> Optional[list[str]]:
+    # ?fields=id,name -> ["id", "name"]; None oznacza pełną odpowiedź
+    if not fields:
+        return None
+
+    allowed = set(model.__table__.columns.keys()) | set(nested or {})
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def projection_columns(model, names: list[str], nested: Optional[dict] = None) -> list:
+    # Kolumny dla select() - zagnieżdżone obiekty dostają etykiety "relacja__pole"
+    columns = []
+    for name in names:
+        if nested and name in nested:
+            related, related_fields = nested[name]
+            columns.extend(getattr(related, field).label(f"{name}__{field}") for field in related_fields)
+        else:
+            columns.append(getattr(model, name).label(name))
+    return columns
+
+def rows_to_dicts(rows) -> list[dict]:
+    result = []
+    for row in rows:
+        item = {}
+        for key, value in row.items():
+            parent, separator, child = key.partition("__")
+            if separator:
+                item.setdefault(parent, {})[child] = value
+            else:
+                item[key] = value
+
+        # Brak dopasowania w outer join -> None zamiast słownika pełnego None
+        for key, value in item.items():
+            if isinstance(value, dict) and all(v is None for v in value.values()):
+                item[key] = None
+
+        result.append(item)
+    return result
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # Porównanie słabe (RFC 9110) - prefiks W/ nie ma znaczenia
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates or "*" in candidates
+
+def version_etag(obj) -> str:
+    # Silny ETag pojedynczego zlecenia/części - to samo co pole version
+    return f'"{obj.version}"'
+
+def check_if_match(request: Request, obj):
+    # Klient odsyła wersję, którą widział; inna wersja w bazie = ktoś zmienił obiekt w międzyczasie
+    if_match = request.headers.get("if-match")
+    if not if_match:
+        return
+    candidates = [tag.strip().removeprefix("W/").strip('"') for tag in if_match.split(",")]
+    if "*" in candidates or str(obj.version) in candidates:
+        return
+    raise HTTPException(
+        status_code=409,
+        detail=f"Version conflict: current version is {obj.version}",
+        headers={"ETag": version_etag(obj)}
+    )
+
+def versions_etag(db: Session, tables: list[str], *extra) -> str:
+    # Jedno zapytanie po liczniki z table_versions zamiast pobierania i serializacji wierszy
+    versions = dict(db.query(TableVersion.table_name, TableVersion.version).filter(
+        TableVersion.table_name.in_(tables)
+    ).all())
+    raw = ";".join(f"{table}={versions.get(table, 0)}" for table in sorted(tables))
+    # Liczniki są wspólne dla oddziałów - oddział w ETagu (i kluczu coalesce), żeby nie oddać cudzych danych
+    raw += f"|branch={session_branch(db)}"
+    raw += "|" + "|".join(str(value) for value in extra)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
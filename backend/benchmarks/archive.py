@@ -0,0 +1,70 @@
+"""
+Czas zapytań na gorących tabelach przed i po archiwizacji zafakturowanych zleceń.
+
+    python -m benchmarks.archive                 # tylko pomiar
+    python -m benchmarks.archive --archive 12    # pomiar, archiwizacja starszych niż 12 mies., pomiar
+
+Uruchamiać na kopii bazy - archiwizacja przenosi dane.
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+from api.routes.dashboard import build_dashboard_stats
+from api.routes.queue import build_queue
+from models.base import SessionLocal, engine
+from models.order import Order
+from services.archive import archive_invoiced_orders
+
+REPEAT = 20
+
+def _orders_page(db):
+    return db.query(Order).order_by(Order.priority.desc(), Order.created_at.asc()).limit(100).all()
+
+QUERIES = {
+    "queue": build_queue,
+    "dashboard": lambda db: build_dashboard_stats(db, date.today()),
+    "orders (100)": _orders_page,
+}
+
+def measure() -> dict:
+    results = {}
+    db = SessionLocal()
+    try:
+        results["rows in orders"] = db.query(Order).count()
+        for name, query in QUERIES.items():
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                query(db)
+                timings.append((time.perf_counter() - started) * 1000)
+                db.expunge_all()
+            results[name] = statistics.median(timings)
+    finally:
+        db.close()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--archive", type=int, metavar="MONTHS", help="zarchiwizuj zlecenia starsze niż MONTHS")
+    args = parser.parse_args()
+
+    engine.echo = False
+    before = measure()
+
+    if args.archive is None:
+        for name, value in before.items():
+            print(f"{name:15} {value:10.2f}")
+    else:
+        db = SessionLocal()
+        try:
+            moved = archive_invoiced_orders(db, months=args.archive, pause=0)
+        finally:
+            db.close()
+        after = measure()
+
+        print(f"Przeniesiono {moved} zleceń")
+        print(f"{'':15} {'przed':>10} {'po':>10}")
+        for name in before:
+            print(f"{name:15} {before[name]:10.2f} {after[name]:10.2f}")
@@ -0,0 +1,118 @@
+"""
+Narzut uwierzytelniania na żądanie i zachowanie pętli zdarzeń przy logowaniu.
+
+    python -m benchmarks.auth
+
+Mierzy zależność api.auth.authenticate wywoływaną bezpośrednio (bez HTTP):
+bez tokenu, z tokenem spoza cache (dekodowanie JWT + odczyt użytkownika) i
+z tokenem z cache. Liczy też zapytania SQL przy trafieniach w cache (muszą
+wynosić 0) oraz największe opóźnienie pętli zdarzeń, gdy równolegle trwa
+LOGINS logowań (PBKDF2 w puli wątków). Kończy się kodem 1 po przekroczeniu
+HIT_BUDGET_MS, MAX_LOOP_LAG_MS albo przy zapytaniach przy trafieniach.
+Tymczasowy użytkownik jest na końcu usuwany.
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+from sqlalchemy import delete, event
+from starlette.requests import Request
+
+from api import auth
+from api.models import LoginRequest
+from api.routes.auth import login
+from models.base import SessionLocal, engine
+from models.user import User
+
+REPEAT = 2000
+HIT_BUDGET_MS = 0.1
+MAX_LOOP_LAG_MS = 50.0
+LOGINS = 4
+PASSWORD = "benchmark-password"
+
+def _request(token: str = None) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/api/orders", "headers": headers})
+
+def create_user(suffix: str) -> User:
+    db = SessionLocal()
+    try:
+        user = User(username=f"bench-{suffix}", email=f"bench-{suffix}@example.com",
+                    hashed_password=auth.hash_password(PASSWORD))
+        db.add(user)
+        db.commit()
+        return user
+    finally:
+        db.close()
+
+async def measure(token, clear_cache: bool = False) -> list[float]:
+    timings = []
+    for _ in range(REPEAT if not clear_cache else REPEAT // 10):
+        if clear_cache:
+            auth.principal_cache.clear()
+        request = _request(token)
+        started = time.perf_counter()
+        await auth.authenticate(request)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+async def loop_lag_during_logins(username: str) -> tuple[float, float]:
+    # Ticker co 1 ms - gdyby PBKDF2 liczył się w wątku pętli, opóźnienie sięgnęłoby czasu hashowania
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, (time.perf_counter() - started) * 1000 - 1)
+
+    task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*[login(LoginRequest(username=username, password=PASSWORD)) for _ in range(LOGINS)])
+    elapsed = (time.perf_counter() - started) * 1000
+    done.set()
+    await task
+    return lag, elapsed
+
+def _summary(timings: list[float]) -> str:
+    timings = sorted(timings)
+    return f"mediana {statistics.median(timings) * 1000:8.1f} µs   p99 {timings[int(len(timings) * 0.99)] * 1000:8.1f} µs"
+
+async def main() -> bool:
+    user = create_user(uuid.uuid4().hex[:8])
+    try:
+        token, _ = auth.create_access_token(user)
+
+        no_token = await measure(None)
+        miss = await measure(token, clear_cache=True)
+        await auth.authenticate(_request(token))
+
+        queries = []
+        listener = lambda *args: queries.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            hit = await measure(token)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        lag, elapsed = await loop_lag_during_logins(user.username)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(delete(User).where(User.id == user.id))
+
+    print(f"bez tokenu        {_summary(no_token)}")
+    print(f"token spoza cache {_summary(miss)}")
+    print(f"token z cache     {_summary(hit)}   zapytań SQL: {len(queries)}")
+    print(f"{LOGINS} logowania równolegle: {elapsed:.0f} ms, maks. opóźnienie pętli {lag:.1f} ms")
+
+    return statistics.median(hit) <= HIT_BUDGET_MS and not queries and lag <= MAX_LOOP_LAG_MS
+
+if __name__ == "__main__":
+    engine.echo = False
+    if not auth.SECRET_KEY:
+        auth.SECRET_KEY = "benchmark-only-secret"
+    sys.exit(0 if asyncio.run(main()) else 1)
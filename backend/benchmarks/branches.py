@@ -0,0 +1,135 @@
+"""
+Koszt kolejki i dashboardu jednego oddziału przy rosnącej liczbie zleceń
+w pozostałych oddziałach.
+
+    python -m benchmarks.branches --orders 200 --noise 50000
+
+Tworzy dwa oddziały testowe: mierzony (--orders zleceń) i "tło" (--noise
+zleceń), i mierzy build_queue / build_dashboard_stats w sesji mierzonego
+oddziału przed i po zasileniu tła. Zapytania są zawężone do oddziału, a
+indeksy orders zaczynają się od branch_id, więc czasy powinny być zbliżone
+niezależnie od rozmiaru tła. Oddziały testowe i ich dane są na końcu
+usuwane.
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import date
+
+from sqlalchemy import delete, insert
+
+from api.routes.dashboard import build_dashboard_stats
+from api.routes.queue import build_queue
+from models.base import SessionLocal, branch_session, engine
+from models.branch import Branch
+from models.customer import Customer
+from models.order import Order, OrderStatus, Priority
+from models.vehicle import Vehicle
+from models.work_station import WorkStation
+from services import refdata
+
+REPEAT = 20
+SEED_BATCH = 5000
+STATUSES = list(OrderStatus)
+PRIORITIES = list(Priority)
+
+QUERIES = {
+    "queue": build_queue,
+    "dashboard": lambda db: build_dashboard_stats(db, date.today()),
+}
+
+def create_fixtures(suffix: str) -> dict:
+    db = SessionLocal()
+    try:
+        measured = Branch(code=f"bm-{suffix}", name="Benchmark")
+        noise = Branch(code=f"bn-{suffix}", name="Benchmark - tło")
+        customer = Customer(name=f"Benchmark {suffix}")
+        db.add_all([measured, noise, customer])
+        db.flush()
+        vehicle = Vehicle(customer_id=customer.id, brand="Skoda", model="Octavia", registration_number=f"BR {suffix}")
+        stations = [WorkStation(name=f"Stanowisko {number}", branch_id=measured.id) for number in (1, 2)]
+        db.add_all([vehicle, *stations])
+        db.commit()
+        fixtures = {
+            "branches": [measured.id, noise.id],
+            "customer_id": customer.id,
+            "vehicle_id": vehicle.id,
+            "station_ids": [station.id for station in stations],
+        }
+    finally:
+        db.close()
+
+    # Mierzony oddział musi być w snapshocie, z którego kolejka bierze stanowiska
+    refdata.build()
+    refdata.invalidate()
+    return fixtures
+
+def seed_orders(fixtures: dict, branch_id: int, count: int, station_ids: list[int]):
+    db = SessionLocal()
+    try:
+        for start in range(0, count, SEED_BATCH):
+            rows = []
+            for i in range(start, min(start + SEED_BATCH, count)):
+                status = STATUSES[i % len(STATUSES)]
+                busy = status in (OrderStatus.IN_PROGRESS, OrderStatus.WAITING_FOR_PARTS) and station_ids
+                rows.append({
+                    "branch_id": branch_id,
+                    "customer_id": fixtures["customer_id"],
+                    "vehicle_id": fixtures["vehicle_id"],
+                    "work_station_id": station_ids[i % len(station_ids)] if busy else None,
+                    "description": "Benchmark",
+                    "priority": PRIORITIES[i % len(PRIORITIES)],
+                    "status": status,
+                })
+            db.execute(insert(Order), rows)
+            db.commit()
+    finally:
+        db.close()
+
+def measure(branch_id: int) -> dict:
+    results = {}
+    db = branch_session(branch_id)
+    try:
+        for name, query in QUERIES.items():
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                query(db)
+                timings.append((time.perf_counter() - started) * 1000)
+                db.expunge_all()
+            results[name] = statistics.median(timings)
+    finally:
+        db.close()
+    return results
+
+def cleanup(fixtures: dict):
+    with engine.begin() as connection:
+        connection.execute(delete(Order).where(Order.branch_id.in_(fixtures["branches"])))
+        connection.execute(delete(WorkStation).where(WorkStation.id.in_(fixtures["station_ids"])))
+        connection.execute(delete(Vehicle).where(Vehicle.id == fixtures["vehicle_id"]))
+        connection.execute(delete(Customer).where(Customer.id == fixtures["customer_id"]))
+        connection.execute(delete(Branch).where(Branch.id.in_(fixtures["branches"])))
+    refdata.build()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200, help="zlecenia mierzonego oddziału")
+    parser.add_argument("--noise", type=int, default=50000, help="zlecenia oddziału tła")
+    args = parser.parse_args()
+
+    engine.echo = False
+    fixtures = create_fixtures(uuid.uuid4().hex[:8].upper())
+    measured, noise = fixtures["branches"]
+
+    try:
+        seed_orders(fixtures, measured, args.orders, fixtures["station_ids"])
+        before = measure(measured)
+        seed_orders(fixtures, noise, args.noise, [])
+        after = measure(measured)
+    finally:
+        cleanup(fixtures)
+
+    print(f"{'ms (mediana)':15} {'bez tła':>10} {f'tło {args.noise}':>14} {'stosunek':>9}")
+    for name in QUERIES:
+        print(f"{name:15} {before[name]:10.2f} {after[name]:14.2f} {after[name] / before[name]:9.2f}")
@@ -0,0 +1,162 @@
+"""
+Równoległe zmiany tych samych wierszy: bez blokady, blokada optymistyczna
+(version_id_col + ponowienie) i pesymistyczna (SELECT ... FOR UPDATE).
+
+    python -m benchmarks.concurrency --threads 8 --ops 200 --rows 1
+    python -m benchmarks.concurrency --rows 50      # mniejsza rywalizacja o wiersze
+
+Każdy wątek powtarza to, co robi endpoint zmiany stanu magazynu: odczyt
+części, chwila "pracy" (--think-ms), zapis stanu o 1 mniejszego. Po każdym
+wariancie porównujemy stan w bazie z oczekiwanym - różnica to zgubione
+aktualizacje. Części testowe są zakładane i usuwane przez benchmark.
+
+Uruchamiać na MariaDB - SQLite nie ma FOR UPDATE ani równoległych zapisów.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm.exc import StaleDataError
+
+from models.base import SessionLocal, engine
+from models.part import Part
+
+CODE_PREFIX = "BENCH-CONC-"
+INITIAL_STOCK = 1_000_000
+
+def _naive(db, part_id: int, think: float) -> int:
+    # Odczyt i zapis bez żadnej kontroli - tak działał update_order/patch_order przed kolumną version
+    stock = db.execute(select(Part.stock_quantity).where(Part.id == part_id)).scalar_one()
+    time.sleep(think)
+    db.execute(update(Part).where(Part.id == part_id).values(stock_quantity=stock - 1))
+    db.commit()
+    return 0
+
+def _optimistic(db, part_id: int, think: float) -> int:
+    conflicts = 0
+    while True:
+        part = db.get(Part, part_id)
+        time.sleep(think)
+        part.stock_quantity -= 1
+        try:
+            db.commit()
+            return conflicts
+        except StaleDataError:
+            # To, co API zwraca jako 409 - klient odczytuje ponownie i ponawia
+            db.rollback()
+            conflicts += 1
+
+def _pessimistic(db, part_id: int, think: float) -> int:
+    part = db.execute(select(Part).where(Part.id == part_id).with_for_update()).scalar_one()
+    time.sleep(think)
+    part.stock_quantity -= 1
+    db.commit()
+    return 0
+
+STRATEGIES = {
+    "naive": _naive,
+    "optimistic": _optimistic,
+    "pessimistic": _pessimistic,
+}
+
+def create_parts(rows: int) -> list[int]:
+    db = SessionLocal()
+    try:
+        parts = [
+            Part(code=f"{CODE_PREFIX}{i}", name=f"Część testowa {i}", price=1.0, stock_quantity=INITIAL_STOCK)
+            for i in range(rows)
+        ]
+        db.add_all(parts)
+        db.commit()
+        return [part.id for part in parts]
+    finally:
+        db.close()
+
+def drop_parts():
+    with engine.begin() as connection:
+        connection.execute(delete(Part).where(Part.code.like(f"{CODE_PREFIX}%")))
+
+def run(strategy: str, part_ids: list[int], threads: int, ops: int, think: float) -> dict:
+    with engine.begin() as connection:
+        connection.execute(update(Part).where(Part.id.in_(part_ids)).values(stock_quantity=INITIAL_STOCK))
+
+    func = STRATEGIES[strategy]
+    timings = []
+    totals = {"conflicts": 0, "errors": 0}
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker():
+        db = SessionLocal()
+        local_timings = []
+        conflicts = errors = 0
+        try:
+            start_gate.wait()
+            for _ in range(ops):
+                started = time.perf_counter()
+                try:
+                    conflicts += func(db, random.choice(part_ids), think)
+                except Exception:
+                    # Np. deadlock / lock wait timeout przy FOR UPDATE
+                    db.rollback()
+                    errors += 1
+                local_timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+        with lock:
+            timings.extend(local_timings)
+            totals["conflicts"] += conflicts
+            totals["errors"] += errors
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        remaining = sum(db.execute(select(Part.stock_quantity).where(Part.id.in_(part_ids))).scalars())
+    finally:
+        db.close()
+
+    applied = threads * ops - totals["errors"]
+    timings.sort()
+    return {
+        "ops/s": applied / elapsed,
+        "p50 ms": statistics.median(timings),
+        "p95 ms": timings[max(int(len(timings) * 0.95) - 1, 0)],
+        "conflicts": totals["conflicts"],
+        "errors": totals["errors"],
+        "lost updates": (INITIAL_STOCK * len(part_ids) - remaining) - applied,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="operacji na wątek")
+    parser.add_argument("--rows", type=int, default=1, help="ile wierszy dzielą wątki (1 = jeden gorący wiersz)")
+    parser.add_argument("--think-ms", type=float, default=2.0, help="czas między odczytem a zapisem")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), action="append")
+    args = parser.parse_args()
+
+    engine.echo = False
+    drop_parts()
+    part_ids = create_parts(args.rows)
+    try:
+        results = {
+            strategy: run(strategy, part_ids, args.threads, args.ops, args.think_ms / 1000)
+            for strategy in args.strategy or list(STRATEGIES)
+        }
+    finally:
+        drop_parts()
+
+    columns = ["ops/s", "p50 ms", "p95 ms", "conflicts", "errors", "lost updates"]
+    print(f"{'':12}" + "".join(f"{column:>14}" for column in columns))
+    for strategy, result in results.items():
+        print(f"{strategy:12}" + "".join(f"{result[column]:>14.1f}" for column in columns))
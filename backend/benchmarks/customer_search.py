@@ -0,0 +1,65 @@
+"""
+Pomiar czasu wyszukiwania klientów (GET /api/customers/search).
+
+    python -m benchmarks.customer_search --seed 1000000
+    python -m benchmarks.customer_search
+
+Uruchamiać z katalogu backend, na bazie wskazanej przez DATABASE_URL.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from sqlalchemy import insert
+
+from api.routes.customers import search_customers
+from models.base import SessionLocal, engine
+from models.customer import Customer, normalize_phone
+
+FIRST_NAMES = ["Jan", "Anna", "Piotr", "Maria", "Tomasz", "Katarzyna", "Paweł", "Agnieszka"]
+LAST_NAMES = ["Kowalski", "Nowak", "Wiśniewski", "Wójcik", "Kamiński", "Lewandowski", "Zieliński"]
+QUERIES = ["Jan K", "anna.n", "+48 600 1", "601234", "Tomasz Z", "kasia", "zzz"]
+
+def seed(count: int, batch_size: int = 10000):
+    with engine.begin() as connection:
+        for start in range(0, count, batch_size):
+            rows = []
+            for i in range(start, min(start + batch_size, count)):
+                name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)} {i}"
+                phone = f"+48 {random.randint(500, 899)} {random.randint(100, 999)} {random.randint(100, 999)}"
+                rows.append({
+                    "name": name,
+                    "phone": phone,
+                    "phone_normalized": normalize_phone(phone),
+                    "email": f"{''.join(random.choices(string.ascii_lowercase, k=6))}.{i}@example.com",
+                })
+            connection.execute(insert(Customer), rows)
+            print(f"seeded {min(start + batch_size, count)}/{count}")
+
+def run(repeat: int):
+    db = SessionLocal()
+    try:
+        for q in QUERIES:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                found = search_customers(q=q, limit=20, db=db)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{q!r:14} hits={len(found):3} p50={statistics.median(timings):6.2f} ms p95={p95:6.2f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0, help="ile losowych klientów dodać przed pomiarem")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.seed:
+        seed(args.seed)
+    run(args.repeat)
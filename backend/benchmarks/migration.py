@@ -0,0 +1,167 @@
+"""
+Migracja online na dużej tabeli orders przy równoległych zapisach z API.
+
+    python -m benchmarks.migration --seed 2000000
+    python -m benchmarks.migration --interrupt 50000   # przerwij backfill i wznów
+
+Dodaje tymczasową kolumnę, wypełnia ją przez migration_helpers.backfill, zakłada
+indeks, po czym wszystko sprząta. W tym czasie wątki piszące dodają i zmieniają
+zlecenia jak endpointy API; mierzymy ich opóźnienia przed i w trakcie migracji
+oraz sprawdzamy, że backfill objął wszystkie wiersze.
+
+Uruchamiać na kopii bazy.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy import insert, select, update
+
+from migration_helpers import (add_column_online, backfill, clear_progress, create_index_online,
+                               drop_column_online, drop_index_online)
+from models.base import SessionLocal, engine
+from models.customer import Customer
+from models.order import Order, OrderStatus, Priority
+from models.vehicle import Vehicle
+
+COLUMN = "migration_bench"
+INDEX = "ix_orders_migration_bench"
+PROGRESS_NAME = "benchmark:orders.migration_bench"
+WRITERS = 4
+BASELINE_SECONDS = 5
+
+def seed(count: int, batch_size: int = 10000):
+    db = SessionLocal()
+    try:
+        vehicle = db.query(Vehicle).first()
+        if vehicle is None:
+            customer = Customer(name="Klient testowy", phone="600100200")
+            db.add(customer)
+            db.flush()
+            vehicle = Vehicle(customer_id=customer.id, brand="Toyota", model="Corolla", registration_number="WB00001")
+            db.add(vehicle)
+            db.commit()
+        customer_id, vehicle_id = vehicle.customer_id, vehicle.id
+    finally:
+        db.close()
+
+    with engine.begin() as connection:
+        for start in range(0, count, batch_size):
+            connection.execute(insert(Order), [
+                {
+                    "customer_id": customer_id,
+                    "vehicle_id": vehicle_id,
+                    "description": f"Zlecenie testowe {i}",
+                    "priority": random.choice(list(Priority)),
+                    "status": OrderStatus.INVOICED,
+                }
+                for i in range(start, min(start + batch_size, count))
+            ])
+            print(f"seeded {min(start + batch_size, count)}/{count}")
+
+class Writers:
+    def __init__(self):
+        self.timings = []
+        self.errors = 0
+        self.stop = threading.Event()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def _run(self):
+        db = SessionLocal()
+        vehicle = db.query(Vehicle).first()
+        max_id = db.execute(select(sa.func.max(Order.id))).scalar() or 1
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                try:
+                    db.add(Order(customer_id=vehicle.customer_id, vehicle_id=vehicle.id, description="Zapis w trakcie migracji"))
+                    db.execute(
+                        update(Order).where(Order.id == random.randint(1, max_id)).values(status=OrderStatus.IN_PROGRESS)
+                    )
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    with self.lock:
+                        self.errors += 1
+                    continue
+                with self.lock:
+                    self.timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(WRITERS)]
+        for thread in self.threads:
+            thread.start()
+
+    def collect(self) -> list[float]:
+        with self.lock:
+            timings, self.timings = self.timings, []
+        return timings
+
+    def close(self):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+def _summary(label: str, timings: list[float]) -> str:
+    if not timings:
+        return f"{label:18} brak zapisów"
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    return (f"{label:18} n={len(timings):6} p50={statistics.median(timings):7.2f} ms "
+            f"p95={p95:7.2f} ms max={timings[-1]:8.2f} ms")
+
+def migrate(connection, interrupt: int) -> tuple[int, float]:
+    started = time.perf_counter()
+    add_column_online("orders", sa.Column(COLUMN, sa.Integer(), nullable=True), connection=connection)
+    max_id = connection.execute(select(sa.func.max(Order.id))).scalar() or 0
+
+    if interrupt:
+        done = backfill("orders", f"{COLUMN} = id % 97", name=PROGRESS_NAME, connection=connection, max_rows=interrupt)
+        print(f"Backfill przerwany po {done} wierszach - wznawiam")
+    backfill("orders", f"{COLUMN} = id % 97", name=PROGRESS_NAME, connection=connection)
+    create_index_online(INDEX, "orders", [COLUMN], connection=connection)
+    return max_id, time.perf_counter() - started
+
+def cleanup(connection):
+    drop_index_online(INDEX, "orders", connection=connection)
+    drop_column_online("orders", COLUMN, connection=connection)
+    clear_progress(PROGRESS_NAME, connection=connection)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0, help="ile zleceń dodać przed pomiarem")
+    parser.add_argument("--interrupt", type=int, default=0, help="przerwij backfill po tylu wierszach i wznów")
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.seed:
+        seed(args.seed)
+
+    writers = Writers()
+    writers.start()
+    time.sleep(BASELINE_SECONDS)
+    baseline = writers.collect()
+
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        cleanup(connection)
+        max_id, elapsed = migrate(connection, args.interrupt)
+        during = writers.collect()
+        writers.close()
+
+        missing = connection.execute(
+            sa.text(f"SELECT COUNT(*) FROM orders WHERE id <= :max_id AND {COLUMN} IS NULL"), {"max_id": max_id}
+        ).scalar()
+        cleanup(connection)
+    finally:
+        connection.close()
+
+    print(f"Migracja: {elapsed:.1f} s, wiersze bez wartości: {missing}, błędy zapisów: {writers.errors}")
+    print(_summary("przed migracją", baseline))
+    print(_summary("w trakcie migracji", during))
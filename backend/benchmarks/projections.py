@@ -0,0 +1,56 @@
+"""
+Pełne encje ORM vs lekkie projekcje (?fields=) dla list.
+
+    python -m benchmarks.projections
+
+Mierzy czas i szczytową alokację pamięci (tracemalloc) handlerów list na bazie
+wskazanej przez DATABASE_URL - warto najpierw zasilić ją danymi
+(add_test_data.py, benchmarks.customer_search --seed).
+"""
+import time
+import tracemalloc
+
+from api.routes.customers import get_customers
+from api.routes.orders import get_orders
+from api.routes.parts import get_parts
+from api.routes.vehicles import get_vehicles
+from models.base import SessionLocal, engine
+
+LIMIT = 500
+REPEAT = 20
+
+CASES = [
+    ("customers", get_customers, "id,name"),
+    ("vehicles", get_vehicles, "id,registration_number"),
+    ("parts", get_parts, "id,name"),
+    ("orders", get_orders, "id,status,priority"),
+    ("orders+nested", get_orders, "id,status,priority,customer,vehicle"),
+]
+
+def measure(handler, **kwargs):
+    timings = []
+    peak = 0
+    for _ in range(REPEAT):
+        db = SessionLocal()
+        try:
+            tracemalloc.start()
+            started = time.perf_counter()
+            handler(skip=0, limit=LIMIT, db=db, **kwargs)
+            timings.append((time.perf_counter() - started) * 1000)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        finally:
+            db.close()
+    timings.sort()
+    return timings[len(timings) // 2], peak / 1024
+
+if __name__ == "__main__":
+    engine.echo = False
+    print(f"{'lista':15} {'pełne ms':>9} {'pełne KiB':>10} {'fields ms':>10} {'fields KiB':>11}")
+    for name, handler, fields in CASES:
+        extra = {"status": None} if handler is get_orders else {}
+        if handler is get_parts:
+            extra = {"search": None, "in_stock_only": False}
+        full_ms, full_kib = measure(handler, fields=None, **extra)
+        fields_ms, fields_kib = measure(handler, fields=fields, **extra)
+        print(f"{name:15} {full_ms:9.2f} {full_kib:10.0f} {fields_ms:10.2f} {fields_kib:11.0f}")
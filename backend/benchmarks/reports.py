@@ -0,0 +1,160 @@
+"""
+Raport stanowisk (services.reports) na dużym dzienniku zdarzeń.
+
+    python -m benchmarks.reports --orders 20000
+
+Tworzy oddział testowy z dwoma stanowiskami i --orders zleceń rozłożonych na
+poprzedni miesiąc - każde przechodzi NEW -> IN_PROGRESS -> COMPLETED ->
+INVOICED (3 zdarzenia). Mierzy raport zamkniętego miesiąca: pierwsze
+wywołanie (zapytania + arytmetyka w NumPy) i kolejne (cache), a osobno samo
+compute_report na załadowanych tablicach. Sprawdza sumy: czas IN_PROGRESS
+stanowisk musi się zgadzać z wygenerowanymi odcinkami. Oddział testowy i
+jego dane są na końcu usuwane.
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, insert
+
+from models.base import SessionLocal, branch_session, engine
+from models.branch import Branch
+from models.order_event import OrderStatusEvent
+from models.work_station import WorkStation
+from services import refdata, reports
+
+REPEAT = 20
+SEED_BATCH = 5000
+
+def create_fixtures(suffix: str) -> dict:
+    db = SessionLocal()
+    try:
+        branch = Branch(code=f"br-{suffix}", name="Benchmark raportów")
+        db.add(branch)
+        db.flush()
+        stations = [WorkStation(name=f"Stanowisko {number}", branch_id=branch.id) for number in (1, 2)]
+        db.add_all(stations)
+        db.commit()
+        fixtures = {"branch_id": branch.id, "station_ids": [station.id for station in stations]}
+    finally:
+        db.close()
+
+    refdata.build()
+    refdata.invalidate()
+    return fixtures
+
+def seed_events(fixtures: dict, count: int, month_start: datetime, month_end: datetime) -> float:
+    # Zwraca oczekiwany łączny czas IN_PROGRESS (h) w granicach miesiąca
+    rng = np.random.default_rng(42)
+    span = int((month_end - month_start).total_seconds())
+    created = rng.integers(0, span, count)
+    queued = rng.integers(600, 8 * 3600, count)
+    working = rng.integers(1800, 6 * 3600, count)
+    stations = fixtures["station_ids"]
+
+    expected = 0.0
+    db = SessionLocal()
+    try:
+        for start in range(0, count, SEED_BATCH):
+            rows = []
+            for i in range(start, min(start + SEED_BATCH, count)):
+                new_at = month_start + timedelta(seconds=int(created[i]))
+                started_at = new_at + timedelta(seconds=int(queued[i]))
+                completed_at = started_at + timedelta(seconds=int(working[i]))
+                invoiced_at = completed_at + timedelta(hours=2)
+                station = stations[i % len(stations)]
+                expected += max(0.0, (min(completed_at, month_end) - max(started_at, month_start)).total_seconds())
+                common = {"branch_id": fixtures["branch_id"], "order_id": -(i + 1)}
+                rows.extend([
+                    {**common, "from_status": "NEW", "to_status": "IN_PROGRESS", "from_work_station_id": None,
+                     "to_work_station_id": station, "from_at": new_at, "occurred_at": started_at},
+                    {**common, "from_status": "IN_PROGRESS", "to_status": "COMPLETED", "from_work_station_id": station,
+                     "to_work_station_id": None, "from_at": started_at, "occurred_at": completed_at},
+                    {**common, "from_status": "COMPLETED", "to_status": "INVOICED", "from_work_station_id": None,
+                     "to_work_station_id": None, "from_at": completed_at, "occurred_at": invoiced_at},
+                ])
+            db.execute(insert(OrderStatusEvent), rows)
+            db.commit()
+    finally:
+        db.close()
+    return expected / reports.HOUR
+
+def measure(fixtures: dict, day: date) -> dict:
+    branch_id = fixtures["branch_id"]
+    start, end = reports.period_bounds("month", day)
+    db = branch_session(branch_id)
+    try:
+        reports.clear_cache()
+        started = time.perf_counter()
+        report = reports.station_report(db, branch_id, "month", day)
+        cold = (time.perf_counter() - started) * 1000
+
+        cached = []
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            reports.station_report(db, branch_id, "month", day)
+            cached.append((time.perf_counter() - started) * 1000)
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        started = time.perf_counter()
+        intervals = reports.load_intervals(db, start, end, now)
+        completions = reports.load_completions(db, start, end)
+        load = (time.perf_counter() - started) * 1000
+
+        station_list = refdata.stations(branch_id, active_only=False)
+        compute = []
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            reports.compute_report(intervals, completions, station_list, reports._epoch(start), reports._epoch(end))
+            compute.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+
+    return {
+        "report": report,
+        "intervals": intervals["starts"].size,
+        "cold": cold,
+        "cached": statistics.median(cached),
+        "load": load,
+        "compute": statistics.median(compute),
+    }
+
+def cleanup(fixtures: dict):
+    with engine.begin() as connection:
+        connection.execute(delete(OrderStatusEvent).where(OrderStatusEvent.branch_id == fixtures["branch_id"]))
+        connection.execute(delete(WorkStation).where(WorkStation.id.in_(fixtures["station_ids"])))
+        connection.execute(delete(Branch).where(Branch.id == fixtures["branch_id"]))
+    refdata.build()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine.echo = False
+    # Poprzedni (zamknięty) miesiąc
+    day = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+    month_start, month_end = reports.period_bounds("month", day)
+
+    fixtures = create_fixtures(uuid.uuid4().hex[:8].upper())
+    try:
+        expected = seed_events(fixtures, args.orders, month_start, month_end)
+        result = measure(fixtures, day)
+    finally:
+        cleanup(fixtures)
+
+    busy = sum(station["busy_hours"] for station in result["report"]["stations"])
+    completed = result["report"]["throughput"]["completed"]
+    print(f"odcinków w okresie:       {result['intervals']}")
+    print(f"raport (bez cache):       {result['cold']:8.1f} ms")
+    print(f"  w tym odczyt z bazy:    {result['load']:8.1f} ms")
+    print(f"  compute_report:         {result['compute']:8.1f} ms")
+    print(f"raport (cache):           {result['cached']:8.3f} ms")
+    print(f"IN_PROGRESS: {busy:.1f} h (oczekiwane {expected:.1f} h), zakończone: {completed}")
+
+    ok = abs(busy - expected) <= 0.01 * len(result["report"]["stations"])
+    sys.exit(0 if ok else 1)
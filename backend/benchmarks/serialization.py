@@ -0,0 +1,70 @@
+"""
+Porównanie serializacji i rozmiaru odpowiedzi przed/po przejściu na orjson + kompresję.
+
+    python -m benchmarks.serialization
+
+Dane są syntetyczne, w kształcie odpowiedzi /api/orders, /api/queue i /api/vehicles,
+więc pomiar nie wymaga bazy.
+"""
+import gzip
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.middleware import brotli
+from api.responses import FastJSONResponse
+from models.order import OrderStatus, Priority
+
+ROWS = 100
+REPEAT = 200
+
+def _customer(i):
+    return {"id": i, "name": f"Klient {i}", "phone": "+48 600 100 200", "email": f"klient{i}@example.com"}
+
+def _vehicle(i, include_owner=False):
+    data = {
+        "id": i, "brand": "Toyota", "model": "Corolla", "registration_number": f"WA{10000 + i}",
+        "year": 2019, "vin": f"JT2BF22K1W0{100000 + i}", "customer_id": i
+    }
+    if include_owner:
+        data["owner"] = _customer(i)
+    return data
+
+def _order(i):
+    created = datetime(2026, 1, 1) + timedelta(hours=i)
+    return {
+        "id": i, "customer_id": i, "vehicle_id": i, "work_station_id": i % 3 or None,
+        "description": "Wymiana klocków hamulcowych przód i tył, sprawdzenie tarcz",
+        "priority": Priority.NORMAL, "status": OrderStatus.IN_PROGRESS,
+        "created_at": created, "started_at": created, "completed_at": None, "updated_at": created,
+        "estimated_cost": 350.0, "final_cost": None, "parts_total": 120.5, "parts_count": 2,
+        "customer": _customer(i), "vehicle": _vehicle(i)
+    }
+
+def payloads():
+    orders = [_order(i) for i in range(ROWS)]
+    return {
+        "/api/orders": orders,
+        "/api/queue": {
+            "station_1": orders[:2], "station_2": orders[2:4], "waiting": orders[4:60],
+            "waiting_for_parts": orders[60:70], "completed": orders[70:]
+        },
+        "/api/vehicles": [_vehicle(i, include_owner=True) for i in range(ROWS)]
+    }
+
+def _timeit(fn):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn()
+    return (time.perf_counter() - started) / REPEAT * 1000, result
+
+if __name__ == "__main__":
+    print(f"{'endpoint':15} {'przed ms':>9} {'po ms':>7} {'json B':>8} {'gzip B':>8} {'br B':>8}")
+    for path, payload in payloads().items():
+        before_ms, body = _timeit(lambda: JSONResponse(jsonable_encoder(payload)).body)
+        after_ms, fast_body = _timeit(lambda: FastJSONResponse(payload).body)
+        gzip_size = len(gzip.compress(fast_body, compresslevel=6))
+        br_size = len(brotli.compress(fast_body, quality=4)) if brotli else "-"
+        print(f"{path:15} {before_ms:9.3f} {after_ms:7.3f} {len(body):8} {gzip_size:8} {br_size:>8}")
@@ -0,0 +1,70 @@
+"""
+Czas zimnego startu API na podstawie `python -X importtime`.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module api.routes.orders --top 30
+
+Każdy pomiar to osobny proces (pusty cache modułów, jak nowy worker gunicorna).
+Wypisuje medianę czasu importu oraz moduły, które najwięcej kosztują, i sprawdza,
+że ciężkie zależności ładowane leniwie nie wchodzą do importu aplikacji.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Ładowane dopiero przy pierwszym użyciu albo w rozgrzewce (api.readiness)
+LAZY_MODULES = ["reportlab", "numpy"]
+
+def import_profile(module: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+def _package(name: str) -> str:
+    return name.split(".")[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_profile(args.module) for _ in range(args.repeat)]
+    totals = [run[args.module][1] / 1000 for run in runs]
+    print(f"import {args.module}: median={statistics.median(totals):.1f} ms "
+          f"min={min(totals):.1f} ms max={max(totals):.1f} ms ({args.repeat} procesów)")
+
+    # Koszt per pakiet najwyższego poziomu (suma czasów własnych)
+    by_package = defaultdict(list)
+    for run in runs:
+        totals_per_package = defaultdict(int)
+        for name, (self_us, _) in run.items():
+            totals_per_package[_package(name)] += self_us
+        for package, value in totals_per_package.items():
+            by_package[package].append(value / 1000)
+
+    print(f"\n{'pakiet':30} {'ms':>8}")
+    ranked = sorted(by_package.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, values in ranked[:args.top]:
+        print(f"{package:30} {statistics.median(values):8.1f}")
+
+    loaded = sorted({_package(name) for name in runs[0]} & set(LAZY_MODULES))
+    if loaded:
+        print(f"\nUWAGA: przy starcie ładowane są moduły, które miały być leniwe: {', '.join(loaded)}")
+    else:
+        print(f"\nLeniwe moduły poza startem: {', '.join(LAZY_MODULES)}")
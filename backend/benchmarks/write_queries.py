@@ -0,0 +1,171 @@
+"""
+Liczba zapytań SQL na endpoint zapisu - pilnuje, żeby create/update nie
+wróciły do cyklu "sprawdź czy istnieje, zapisz, commit, refresh".
+
+    python -m benchmarks.write_queries
+
+Wywołuje funkcje endpointów bezpośrednio (bez HTTP) i liczy instrukcje
+wysłane do bazy (bez COMMIT). Każdy scenariusz jest uruchamiany raz na
+rozgrzewkę (wiersze table_versions, cache zapytań) i raz mierzony. Kończy
+się kodem 1, jeśli któryś endpoint przekroczy limit z MAX_QUERIES. Tworzone
+obiekty są na końcu usuwane. Ten sam pomiar sprawdza tests/test_write_queries.py.
+"""
+import sys
+import uuid
+
+from fastapi import HTTPException, Response
+from sqlalchemy import delete, event
+from starlette.requests import Request
+
+from api.models import CustomerCreate, OrderCreate, OrderUpdate, OrderUpdatePartial, PartCreate, PartUpdate, VehicleCreate
+from api.routes import customers, orders, parts, vehicles
+from models.base import SessionLocal, engine
+from models.customer import Customer
+from models.order import Order
+from models.order_event import OrderStatusEvent
+from models.part import Part
+from models.vehicle import Vehicle
+
+# Zapytania poza COMMIT; każdy zapis to też jeden UPDATE table_versions (ETagi list)
+MAX_QUERIES = {
+    "create_customer": 2,       # INSERT + table_versions
+    "update_customer": 3,       # SELECT + UPDATE + table_versions
+    "create_vehicle": 2,
+    "create_vehicle (dup)": 1,  # sam INSERT odrzucony przez unikalny indeks
+    "update_vehicle": 3,
+    "create_part": 2,
+    "create_part (dup)": 1,
+    "update_part": 3,
+    "update_stock": 3,
+    "create_order": 3,          # SELECT klient+pojazd + INSERT + table_versions
+    "update_order": 3,          # SELECT z joinedload + UPDATE + table_versions
+    "patch_order": 4,           # jak update_order + INSERT order_status_events przy zmianie statusu
+}
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "PUT", "path": "/", "headers": []})
+
+def scenarios(suffix: str, created: dict):
+    plate = f"WQ {suffix}"
+
+    def create_customer(db):
+        customer = customers.create_customer(CustomerCreate(name=f"Klient {suffix}", phone="600100200"), db)
+        created["customers"].append(customer.id)
+
+    def update_customer(db):
+        customers.update_customer(created["customers"][-1], CustomerCreate(name=f"Klient {suffix} (zm.)"), db)
+
+    def vehicle_data():
+        return VehicleCreate(customer_id=created["customers"][-1], brand="Toyota", model="Yaris", registration_number=plate)
+
+    def create_vehicle(db):
+        vehicle = vehicles.create_vehicle(vehicle_data(), db)
+        created["vehicles"].append(vehicle.id)
+
+    def create_vehicle_duplicate(db):
+        try:
+            vehicles.create_vehicle(vehicle_data(), db)
+        except HTTPException as e:
+            assert e.status_code == 400, e
+        else:
+            raise AssertionError("duplicate vehicle was accepted")
+
+    def update_vehicle(db):
+        vehicles.update_vehicle(created["vehicles"][-1], vehicle_data().model_copy(update={"year": 2020}), db)
+
+    def create_part(db):
+        part = parts.create_part(PartCreate(code=f"WQ-{suffix}", name="Filtr", price=10.0, stock_quantity=5), db)
+        created["parts"].append(part.id)
+
+    def create_part_duplicate(db):
+        try:
+            parts.create_part(PartCreate(code=f"WQ-{suffix}", name="Filtr", price=10.0), db)
+        except HTTPException as e:
+            assert e.status_code == 400, e
+        else:
+            raise AssertionError("duplicate part was accepted")
+
+    def update_part(db):
+        parts.update_part(created["parts"][-1], PartUpdate(price=12.5), _request(), Response(), db)
+
+    def update_stock(db):
+        parts.update_stock(created["parts"][-1], 3, _request(), Response(), db)
+
+    def create_order(db):
+        order = orders.create_order(OrderCreate(
+            customer_id=created["customers"][-1], vehicle_id=created["vehicles"][-1], description="Przegląd"
+        ), db)
+        assert order["customer"] and order["vehicle"]
+        created["orders"].append(order["id"])
+
+    def update_order(db):
+        order = orders.update_order(created["orders"][-1], OrderUpdate(description="Przegląd + olej"),
+                                    _request(), Response(), db)
+        assert order["customer"] and order["vehicle"]
+
+    def patch_order(db):
+        orders.patch_order(created["orders"][-1], OrderUpdatePartial(status="in_progress", work_station_id=None),
+                           _request(), Response(), db)
+
+    return {
+        "create_customer": create_customer,
+        "update_customer": update_customer,
+        "create_vehicle": create_vehicle,
+        "create_vehicle (dup)": create_vehicle_duplicate,
+        "update_vehicle": update_vehicle,
+        "create_part": create_part,
+        "create_part (dup)": create_part_duplicate,
+        "update_part": update_part,
+        "update_stock": update_stock,
+        "create_order": create_order,
+        "update_order": update_order,
+        "patch_order": patch_order,
+    }
+
+def run(counter: QueryCounter, created: dict) -> dict:
+    results = {}
+    for name, scenario in scenarios(uuid.uuid4().hex[:8].upper(), created).items():
+        db = SessionLocal()
+        try:
+            counter.count = 0
+            scenario(db)
+            results[name] = counter.count
+        finally:
+            db.close()
+    return results
+
+def cleanup(created: dict):
+    with engine.begin() as connection:
+        connection.execute(delete(OrderStatusEvent).where(OrderStatusEvent.order_id.in_(created["orders"])))
+        connection.execute(delete(Order).where(Order.id.in_(created["orders"])))
+        connection.execute(delete(Vehicle).where(Vehicle.id.in_(created["vehicles"])))
+        connection.execute(delete(Customer).where(Customer.id.in_(created["customers"])))
+        connection.execute(delete(Part).where(Part.id.in_(created["parts"])))
+
+if __name__ == "__main__":
+    engine.echo = False
+    counter = QueryCounter()
+    created = {"customers": [], "vehicles": [], "parts": [], "orders": []}
+
+    try:
+        run(counter, created)
+        results = run(counter, created)
+    finally:
+        cleanup(created)
+
+    failed = False
+    for name, count in results.items():
+        limit = MAX_QUERIES[name]
+        status = "ok" if count <= limit else "ZA DUŻO"
+        failed = failed or count > limit
+        print(f"{name:22} {count:3} / {limit:<3} {status}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,66 @@
+"""
+Tworzy użytkownika albo zmienia hasło istniejącego (logowanie: POST /api/auth/login).
+
+    python create_user.py admin admin@example.com --admin
+    python create_user.py jan jan@example.com --branch 2
+    python create_user.py jan --password-only    # tylko nowe hasło
+
+Hasło jest pytane interaktywnie (albo brane z USER_PASSWORD, np. w skryptach).
+"""
+import argparse
+import getpass
+import os
+import sys
+
+from sqlalchemy import select
+
+from api.auth import hash_password
+from models.base import DEFAULT_BRANCH_ID, SessionLocal, engine
+from models.user import User
+
+MIN_PASSWORD_LENGTH = 8
+
+def read_password() -> str:
+    password = os.getenv("USER_PASSWORD")
+    if password is None:
+        password = getpass.getpass("Hasło: ")
+        if password != getpass.getpass("Powtórz hasło: "):
+            sys.exit("Hasła się różnią")
+    if len(password) < MIN_PASSWORD_LENGTH:
+        sys.exit(f"Hasło musi mieć co najmniej {MIN_PASSWORD_LENGTH} znaków")
+    return password
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("username")
+    parser.add_argument("email", nargs="?")
+    parser.add_argument("--branch", type=int, default=DEFAULT_BRANCH_ID)
+    parser.add_argument("--admin", action="store_true")
+    parser.add_argument("--password-only", action="store_true", help="zmień hasło istniejącego użytkownika")
+    args = parser.parse_args()
+
+    engine.echo = False
+    db = SessionLocal()
+    try:
+        user = db.execute(select(User).where(User.username == args.username)).scalar_one_or_none()
+        if args.password_only:
+            if user is None:
+                sys.exit(f"Nie ma użytkownika {args.username}")
+            user.hashed_password = hash_password(read_password())
+        else:
+            if user is not None:
+                sys.exit(f"Użytkownik {args.username} już istnieje (zmiana hasła: --password-only)")
+            if not args.email:
+                sys.exit("Podaj adres e-mail nowego użytkownika")
+            user = User(
+                username=args.username,
+                email=args.email,
+                hashed_password=hash_password(read_password()),
+                branch_id=args.branch,
+                is_admin=args.admin
+            )
+            db.add(user)
+        db.commit()
+        print(f"Zapisano użytkownika {user.username} (id {user.id}, oddział {user.branch_id})")
+    finally:
+        db.close()
@@ -0,0 +1,21 @@
+"""
+Konfiguracja gunicorna - wczytywana automatycznie z katalogu roboczego (/app).
+
+Proces nadrzędny buduje snapshot danych referencyjnych (services.refdata)
+przed uruchomieniem workerów i potem go odświeża; workery tylko mapują
+gotowe pliki z pamięci współdzielonej.
+"""
+import os
+
+def on_starting(server):
+    from services import refdata
+
+    # Dziedziczone przez workery - lifespan nie uruchamia wtedy własnego odświeżania
+    os.environ["REFDATA_MASTER"] = "1"
+    try:
+        generation = refdata.build()
+        server.log.info("Refdata: generacja %s w %s", generation, refdata.REFDATA_DIR)
+    except Exception as e:
+        # Np. baza jeszcze nie wstała - odświeżanie zbuduje snapshot, gdy będzie dostępna
+        server.log.warning("Refdata: nie udało się zbudować snapshotu: %s", e)
+    refdata.start_refresher()
@@ -1,16 +1,46 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
 import uvicorn
+from api import profiling, readiness
+from api.auth import authenticate
+from api.middleware import AdmissionMiddleware, CompressionMiddleware, PrimaryPinMiddleware, ProfilingMiddleware
+from api.responses import FastJSONResponse
 from api.routes.customers import router as customers_router
 from api.routes.dashboard import router as dashboard_router
 from api.routes.vehicles import router as vehicles_router
 from api.routes.orders import router as orders_router
 from api.routes.queue import router as queue_router
 from api.routes.parts import router as parts_router
+from api.routes.metrics import router as metrics_router
+from api.routes.jobs import router as jobs_router
+from api.routes.admin import router as admin_router
+from api.routes.branches import router as branches_router
+from api.routes.auth import router as auth_router
+from api.routes.reports import router as reports_router
+from models.base import DATABASE_READ_URL
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pula, mappery i cache zapytań przed przyjęciem ruchu; ReportLab/NumPy dociągają się w tle
+    readiness.start_warmup()
+    await asyncio.to_thread(readiness.wait_until_started)
+    if not os.getenv("REFDATA_MASTER"):
+        # Bez gunicorna (uvicorn main:app) snapshot danych referencyjnych odświeża sam worker
+        from services import refdata
+        refdata.start_refresher()
+    yield
 
 app = FastAPI(
     title="AutoService Manager API",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 """
@@ -32,6 +62,18 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     
 """
 
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request, exc: StaleDataError):
+    # UPDATE/DELETE z version_id_col nie trafił w wiersz - ktoś zmienił go między odczytem a zapisem
+    return JSONResponse(status_code=409, content={"detail": "Conflict: the object was modified concurrently, reload and retry"})
+
+# Profiler najbliżej aplikacji (mierzy obsługę, nie kolejkę); bez tokenu nie ma go w łańcuchu - zero narzutu
+if profiling.PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+# Wewnątrz CORS - odpowiedź 503 przechodzi jeszcze przez CORS, żeby przeglądarka widziała Retry-After
+app.add_middleware(AdmissionMiddleware)
+
 # Konfiguracja CORS
 app.add_middleware(
     CORSMiddleware,
@@ -39,14 +81,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
-app.include_router(customers_router)
-app.include_router(dashboard_router)
-app.include_router(vehicles_router)
-app.include_router(orders_router)
-app.include_router(queue_router)
-app.include_router(parts_router)
+app.add_middleware(CompressionMiddleware)
+
+if DATABASE_READ_URL:
+    app.add_middleware(PrimaryPinMiddleware)
+
+# Trasy z danymi warsztatu - token JWT wymagany przy AUTH_REQUIRED (api.auth); metryki, /health,
+# logowanie i profile (własny token) bez niego
+authenticated = [Depends(authenticate)]
+
+app.include_router(customers_router, dependencies=authenticated)
+app.include_router(dashboard_router, dependencies=authenticated)
+app.include_router(vehicles_router, dependencies=authenticated)
+app.include_router(orders_router, dependencies=authenticated)
+app.include_router(queue_router, dependencies=authenticated)
+app.include_router(parts_router, dependencies=authenticated)
+app.include_router(metrics_router)
+app.include_router(jobs_router, dependencies=authenticated)
+app.include_router(admin_router)
+app.include_router(branches_router, dependencies=authenticated)
+app.include_router(auth_router)
+app.include_router(reports_router, dependencies=authenticated)
 
 @app.get("/")
 def read_root():
@@ -63,7 +121,10 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    if not readiness.is_ready():
+        readiness.ensure_warmup()
+        return JSONResponse(status_code=503, content={"status": "starting", "checks": readiness.readiness()})
+    return {"status": "healthy", "checks": readiness.readiness()}
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
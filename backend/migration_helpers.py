@@ -0,0 +1,338 @@
+"""
+Pomocnicze funkcje dla migracji Alembica na dużych tabelach.
+
+Zwykłe op.add_column / op.execute("UPDATE ...") na orders z milionami wierszy
+trzymają blokadę przez całą operację i API stoi. Tutaj:
+
+- zmiany schematu idą przez ALTER TABLE ... ALGORITHM=INPLACE, LOCK=NONE
+  (MariaDB pozwala wtedy na równoległe zapisy) z krótkim lock_wait_timeout,
+  żeby ALTER czekający na blokadę metadanych nie zatrzymał całego ruchu,
+- wypełnianie danych idzie paczkami po kluczu (WHERE id > ostatni LIMIT n),
+  każda paczka w osobnej transakcji, z przerwą między paczkami - do
+  największego klucza z chwili startu (nowe wiersze zapisuje już aplikacja),
+- postęp paczek zapisywany jest w migration_progress, więc przerwaną
+  migrację można po prostu uruchomić ponownie - zacznie od miejsca, w którym
+  skończyła. Operacje na schemacie sprawdzają, czy zmiana już jest w bazie.
+
+Użycie w pliku migracji:
+
+    from migration_helpers import add_column_online, backfill, create_index_online
+
+    def upgrade() -> None:
+        add_column_online('orders', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        backfill('orders', "version = 1", where="version IS NULL", name='orders.version')
+        create_index_online('ix_orders_version', 'orders', ['version'])
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("alembic.migration_helpers")
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_PAUSE = 0.05
+# Paczka ma trwać mniej więcej tyle - rozmiar jest dopasowywany w trakcie
+TARGET_CHUNK_SECONDS = 0.5
+MAX_CHUNK_SIZE = 20000
+# Ile sekund ALTER może czekać na blokadę metadanych, zanim odpuści i spróbuje ponownie
+DDL_LOCK_WAIT_SECONDS = 5
+DDL_RETRIES = 10
+PROGRESS_EVERY_SECONDS = 5.0
+
+# Poza Base.metadata - to tabela narzędziowa migracji, nie model aplikacji (pomijana w env.py przy autogenerate)
+PROGRESS_TABLE = "migration_progress"
+progress_metadata = sa.MetaData()
+migration_progress = sa.Table(
+    PROGRESS_TABLE, progress_metadata,
+    sa.Column("name", sa.String(191), primary_key=True),
+    sa.Column("last_key", sa.BigInteger, nullable=True),
+    sa.Column("rows_done", sa.BigInteger, nullable=False, default=0),
+    sa.Column("updated_at", sa.DateTime, nullable=True),
+    sa.Column("finished_at", sa.DateTime, nullable=True),
+)
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _is_mysql(connection: Connection) -> bool:
+    return connection.dialect.name in ("mysql", "mariadb")
+
+def _op_connection():
+    from alembic import op
+    return op.get_bind()
+
+@contextmanager
+def _autocommit():
+    # Wewnątrz migracji Alembic trzyma jedną transakcję - paczki muszą się commitować osobno
+    from alembic import op
+    with op.get_context().autocommit_block():
+        yield op.get_bind()
+
+def _is_offline() -> bool:
+    from alembic import context
+    try:
+        return context.is_offline_mode()
+    except NameError:
+        # Wywołanie spoza Alembica (skrypt, benchmark) - zawsze na żywej bazie
+        return False
+
+# --- Zmiany schematu ---
+
+def _execute_ddl(connection: Connection, sql: str):
+    if _is_offline():
+        from alembic import op
+        op.execute(sql)
+        return
+
+    if not _is_mysql(connection):
+        connection.execute(sa.text(sql))
+        return
+
+    connection.execute(sa.text(f"SET SESSION lock_wait_timeout = {DDL_LOCK_WAIT_SECONDS}"))
+    for attempt in range(1, DDL_RETRIES + 1):
+        try:
+            connection.execute(sa.text(sql))
+            return
+        except sa.exc.OperationalError as e:
+            # 1205 = lock wait timeout - długa transakcja trzyma tabelę, spróbuj za chwilę
+            if getattr(e.orig, "args", [None])[0] != 1205 or attempt == DDL_RETRIES:
+                raise
+            logger.info("DDL czeka na blokadę tabeli (próba %s/%s): %s", attempt, DDL_RETRIES, sql)
+            time.sleep(attempt)
+
+def _online(connection: Connection, algorithm: str) -> str:
+    return f", ALGORITHM={algorithm}, LOCK=NONE" if _is_mysql(connection) else ""
+
+def add_column_online(table: str, column: sa.Column, algorithm: str = "INPLACE",
+                      connection: Optional[Connection] = None):
+    connection = connection or _op_connection()
+    if not _is_offline() and column.name in {c["name"] for c in sa.inspect(connection).get_columns(table)}:
+        logger.info("Kolumna %s.%s już istnieje - pomijam", table, column.name)
+        return
+
+    column_sql = sa.schema.CreateColumn(column).compile(dialect=connection.dialect)
+    _execute_ddl(connection, f"ALTER TABLE {table} ADD COLUMN {column_sql}{_online(connection, algorithm)}")
+
+def drop_column_online(table: str, column: str, connection: Optional[Connection] = None):
+    connection = connection or _op_connection()
+    if not _is_offline() and column not in {c["name"] for c in sa.inspect(connection).get_columns(table)}:
+        return
+    _execute_ddl(connection, f"ALTER TABLE {table} DROP COLUMN {column}{_online(connection, 'INPLACE')}")
+
+def create_index_online(name: str, table: str, columns: Sequence[str], unique: bool = False,
+                        connection: Optional[Connection] = None):
+    connection = connection or _op_connection()
+    if not _is_offline() and name in {i["name"] for i in sa.inspect(connection).get_indexes(table)}:
+        logger.info("Indeks %s już istnieje - pomijam", name)
+        return
+
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if _is_mysql(connection):
+        sql = f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)}){_online(connection, 'INPLACE')}"
+    else:
+        sql = f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"
+    _execute_ddl(connection, sql)
+
+def drop_index_online(name: str, table: str, connection: Optional[Connection] = None):
+    connection = connection or _op_connection()
+    if not _is_offline() and name not in {i["name"] for i in sa.inspect(connection).get_indexes(table)}:
+        return
+    if _is_mysql(connection):
+        _execute_ddl(connection, f"ALTER TABLE {table} DROP INDEX {name}{_online(connection, 'INPLACE')}")
+    else:
+        _execute_ddl(connection, f"DROP INDEX {name}")
+
+def add_foreign_key_online(name: str, table: str, column: str, referred_table: str, referred_column: str = "id",
+                           connection: Optional[Connection] = None):
+    # MariaDB dodaje klucz obcy bez kopiowania tabeli tylko przy foreign_key_checks=0 - istniejące
+    # wiersze nie są wtedy sprawdzane, więc kolumna musi być już poprawnie wypełniona
+    connection = connection or _op_connection()
+    if not _is_offline() and name in {fk["name"] for fk in sa.inspect(connection).get_foreign_keys(table)}:
+        logger.info("Klucz obcy %s już istnieje - pomijam", name)
+        return
+    if not _is_mysql(connection):
+        # SQLite nie dodaje kluczy obcych przez ALTER TABLE - w testowej bazie wystarczy sama kolumna
+        return
+
+    _execute_ddl(connection, "SET SESSION foreign_key_checks = 0")
+    try:
+        _execute_ddl(
+            connection,
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+            f"REFERENCES {referred_table} ({referred_column}){_online(connection, 'INPLACE')}"
+        )
+    finally:
+        _execute_ddl(connection, "SET SESSION foreign_key_checks = 1")
+
+def drop_foreign_key_online(name: str, table: str, connection: Optional[Connection] = None):
+    connection = connection or _op_connection()
+    if not _is_offline() and name not in {fk["name"] for fk in sa.inspect(connection).get_foreign_keys(table)}:
+        return
+    _execute_ddl(connection, f"ALTER TABLE {table} DROP FOREIGN KEY {name}{_online(connection, 'INPLACE')}")
+
+# --- Postęp ---
+
+def _load_progress(connection: Connection, name: str):
+    progress_metadata.create_all(connection, checkfirst=True)
+    return connection.execute(
+        sa.select(migration_progress).where(migration_progress.c.name == name)
+    ).mappings().first()
+
+def _save_progress(connection: Connection, name: str, last_key, rows_done: int, finished: bool = False):
+    values = {"last_key": last_key, "rows_done": rows_done, "updated_at": _now(),
+              "finished_at": _now() if finished else None}
+    result = connection.execute(
+        sa.update(migration_progress).where(migration_progress.c.name == name).values(**values)
+    )
+    if result.rowcount == 0:
+        connection.execute(sa.insert(migration_progress).values(name=name, **values))
+
+def clear_progress(name: str, connection: Optional[Connection] = None):
+    # Do downgrade() - kolejny upgrade zacznie backfill od początku
+    connection = connection or _op_connection()
+    if sa.inspect(connection).has_table(PROGRESS_TABLE):
+        connection.execute(sa.delete(migration_progress).where(migration_progress.c.name == name))
+
+# --- Wypełnianie danych ---
+
+def _next_chunk(connection: Connection, table: str, key: str, last_key, until, chunk_size: int) -> list:
+    lower = f"{key} > :last AND " if last_key is not None else ""
+    return connection.execute(
+        sa.text(f"SELECT {key} FROM {table} WHERE {lower}{key} <= :until ORDER BY {key} LIMIT :limit"),
+        {"last": last_key, "until": until, "limit": chunk_size}
+    ).scalars().all()
+
+def run_backfill(connection: Connection, table: str, apply_chunk: Callable[[Connection, object, object], int],
+                 name: str, key: str = "id", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 pause: float = DEFAULT_PAUSE, max_rows: Optional[int] = None) -> int:
+    """
+    Przechodzi tabelę paczkami po kluczu i dla każdej woła apply_chunk(connection, od, do)
+    z przedziałem (od, do]. Połączenie musi być w trybie autocommit - każda paczka to
+    osobna krótka transakcja. Po awarii paczka może zostać powtórzona, więc zmiana musi
+    być idempotentna (SET x = wyrażenie, nie x = x + 1).
+    """
+    progress = _load_progress(connection, name)
+    if progress and progress["finished_at"]:
+        logger.info("Backfill %s już zakończony - pomijam", name)
+        return 0
+
+    last_key = progress["last_key"] if progress else None
+    rows_done = progress["rows_done"] if progress else 0
+    if last_key is not None:
+        logger.info("Backfill %s - wznawiam od %s=%s (%s wierszy zrobione)", name, key, last_key, rows_done)
+
+    total = connection.execute(sa.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    # Górna granica z chwili startu - wiersze dopisane później zapisuje już nowa wersja aplikacji,
+    # a pogoń za nimi przy ciągłych insertach mogłaby się nie skończyć
+    until = connection.execute(sa.text(f"SELECT MAX({key}) FROM {table}")).scalar()
+    started = time.monotonic()
+    last_report = started
+    processed = 0
+
+    while until is not None:
+        keys = _next_chunk(connection, table, key, last_key, until, chunk_size)
+        if not keys:
+            break
+
+        chunk_started = time.monotonic()
+        apply_chunk(connection, last_key, keys[-1])
+        _save_progress(connection, name, keys[-1], rows_done + len(keys))
+        elapsed = time.monotonic() - chunk_started
+
+        last_key = keys[-1]
+        rows_done += len(keys)
+        processed += len(keys)
+
+        # Paczka za wolna - zmniejsz, szybka - zwiększ
+        if elapsed > TARGET_CHUNK_SECONDS * 2:
+            chunk_size = max(100, chunk_size // 2)
+        elif elapsed < TARGET_CHUNK_SECONDS / 2:
+            chunk_size = min(MAX_CHUNK_SIZE, chunk_size * 2)
+
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_EVERY_SECONDS:
+            rate = processed / (now - started)
+            remaining = max(total - rows_done, 0)
+            eta = remaining / rate if rate else 0
+            logger.info("Backfill %s: %s/%s wierszy, %.0f w/s, zostało ~%.0f s", name, rows_done, total, rate, eta)
+            last_report = now
+
+        if max_rows is not None and processed >= max_rows:
+            # Przerwane celowo (np. test wznawiania) - postęp zostaje w tabeli
+            return processed
+
+        time.sleep(pause)
+
+    _save_progress(connection, name, last_key, rows_done, finished=True)
+    logger.info("Backfill %s zakończony: %s wierszy w %.1f s", name, rows_done, time.monotonic() - started)
+    return processed
+
+def _sql_chunk(table: str, set_clause: str, key: str, where: Optional[str]):
+    condition = f" AND ({where})" if where else ""
+
+    def apply(connection: Connection, low, high) -> int:
+        lower = f"{key} > :low AND " if low is not None else ""
+        return connection.execute(
+            sa.text(f"UPDATE {table} SET {set_clause} WHERE {lower}{key} <= :high{condition}"),
+            {"low": low, "high": high}
+        ).rowcount
+
+    return apply
+
+def backfill(table: str, set_clause: str, where: Optional[str] = None, name: Optional[str] = None,
+             key: str = "id", chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = DEFAULT_PAUSE,
+             connection: Optional[Connection] = None, max_rows: Optional[int] = None) -> int:
+    """UPDATE table SET set_clause [WHERE where] - paczkami, z zapisem postępu."""
+    name = name or f"{table}:{set_clause}"[:191]
+
+    if _is_offline():
+        # --sql: pętli nie da się wygenerować, zostaje jeden UPDATE do puszczenia ręcznie
+        from alembic import op
+        op.execute(f"UPDATE {table} SET {set_clause}" + (f" WHERE {where}" if where else ""))
+        return 0
+
+    apply = _sql_chunk(table, set_clause, key, where)
+    if connection is not None:
+        return run_backfill(connection, table, apply, name, key, chunk_size, pause, max_rows)
+    with _autocommit() as connection:
+        return run_backfill(connection, table, apply, name, key, chunk_size, pause, max_rows)
+
+def backfill_rows(table: str, columns: Sequence[str], transform: Callable[[dict], dict], name: str,
+                  key: str = "id", chunk_size: int = DEFAULT_CHUNK_SIZE, pause: float = DEFAULT_PAUSE,
+                  connection: Optional[Connection] = None) -> int:
+    """
+    Jak backfill, ale nowe wartości liczy Python - np. normalizacja, której nie da się zapisać w SQL.
+    transform dostaje wiersz (key + columns) i zwraca słownik kolumn do ustawienia.
+    """
+    selected = ", ".join([key, *columns])
+
+    def apply(connection: Connection, low, high) -> int:
+        lower = f"{key} > :low AND " if low is not None else ""
+        rows = connection.execute(
+            sa.text(f"SELECT {selected} FROM {table} WHERE {lower}{key} <= :high"),
+            {"low": low, "high": high}
+        ).mappings().all()
+
+        updates = []
+        for row in rows:
+            values = transform(dict(row))
+            if values:
+                updates.append({**values, "_key": row[key]})
+        if not updates:
+            return 0
+
+        assignments = ", ".join(f"{column} = :{column}" for column in updates[0] if column != "_key")
+        connection.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE {key} = :_key"), updates)
+        return len(updates)
+
+    if connection is not None:
+        return run_backfill(connection, table, apply, name, key, chunk_size, pause)
+    with _autocommit() as connection:
+        return run_backfill(connection, table, apply, name, key, chunk_size, pause)
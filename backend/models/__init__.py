@@ -1,23 +1,40 @@
 # Import all models to ensure they are registered with Base
 from .base import Base
+from .branch import Branch
 from .customer import Customer
 from .vehicle import Vehicle
 from .work_station import WorkStation
-from .order import Order
+from .order import Order, OrderTombstone
+from .order_event import OrderStatusEvent
 from .part import Part
+from .part_reorder import PartReorderStat
 from .order_part import OrderPart
 from .invoice import Invoice
 from .user import User
+from .table_version import TableVersion
+from .archive import OrderArchive, OrderPartArchive, InvoiceArchive
+from .job import Job
+from .outbox import OutboxMessage
 
 # This ensures all models are loaded
 __all__ = [
     "Base",
+    "Branch",
     "Customer", 
     "Vehicle",
     "WorkStation",
     "Order",
+    "OrderTombstone",
+    "OrderStatusEvent",
     "Part",
+    "PartReorderStat",
     "OrderPart",
     "Invoice",
-    "User"
+    "User",
+    "TableVersion",
+    "OrderArchive",
+    "OrderPartArchive",
+    "InvoiceArchive",
+    "Job",
+    "OutboxMessage"
 ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Optional
+from sqlalchemy import Integer, String, Text, DateTime, ForeignKey, Float, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime
+from .base import Base
+from .branch import BranchScoped
+from .order import Priority, OrderStatus
+
+# Kopie tabel orders / order_parts / invoices dla zafakturowanych zleceń przeniesionych
+# przez services.archive. Kolumny muszą odpowiadać oryginałom (INSERT ... SELECT po nazwach).
+
+class OrderArchive(BranchScoped, Base):
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_branch_created_at", "branch_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), index=True)
+    vehicle_id: Mapped[int] = mapped_column(ForeignKey("vehicles.id"), index=True)
+    work_station_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    priority: Mapped[Priority] = mapped_column(SQLEnum(Priority))
+    status: Mapped[OrderStatus] = mapped_column(SQLEnum(OrderStatus))
+
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    status_changed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+
+    estimated_cost: Mapped[float] = mapped_column(Float)
+    final_cost: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    parts_total: Mapped[float] = mapped_column(Float, nullable=False)
+    parts_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+
+    customer: Mapped["Customer"] = relationship(viewonly=True) # type: ignore
+    vehicle: Mapped["Vehicle"] = relationship(viewonly=True) # type: ignore
+
+class OrderPartArchive(Base):
+    __tablename__ = "order_parts_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(Integer, index=True)
+    part_id: Mapped[int] = mapped_column(Integer)
+    quantity: Mapped[int] = mapped_column(nullable=False)
+    unit_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+class InvoiceArchive(Base):
+    __tablename__ = "invoices_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(Integer, unique=True)
+    invoice_number: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    issue_date: Mapped[datetime] = mapped_column(DateTime)
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False)
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
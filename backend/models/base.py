@@ -1,7 +1,14 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import HTTPException
+from starlette.requests import Request
 import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,15 +16,129 @@ load_dotenv()
 Base = declarative_base()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Opcjonalna replika tylko do odczytu - bez niej wszystko idzie do bazy głównej
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+# Po zapisie klient przez chwilę czyta z bazy głównej (read-your-writes)
+PIN_PRIMARY_COOKIE = "pin_primary"
+PIN_PRIMARY_HEADER = "x-read-primary"
+PIN_PRIMARY_SECONDS = int(os.getenv("PIN_PRIMARY_SECONDS", "5"))
+
+# Oddział z nagłówka X-Branch-Id; bez nagłówka - oddział domyślny (dane sprzed podziału na oddziały)
+BRANCH_HEADER = "x-branch-id"
+DEFAULT_BRANCH_ID = int(os.getenv("DEFAULT_BRANCH_ID", "1"))
+
+def utc_now() -> datetime:
+    # Kolumny DateTime przechowują czas UTC bez strefy - obiekt po zapisie ma tę samą postać co po odczycie
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 engine = create_engine(DATABASE_URL, echo=True)
+read_engine = create_engine(DATABASE_READ_URL, echo=True) if DATABASE_READ_URL else engine
+
+# expire_on_commit=False: po commicie obiekty zachowują zapisane wartości, więc odpowiedź
+# budujemy bez ponownego SELECT-a (refresh). Kolumny ustawione wyrażeniem SQL i tak są odświeżane.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# --- Routing oddziałów ---
+
+class BranchRouter:
+    # Gdzie leżą dane oddziału; None = baza główna (DATABASE_URL i jej replika)
+    def database_url(self, branch_id: int) -> Optional[str]:
+        return None
+
+    def database_urls(self) -> list[str]:
+        # Dodatkowe instancje - do rozgrzewki i budowy snapshotu danych referencyjnych
+        return []
+
+class StaticBranchRouter(BranchRouter):
+    def __init__(self, urls: dict[int, str]):
+        self.urls = urls
+
+    def database_url(self, branch_id: int) -> Optional[str]:
+        return self.urls.get(branch_id)
+
+    def database_urls(self) -> list[str]:
+        return sorted(set(self.urls.values()) - {DATABASE_URL})
+
+def parse_branch_urls(value: str) -> dict[int, str]:
+    # "2=mysql+pymysql://...,3=mysql+pymysql://..." - oddziały z własną instancją bazy
+    urls = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        branch_id, _, url = item.partition("=")
+        urls[int(branch_id)] = url.strip()
+    return urls
+
+branch_router: BranchRouter = StaticBranchRouter(parse_branch_urls(os.getenv("BRANCH_DATABASE_URLS", "")))
+_branch_engines: dict[str, Engine] = {}
+_branch_engines_lock = threading.Lock()
+
+def set_branch_router(router: BranchRouter):
+    # Punkt podpięcia innego routera (np. z rejestru w bazie); silniki są tworzone leniwie per URL
+    global branch_router
+    branch_router = router
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _url_engine(url: str) -> Engine:
+    with _branch_engines_lock:
+        if url not in _branch_engines:
+            _branch_engines[url] = create_engine(url, echo=True)
+        return _branch_engines[url]
 
-def get_db():
+def engine_for(branch_id: int, read: bool = False) -> Engine:
+    url = branch_router.database_url(branch_id)
+    if url is None or url == DATABASE_URL:
+        return read_engine if read else engine
+    # Oddział na osobnej instancji - bez repliki, odczyty też z jej bazy głównej
+    return _url_engine(url)
+
+def branch_engines() -> list[Engine]:
+    return [_url_engine(url) for url in branch_router.database_urls()]
+
+def branch_session(branch_id: int, read: bool = False) -> Session:
+    # Sesja związana z bazą oddziału; zapytania i nowe obiekty są zawężane do oddziału (models.branch)
+    return SessionLocal(bind=engine_for(branch_id, read), info={"branch_id": branch_id})
+
+def get_branch_id(request: Request) -> int:
+    value = request.headers.get(BRANCH_HEADER)
+    if value is None:
+        # Zalogowany użytkownik (api.auth) domyślnie pracuje w swoim oddziale
+        principal = getattr(request.state, "principal", None)
+        return principal.branch_id if principal is not None else DEFAULT_BRANCH_ID
+    if not value.strip().isdigit():
+        raise HTTPException(status_code=400, detail="Invalid X-Branch-Id header")
+
+    # Lista oddziałów ze współdzielonego snapshotu - bez zapytania do bazy przy każdym żądaniu
+    from services import refdata
+    branch_id = int(value)
+    try:
+        known = branch_id in refdata.branch_ids()
+    except (OSError, ValueError, SQLAlchemyError):
+        # Snapshotu nie da się wczytać ani zbudować - rejestr oddziałów z bazy głównej
+        known = _branch_exists(branch_id)
+    if not known:
+        raise HTTPException(status_code=404, detail="Branch not found")
+    return branch_id
+
+def _branch_exists(branch_id: int) -> bool:
+    from models.branch import Branch
+    try:
+        with SessionLocal() as db:
+            return db.query(Branch.id).filter(Branch.id == branch_id, Branch.is_active == True).first() is not None
+    except SQLAlchemyError:
+        raise HTTPException(status_code=503, detail="Branch registry unavailable")
+
+def get_db(request: Request):
     # Dependency for FastAPI for downloading db session
-    db = SessionLocal()
+    db = branch_session(get_branch_id(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(request: Request):
+    # Dependency dla endpointów tylko do odczytu - replika, chyba że klient jest przypięty do bazy głównej
+    pinned = request.cookies.get(PIN_PRIMARY_COOKIE) or request.headers.get(PIN_PRIMARY_HEADER)
+    db = branch_session(get_branch_id(request), read=not pinned)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
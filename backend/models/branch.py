@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Optional
+from sqlalchemy import Boolean, ForeignKey, Integer, String, event
+from sqlalchemy.orm import Mapped, ORMExecuteState, Session, mapped_column, with_loader_criteria
+from .base import Base, DEFAULT_BRANCH_ID
+
+class Branch(Base):
+    # Rejestr oddziałów - w bazie głównej; instancje z BRANCH_DATABASE_URLS mają kopię swoich wierszy
+    __tablename__ = "branches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    code: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+class BranchScoped:
+    # Domieszka dla tabel z danymi oddziału: sesja z info["branch_id"] widzi i tworzy tylko wiersze tego oddziału
+    branch_id: Mapped[int] = mapped_column(
+        ForeignKey("branches.id"), nullable=False, default=DEFAULT_BRANCH_ID, server_default=str(DEFAULT_BRANCH_ID)
+    )
+
+def session_branch(session: Session, default: Optional[int] = None) -> Optional[int]:
+    # Bez oddziału (skrypty, worker zadań) sesja widzi wszystkie wiersze
+    return session.info.get("branch_id", default)
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_branch(state: ORMExecuteState):
+    branch_id = session_branch(state.session)
+    if branch_id is None or state.is_column_load or state.is_relationship_load:
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        # Każde zapytanie ORM (też get(), UPDATE i DELETE przez ORM) dostaje WHERE branch_id = ...
+        state.statement = state.statement.options(with_loader_criteria(
+            BranchScoped, lambda cls: cls.branch_id == branch_id, include_aliases=True
+        ))
+
+@event.listens_for(Session, "before_flush")
+def _assign_branch(session: Session, flush_context, instances):
+    branch_id = session_branch(session)
+    if branch_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, BranchScoped) and obj.branch_id is None:
+            obj.branch_id = branch_id
@@ -1,20 +1,42 @@
 from __future__ import annotations
 
 from sqlalchemy import Integer, String, DateTime
-from sqlalchemy.orm import relationship, Mapped, mapped_column
-from datetime import datetime, timezone
+from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
+from datetime import datetime
 from typing import Optional
-from .base import Base
+import re
+from .base import Base, utc_now
+
+PHONE_COUNTRY_PREFIX = "48"
+PHONE_NATIONAL_LENGTH = 9
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    # "+48 123-456-789" -> "123456789"
+    if phone is None:
+        return None
+    international = phone.strip().startswith(("+", "00"))
+    digits = re.sub(r"\D", "", phone)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith(PHONE_COUNTRY_PREFIX) and (international or len(digits) > PHONE_NATIONAL_LENGTH):
+        digits = digits[len(PHONE_COUNTRY_PREFIX):]
+    return digits or None
 
 class Customer(Base):
     __tablename__ = "customers"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     phone: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
-    email: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    phone_normalized: Mapped[Optional[str]] = mapped_column(String(20), nullable=True, index=True)
+    email: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
     address: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
 
     vehicles: Mapped[list["Vehicle"]] = relationship(back_populates="owner") # type: ignore
-    orders: Mapped[list["Order"]] = relationship(back_populates="customer") # type: ignore
\ No newline at end of file
+    orders: Mapped[list["Order"]] = relationship(back_populates="customer") # type: ignore
+
+    @validates("phone")
+    def _normalize_phone(self, key, phone):
+        self.phone_normalized = normalize_phone(phone)
+        return phone
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from sqlalchemy import Integer, String, DateTime, ForeignKey, Float, Text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Optional
-from .base import Base
+from .base import Base, utc_now
 
 class Invoice(Base):
     __tablename__ = "invoices"
@@ -12,7 +12,7 @@ class Invoice(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), unique=True)
     invoice_number: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
-    issue_date: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    issue_date: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
     total_amount: Mapped[float] = mapped_column(Float, nullable=False)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, Text, DateTime, JSON, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+import enum
+from .base import Base, utc_now
+from .branch import BranchScoped
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(BranchScoped, Base):
+    # Kolejka zadań w tle - obsługiwana przez services.jobs (python -m services.jobs).
+    # Oddział zadania: API widzi tylko zadania swojego oddziału, worker wykonuje je w jego zakresie
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index("ix_jobs_branch_id", "branch_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    status: Mapped[JobStatus] = mapped_column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    run_after: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Mały wynik w JSON, duży (PDF, CSV) jako plik w JOB_RESULTS_DIR
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    result_path: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    result_media_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    result_filename: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
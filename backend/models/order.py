@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from typing import Optional
-from sqlalchemy import Integer, Text, DateTime, ForeignKey, Float, Enum as SQLEnum
+from sqlalchemy import Integer, Text, DateTime, ForeignKey, Float, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from datetime import datetime, timezone
+from datetime import datetime
 import enum
-from .base import Base
+from .base import Base, utc_now
+from .branch import BranchScoped
 
 class Priority(enum.Enum):
     NORMAL = "normal"
@@ -19,8 +20,13 @@ class OrderStatus(enum.Enum):
     COMPLETED = "completed"
     INVOICED = "invoiced"
 
-class Order(Base):
+class Order(BranchScoped, Base):
     __tablename__ = "orders"
+    # Indeksy zaczynają się od branch_id - kolejka i dashboard czytają tylko zakres jednego oddziału
+    __table_args__ = (
+        Index("ix_orders_branch_status_created_at", "branch_id", "status", "created_at"),
+        Index("ix_orders_branch_updated_at", "branch_id", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"))
@@ -31,15 +37,45 @@ class Order(Base):
     priority: Mapped[Priority] = mapped_column(SQLEnum(Priority), default=Priority.NORMAL)
     status: Mapped[OrderStatus] = mapped_column(SQLEnum(OrderStatus), default=OrderStatus.NEW)
     
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Od kiedy zlecenie ma obecny status i stanowisko - początek otwartego odcinka w raportach (services.reports).
+    # NULL w zleceniach sprzed dziennika zdarzeń - raport bierze wtedy completed_at / started_at / created_at.
+    status_changed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=utc_now
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=utc_now,
+        onupdate=utc_now
+    )
     
     estimated_cost: Mapped[float] = mapped_column(default=0.0)
     final_cost: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
+    # Zdenormalizowana suma z order_parts - utrzymywana przez add/remove części
+    parts_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    parts_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # Licznik wersji - UPDATE zawiera WHERE version = <odczytana>, więc równoległa zmiana kończy się 409, a nie nadpisaniem
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     customer: Mapped["Customer"] = relationship(back_populates="orders") # type: ignore
     vehicle: Mapped["Vehicle"] = relationship(back_populates="orders") # type: ignore
     work_station: Mapped[Optional["WorkStation"]] = relationship(back_populates="orders") # type: ignore
     parts_used: Mapped[list["OrderPart"]] = relationship(back_populates="order") # type: ignore
     invoice: Mapped[Optional["Invoice"]] = relationship(back_populates="order", uselist=False) # type: ignore
+
+    __mapper_args__ = {"version_id_col": version}
+
+class OrderTombstone(BranchScoped, Base):
+    # Ślad po usuniętym zleceniu - potrzebny klientom synchronizującym zmiany (/api/orders/changes)
+    __tablename__ = "order_tombstones"
+    __table_args__ = (
+        Index("ix_order_tombstones_branch_deleted_at", "branch_id", "deleted_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, DateTime, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from .base import Base, utc_now
+from .branch import BranchScoped
+from .order import OrderStatus
+
+class OrderStatusEvent(BranchScoped, Base):
+    # Dziennik zmian statusu/stanowiska zlecenia - tylko dopisywany (services.order_status).
+    # Wiersz opisuje też zamykany stan: from_* od from_at do occurred_at - raport nie musi szukać poprzedniego zdarzenia.
+    # Bez kluczy obcych - historia zostaje po usunięciu i archiwizacji zlecenia.
+    __tablename__ = "order_status_events"
+    __table_args__ = (
+        Index("ix_order_status_events_branch_occurred_at", "branch_id", "occurred_at"),
+        Index("ix_order_status_events_order_id", "order_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    from_status: Mapped[OrderStatus] = mapped_column(SQLEnum(OrderStatus), nullable=False)
+    to_status: Mapped[OrderStatus] = mapped_column(SQLEnum(OrderStatus), nullable=False)
+    from_work_station_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    to_work_station_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    from_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
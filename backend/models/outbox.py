@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, Text, DateTime, JSON, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+import enum
+from .base import Base, utc_now
+
+class OutboxChannel(enum.Enum):
+    SMS = "sms"
+    EMAIL = "email"
+
+class OutboxStatus(enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class OutboxMessage(Base):
+    # Powiadomienie zapisane w tej samej transakcji co zmiana zlecenia - wysyła je services.outbox
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        Index("ix_outbox_messages_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_outbox_messages_status_sent_at", "status", "sent_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    event: Mapped[str] = mapped_column(String(50), nullable=False)
+    order_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    channel: Mapped[OutboxChannel] = mapped_column(SQLEnum(OutboxChannel), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+    status: Mapped[OutboxStatus] = mapped_column(SQLEnum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Termin kolejnej próby; przy pobraniu przesuwany o czas dzierżawy, żeby dwa dispatchery nie wysłały tego samego
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=utc_now)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
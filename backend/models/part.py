@@ -1,17 +1,27 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Float, Text, Integer
+from sqlalchemy import String, Float, Text, Integer, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
+from .branch import BranchScoped
 
-class Part(Base):
+class Part(BranchScoped, Base):
+    # Każdy oddział ma własny magazyn - ten sam kod części może wystąpić w kilku oddziałach
     __tablename__ = "parts"
+    __table_args__ = (
+        UniqueConstraint("branch_id", "code", name="uq_parts_branch_code"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+    code: Mapped[str] = mapped_column(String(50), nullable=False)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     price: Mapped[float] = mapped_column(Float, nullable=False)
     stock_quantity: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Wersja wiersza dla optymistycznej blokady (jak Order.version)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     order_parts: Mapped[list["OrderPart"]] = relationship(back_populates="part") # type: ignore
+
+    __mapper_args__ = {"version_id_col": version}
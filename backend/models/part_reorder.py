@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer, Float, DateTime, ForeignKey
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from datetime import datetime
+from .base import Base, utc_now
+
+class PartReorderStat(Base):
+    # Wynik silnika services.reorder - przeliczany wsadowo i po każdej zmianie części w zleceniu
+    __tablename__ = "part_reorder_stats"
+
+    part_id: Mapped[int] = mapped_column(ForeignKey("parts.id"), primary_key=True)
+    daily_usage: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    usage_std: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    reorder_point: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    order_up_to: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    window_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
+
+    part: Mapped["Part"] = relationship() # type: ignore
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Iterable
+from sqlalchemy import BigInteger, String, event, inspect, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from .base import Base
+
+class TableVersion(Base):
+    # Licznik zmian per tabela - z niego liczone są ETagi bez pobierania wierszy
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+# Tabele zmienione w bieżącej transakcji sesji - liczniki podbijane tuż przed jej commitem
+_PENDING_KEY = "table_versions_pending"
+
+def bump_versions(session: Session, tables: Iterable[str]):
+    # Wołane w transakcji zmiany; masowe UPDATE/DELETE (query.update) muszą to zrobić same.
+    # Liczniki podbija _bump_before_commit w tej samej transakcji - rollback je po prostu porzuca.
+    session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+def increment_versions(connection: Connection, tables: Iterable[str]):
+    # Stała kolejność tabel - dwie transakcje blokują wiersze liczników w tej samej kolejności
+    tables = sorted(set(tables) - {TableVersion.__tablename__})
+    if not tables:
+        return
+
+    result = connection.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name.in_(tables))
+        .values(version=TableVersion.version + 1)
+    )
+
+    if result.rowcount < len(tables):
+        existing = set(connection.execute(
+            select(TableVersion.table_name).where(TableVersion.table_name.in_(tables))
+        ).scalars())
+        missing = [{"table_name": name, "version": 1} for name in tables if name not in existing]
+        if missing:
+            connection.execute(insert(TableVersion), missing)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session: Session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        tables.add(inspect(obj).mapper.local_table.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(inspect(obj).mapper.local_table.name)
+    bump_versions(session, tables)
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session: Session):
+    # Licznik w tej samej transakcji co zmiana: zatwierdzona zmiana zawsze ma nowy ETag, a nieudane
+    # podbicie wycofuje cały zapis. UPDATE idzie na samym końcu, tuż przed COMMIT, więc wiersz licznika
+    # jest zablokowany tylko na czas commitu, a nie całego zapisu.
+    # before_commit przychodzi przed ostatnim flushem - flush teraz, żeby jego tabele też się liczyły
+    session.flush()
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        increment_versions(session.connection(), tables)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Boolean, DateTime, Integer
+from sqlalchemy import String, Boolean, DateTime, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime, timezone
-from .base import Base
+from datetime import datetime
+from .base import Base, utc_now
+from .branch import BranchScoped
 
-class User(Base):
+class User(BranchScoped, Base):
+    # branch_id - oddział macierzysty pracownika
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_branch_id", "branch_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
@@ -14,4 +19,4 @@ class User(Base):
     hashed_password: Mapped[str] = mapped_column(String(100), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
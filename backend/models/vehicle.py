@@ -1,10 +1,17 @@
 from __future__ import annotations
 
 from sqlalchemy import String, Integer, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from typing import Optional
+import re
 from .base import Base
 
+def normalize_identifier(value: Optional[str]) -> Optional[str]:
+    # "wa 12345" -> "WA12345", tak samo dla numeru VIN
+    if value is None:
+        return None
+    return re.sub(r"\s+", "", value).upper() or None
+
 class Vehicle(Base):
     __tablename__ = "vehicles"
 
@@ -15,6 +22,18 @@ class Vehicle(Base):
     year: Mapped[Optional[int]] = mapped_column(nullable=True)
     registration_number: Mapped[Optional[str]] = mapped_column(String(20), unique=True, nullable=True)
     vin: Mapped[Optional[str]] = mapped_column(String(17), unique=True, nullable=True)
+    registration_normalized: Mapped[Optional[str]] = mapped_column(String(20), unique=True, nullable=True, index=True)
+    vin_normalized: Mapped[Optional[str]] = mapped_column(String(17), nullable=True, index=True)
 
     owner: Mapped["Customer"] = relationship(back_populates="vehicles") # type: ignore
     orders: Mapped[list["Order"]] = relationship(back_populates="vehicle") # type: ignore
+
+    @validates("registration_number")
+    def _normalize_registration(self, key, value):
+        self.registration_normalized = normalize_identifier(value)
+        return value
+
+    @validates("vin")
+    def _normalize_vin(self, key, value):
+        self.vin_normalized = normalize_identifier(value)
+        return value
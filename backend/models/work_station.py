@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from sqlalchemy import Integer, String, Boolean
+from sqlalchemy import Integer, String, Boolean, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .base import Base
+from .branch import BranchScoped
 
-class WorkStation(Base):
+class WorkStation(BranchScoped, Base):
     __tablename__ = "work_stations"
+    __table_args__ = (
+        Index("ix_work_stations_branch_id", "branch_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -0,0 +1,110 @@
+"""
+Archiwizacja zafakturowanych zleceń.
+
+Zlecenia w statusie INVOICED starsze niż N miesięcy są przenoszone razem z
+order_parts i invoices do tabel *_archive, paczkami - każda paczka to osobna,
+krótka transakcja, więc ruch API nie czeka na długie blokady. Dzięki temu
+tabele orders / order_parts, które skanują kolejka, dashboard i listy,
+nie rosną bez końca.
+
+Zamiast partycjonowania po created_at: InnoDB nie obsługuje kluczy obcych
+w tabelach partycjonowanych, a orders i order_parts z nich korzystają.
+
+    python -m services.archive --months 12 --batch-size 500
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from models.archive import InvoiceArchive, OrderArchive, OrderPartArchive
+from models.invoice import Invoice
+from models.order import Order, OrderStatus
+from models.order_part import OrderPart
+from models.table_version import bump_versions
+
+DEFAULT_MONTHS = 12
+DEFAULT_BATCH_SIZE = 500
+
+# (tabela źródłowa, archiwum, kolumna wiążąca ze zleceniem)
+ARCHIVED_TABLES = [
+    (Order, OrderArchive, "id"),
+    (OrderPart, OrderPartArchive, "order_id"),
+    (Invoice, InvoiceArchive, "order_id"),
+]
+
+def _move(db: Session, source, target, key: str, order_ids: list[int]):
+    columns = [column.name for column in target.__table__.columns]
+    source_table = source.__table__
+
+    db.execute(
+        insert(target.__table__).from_select(
+            columns,
+            select(*[source_table.c[name] for name in columns]).where(source_table.c[key].in_(order_ids))
+        )
+    )
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    order_ids = db.execute(
+        select(Order.id).where(
+            Order.status == OrderStatus.INVOICED,
+            Order.created_at < cutoff
+        ).order_by(Order.id).limit(batch_size)
+    ).scalars().all()
+
+    if not order_ids:
+        return 0
+
+    for source, target, key in ARCHIVED_TABLES:
+        _move(db, source, target, key, order_ids)
+
+    # Usuwanie w odwrotnej kolejności niż klucze obce
+    for source, _, key in reversed(ARCHIVED_TABLES):
+        db.execute(delete(source.__table__).where(source.__table__.c[key].in_(order_ids)))
+
+    bump_versions(db, ["orders", "order_parts", "invoices", "orders_archive"])
+    db.commit()
+    return len(order_ids)
+
+def archive_invoiced_orders(db: Session, months: int = DEFAULT_MONTHS, batch_size: int = DEFAULT_BATCH_SIZE,
+                            pause: float = 0.1, verbose: bool = False) -> int:
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=30 * months)
+    total = 0
+
+    while True:
+        try:
+            moved = archive_batch(db, cutoff, batch_size)
+        except Exception:
+            db.rollback()
+            raise
+
+        if not moved:
+            break
+
+        total += moved
+        if verbose:
+            print(f"Zarchiwizowano {total} zleceń")
+
+        # Oddech dla bazy między paczkami
+        time.sleep(pause)
+
+    return total
+
+if __name__ == "__main__":
+    from models.base import SessionLocal, engine
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=DEFAULT_MONTHS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.1)
+    args = parser.parse_args()
+
+    engine.echo = False
+    db = SessionLocal()
+    try:
+        moved = archive_invoiced_orders(db, args.months, args.batch_size, args.pause, verbose=True)
+        print(f"Gotowe - przeniesiono {moved} zleceń do archiwum")
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+"""
+Eksport tabel do CSV - wykonywany jako zadanie w tle (services.jobs, kind="export").
+
+Wiersze są czytane strumieniowo (yield_per), więc eksport całej historii
+zleceń nie ładuje jej naraz do pamięci.
+"""
+import csv
+import enum
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.branch import BranchScoped, session_branch
+from models.customer import Customer
+from models.order import Order
+from models.part import Part
+from models.vehicle import Vehicle
+
+EXPORTS = {
+    "orders": Order,
+    "customers": Customer,
+    "vehicles": Vehicle,
+    "parts": Part,
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+def _value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    return "" if value is None else value
+
+def write_csv(db: Session, entity: str, path: str, status: Optional[str] = None) -> int:
+    model = EXPORTS[entity]
+    columns = [column.name for column in model.__table__.columns]
+
+    query = select(*model.__table__.columns).order_by(model.id)
+    if status and entity == "orders":
+        query = query.where(Order.status == status)
+    if session_branch(db) is not None and issubclass(model, BranchScoped):
+        # Kolumny tabeli (Core) omijają zawężenie zapytań ORM do oddziału - warunek jawnie
+        query = query.where(model.__table__.c.branch_id == session_branch(db))
+
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+            writer.writerow([_value(value) for value in row])
+            rows += 1
+    return rows
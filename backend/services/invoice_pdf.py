@@ -0,0 +1,232 @@
+"""
+Generowanie protokołu naprawy (PDF) dla POST /api/orders/{id}/invoice
+i zadania "invoice" w services.jobs.
+
+ReportLab i szukanie fontów są kosztowne, a potrzebne tylko temu jednemu
+endpointowi - moduł jest importowany dopiero przy pierwszym użyciu albo
+w tle przez api.readiness, więc nie spowalnia startu workerów.
+"""
+import io
+import os
+from datetime import date
+from functools import cache
+
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from models.order import OrderStatus
+from models.order_part import OrderPart
+from services.order_status import set_order_status
+
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "C:\\Windows\\Fonts\\Arial.ttf",
+]
+
+@cache
+def register_fonts() -> bool:
+    # Font z polskimi znakami - szukany raz na proces
+    try:
+        for font_path in FONT_PATHS:
+            if os.path.exists(font_path):
+                pdfmetrics.registerFont(TTFont('CustomFont', font_path))
+                return True
+
+        # Fallback - użyj wbudowanego Helvetica
+        print("Warning: No Unicode font found, using Helvetica")
+    except Exception as e:
+        print(f"Font registration error: {e}")
+    return False
+
+def warmup():
+    register_fonts()
+    getSampleStyleSheet()
+
+def invoice_filename(order_id: int) -> str:
+    return f"zlecenie_{order_id}_dokument.pdf"
+
+def invoice_order(db, order, labor_cost: float) -> io.BytesIO:
+    # Wspólne dla endpointu i zadania w tle (services.jobs); commit robi wywołujący
+    # Pobierz części użyte w zleceniu
+    order_parts = db.query(OrderPart).filter(OrderPart.order_id == order.id).all()
+    total_parts_cost = order.parts_total
+
+    # Całkowity koszt = robocizna + części
+    total_cost = labor_cost + total_parts_cost
+
+    # Zapisz koszt końcowy
+    order.final_cost = total_cost
+
+    buffer = render_invoice(order, order_parts, labor_cost, total_parts_cost, total_cost)
+
+    # Zaktualizuj status zlecenia na "invoiced" (z wpisem w dzienniku zdarzeń)
+    set_order_status(db, order, OrderStatus.INVOICED)
+    return buffer
+
+def render_invoice(order, order_parts, labor_cost: float, total_parts_cost: float, total_cost: float) -> io.BytesIO:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1.5 * cm, bottomMargin=1.5 * cm)
+    elements = []
+
+    # Style
+    styles = getSampleStyleSheet()
+
+    # Użyj custom font jeśli został zarejestrowany
+    if register_fonts():
+        styles['Normal'].fontName = 'CustomFont'
+        styles['Heading1'].fontName = 'CustomFont'
+        styles['Heading2'].fontName = 'CustomFont'
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=15,
+        alignment=1
+    )
+
+    # NAGŁÓWEK
+    elements.append(Paragraph("PROTOKÓŁ NAPRAWY", title_style))
+    elements.append(Spacer(1, 10))
+
+    # Informacje o dokumencie
+    doc_info = [
+        ['Numer zlecenia:', f'#{order.id}'],
+        ['Data wystawienia:', date.today().strftime('%d.%m.%Y')],
+        ['Status:', 'Zakończone']
+    ]
+
+    doc_table = Table(doc_info, colWidths=[5 * cm, 10 * cm])
+    doc_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    elements.append(doc_table)
+    elements.append(Spacer(1, 10))
+
+    # Dane klienta
+    elements.append(Paragraph("<b>DANE KLIENTA</b>", styles['Heading2']))
+    client_data = [
+        ['Imię i nazwisko:', order.customer.name if order.customer else 'Brak danych'],
+        ['Telefon:', order.customer.phone or '-'],
+        ['Email:', order.customer.email or '-'],
+    ]
+
+    client_table = Table(client_data, colWidths=[5 * cm, 10 * cm])
+    client_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ]))
+    elements.append(client_table)
+    elements.append(Spacer(1, 10))
+
+    # Dane pojazdu
+    elements.append(Paragraph("<b>DANE POJAZDU</b>", styles['Heading2']))
+    vehicle_data = [
+        ['Marka:', order.vehicle.brand if order.vehicle else '-'],
+        ['Model:', order.vehicle.model if order.vehicle else '-'],
+        ['Rok produkcji:', str(order.vehicle.year) if order.vehicle and order.vehicle.year else '-'],
+        ['Nr rejestracyjny:', order.vehicle.registration_number if order.vehicle else '-'],
+        ['VIN:', order.vehicle.vin or '-' if order.vehicle else '-'],
+    ]
+
+    vehicle_table = Table(vehicle_data, colWidths=[5 * cm, 10 * cm])
+    vehicle_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), styles['Heading2'].fontName),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ]))
+    elements.append(vehicle_table)
+    elements.append(Spacer(1, 10))
+
+    # Opis naprawy
+    elements.append(Paragraph("<b>OPIS WYKONANYCH PRAC</b>", styles['Heading2']))
+    desc_text = order.description.replace('\n', '<br/>')
+    elements.append(Paragraph(desc_text, styles['Normal']))
+    elements.append(Spacer(1, 15))
+
+    # Użyte części
+    if order_parts:
+        elements.append(Paragraph("<b>UŻYTE CZĘŚCI</b>", styles['Heading2']))
+
+        parts_data = [['Część', 'Ilość', 'Cena jedn.', 'Wartość']]
+        for op in order_parts:
+            parts_data.append([
+                f"{op.part.code} - {op.part.name}",
+                str(op.quantity),
+                f"{op.unit_price:.2f} PLN",
+                f"{(op.quantity * op.unit_price):.2f} PLN"
+            ])
+
+        parts_table = Table(parts_data, colWidths=[8 * cm, 2 * cm, 2.5 * cm, 2.5 * cm])
+        parts_table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('FONTNAME', (0, 0), (-1, 0), styles['Heading2'].fontName),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+            ('ALIGN', (2, 0), (3, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ]))
+        elements.append(parts_table)
+        elements.append(Spacer(1, 15))
+
+    # Podsumowanie kosztów
+    elements.append(Paragraph("<b>PODSUMOWANIE</b>", styles['Heading2']))
+    cost_data = [
+        ['', 'Kwota'],
+        ['Koszt robocizny:', f'{labor_cost:.2f} PLN'],
+    ]
+
+    if total_parts_cost > 0:
+        cost_data.append(['Koszt części:', f'{total_parts_cost:.2f} PLN'])
+
+    cost_data.extend([
+        ['', ''],
+        ['DO ZAPŁATY:', f'{total_cost:.2f} PLN'],
+    ])
+
+    cost_table = Table(cost_data, colWidths=[10 * cm, 5 * cm])
+    cost_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), styles['Normal'].fontName),
+        ('FONTSIZE', (0, 0), (-1, -1), 12),
+        ('FONTNAME', (0, 0), (-1, 0), styles['Heading2'].fontName),
+        ('FONTNAME', (0, -1), (-1, -1), styles['Heading2'].fontName),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    elements.append(cost_table)
+
+    # Stopka
+    elements.append(Spacer(1, 20))
+    footer_text = "Dokument wygenerowany automatycznie przez system AutoService Manager"
+    elements.append(Paragraph(footer_text, ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.grey,
+        alignment=1
+    )))
+
+    # Generuj PDF
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,311 @@
+"""
+Kolejka zadań w tle oparta o tabelę jobs.
+
+API tylko zapisuje zadanie (enqueue) i od razu odpowiada 202 - ciężka praca
+(PDF protokołu, eksporty, uzgadnianie liczników, punkty zamówienia części) dzieje się w osobnym
+procesie i nie blokuje workerów gunicorna:
+
+    python -m services.jobs --workers 2
+
+Każdy proces workera pobiera zadania przez SELECT ... FOR UPDATE SKIP LOCKED,
+więc kilka procesów (i kontenerów) nie weźmie tego samego zadania. Nieudane
+zadania wracają do kolejki z wykładniczym opóźnieniem, aż do max_attempts.
+Handler nie commituje sam - wynik zadania i zmiany w danych zapisują się
+w jednej transakcji.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.job import Job, JobStatus
+
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR", "static/jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+# Zadanie RUNNING dłużej niż tyle uznajemy za porzucone (worker padł) i wraca do kolejki
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "600"))
+JOB_RESULT_TTL_DAYS = int(os.getenv("JOB_RESULT_TTL_DAYS", "7"))
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 600
+MAINTENANCE_EVERY_SECONDS = 60
+
+HANDLERS: dict[str, Callable[[Session, Job], Optional[dict]]] = {}
+
+class PermanentJobError(Exception):
+    # Błąd, którego ponowienie nie naprawi (np. zlecenie już zafakturowane)
+    pass
+
+def job_handler(kind: str):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def enqueue(db: Session, kind: str, payload: Optional[dict] = None, max_attempts: int = 3,
+            delay: float = 0) -> Job:
+    # Bez commita - zadanie zapisuje się razem z transakcją wywołującego
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    # Oddział zadania ustawia sesja wywołującego (models.branch) - worker wykona je w jego zakresie
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_after=_now() + timedelta(seconds=delay)
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+def result_path(job: Job, filename: str) -> str:
+    os.makedirs(JOB_RESULTS_DIR, exist_ok=True)
+    return os.path.join(JOB_RESULTS_DIR, f"{job.id}_{filename}")
+
+def attach_file(job: Job, path: str, filename: str, media_type: str):
+    job.result_path = path
+    job.result_filename = filename
+    job.result_media_type = media_type
+
+def backoff(attempts: int) -> float:
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+def claim(db: Session, worker_id: str) -> Optional[Job]:
+    now = _now()
+    job = db.execute(
+        select(Job).where(
+            Job.status == JobStatus.QUEUED,
+            Job.run_after <= now
+        ).order_by(Job.run_after, Job.id).limit(1).with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.started_at = now
+    job.attempts += 1
+    db.commit()
+    return job
+
+def execute(db: Session, job: Job):
+    job_id = job.id
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise PermanentJobError(f"Unknown job kind: {job.kind}")
+
+        # Np. eksport tylko zleceń oddziału, z którego przyszło zadanie
+        db.info["branch_id"] = job.branch_id
+        job.result = handler(db, job)
+        job.status = JobStatus.SUCCEEDED
+        job.error = None
+        job.finished_at = _now()
+        job.locked_by = None
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        job = db.get(Job, job_id)
+        job.error = "".join(traceback.format_exception_only(type(e), e)).strip()[:2000]
+        job.locked_by = None
+
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED
+            job.finished_at = _now()
+        else:
+            job.status = JobStatus.QUEUED
+            job.run_after = _now() + timedelta(seconds=backoff(job.attempts))
+        db.commit()
+    finally:
+        # Sesja workera obsługuje kolejne zadania - z różnych oddziałów
+        db.info.pop("branch_id", None)
+
+def run_pending(db: Session, worker_id: str, limit: Optional[int] = None) -> int:
+    # Wykonuje zadania, dopóki są gotowe w kolejce - przydatne też w skryptach i testach
+    done = 0
+    while limit is None or done < limit:
+        job = claim(db, worker_id)
+        if job is None:
+            break
+        execute(db, job)
+        done += 1
+    return done
+
+def requeue_stale(db: Session) -> int:
+    cutoff = _now() - timedelta(seconds=JOB_TIMEOUT_SECONDS)
+    stale = db.execute(
+        select(Job).where(Job.status == JobStatus.RUNNING, Job.locked_at < cutoff).with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    for job in stale:
+        job.error = f"Worker {job.locked_by} przestał odpowiadać"
+        job.locked_by = None
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.FAILED
+            job.finished_at = _now()
+        else:
+            job.status = JobStatus.QUEUED
+            job.run_after = _now()
+    db.commit()
+    return len(stale)
+
+def purge_finished(db: Session) -> int:
+    cutoff = _now() - timedelta(days=JOB_RESULT_TTL_DAYS)
+    old = db.execute(
+        select(Job).where(Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]), Job.finished_at < cutoff)
+    ).scalars().all()
+
+    for job in old:
+        if job.result_path and os.path.exists(job.result_path):
+            os.remove(job.result_path)
+        db.delete(job)
+    db.commit()
+    return len(old)
+
+# --- Handlery ---
+
+@job_handler("invoice")
+def _invoice(db: Session, job: Job) -> dict:
+    from models.order import Order, OrderStatus
+    from services.invoice_pdf import invoice_filename, invoice_order
+
+    order = db.get(Order, job.payload["order_id"])
+    if order is None:
+        raise PermanentJobError("Order not found")
+    if order.status != OrderStatus.COMPLETED:
+        raise PermanentJobError("Only completed orders can be invoiced")
+
+    buffer = invoice_order(db, order, job.payload["labor_cost"])
+    filename = invoice_filename(order.id)
+    path = result_path(job, filename)
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+    attach_file(job, path, filename, "application/pdf")
+    return {"order_id": order.id, "final_cost": order.final_cost}
+
+@job_handler("export")
+def _export(db: Session, job: Job) -> dict:
+    from services.exports import EXPORTS, write_csv
+
+    entity = job.payload.get("entity")
+    if entity not in EXPORTS:
+        raise PermanentJobError(f"Unknown export: {entity}")
+
+    filename = f"{entity}_{_now():%Y%m%d_%H%M%S}.csv"
+    path = result_path(job, filename)
+    rows = write_csv(db, entity, path, status=job.payload.get("status"))
+    attach_file(job, path, filename, "text/csv")
+    return {"entity": entity, "rows": rows}
+
+@job_handler("reorder")
+def _reorder(db: Session, job: Job) -> dict:
+    # Z part_ids - po dodaniu/usunięciu części w zleceniu; bez - pełne przeliczenie oddziału (POST .../rebuild).
+    # Przeliczenie jest idempotentne, powtórka nie szkodzi
+    from services import reorder
+
+    part_ids = job.payload.get("part_ids")
+    if part_ids is None:
+        return {"parts": reorder.rebuild(db)}
+    reorder.refresh_parts(db, part_ids)
+    return {"part_ids": part_ids}
+
+@job_handler("reconcile")
+def _reconcile(db: Session, job: Job) -> dict:
+    from verify_order_totals import find_drift, fix_drift
+
+    drift = find_drift(db)
+    fix_drift(db, drift)
+    return {"orders_fixed": len(drift), "order_ids": [row[0] for row in drift][:100]}
+
+# --- Proces workera ---
+
+def run_worker(worker_id: str, stop):
+    from models.base import SessionLocal, branch_engines, engine
+
+    # Zatrzymaniem steruje proces nadrzędny przez stop - Ctrl+C nie może przerwać zadania w połowie
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    # Zadania oddziału na osobnej instancji (BRANCH_DATABASE_URLS) leżą w jej tabeli jobs - obsłuż wszystkie bazy
+    engines = [engine, *branch_engines()]
+    for target in engines:
+        # Połączenia odziedziczone po procesie nadrzędnym nie mogą być współdzielone
+        target.dispose(close=False)
+        target.echo = False
+
+    # Sesje żyją przez wiele zadań - po commicie obiekty muszą się odświeżać z bazy
+    sessions = [SessionLocal(bind=target, expire_on_commit=True) for target in engines]
+    last_maintenance = 0.0
+    try:
+        while not stop.is_set():
+            maintenance = time.monotonic() - last_maintenance > MAINTENANCE_EVERY_SECONDS
+            done = 0
+            for db in sessions:
+                try:
+                    if maintenance:
+                        requeue_stale(db)
+                        purge_finished(db)
+                    done += run_pending(db, worker_id, limit=10)
+                except Exception as e:
+                    # Np. chwilowy brak jednej z baz - nie zabijaj workera, pozostałe bazy działają dalej
+                    db.rollback()
+                    print(f"[{worker_id}] błąd pętli ({db.bind.url}): {e}")
+            if maintenance:
+                last_maintenance = time.monotonic()
+
+            if not done:
+                stop.wait(JOB_POLL_SECONDS)
+    finally:
+        for db in sessions:
+            db.close()
+
+def main(workers: int):
+    # Handler sygnału tylko zapisuje flagę - Event.set() w handlerze zakleszczyłby się z trwającym wait()
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    stop = multiprocessing.Event()
+    host = socket.gethostname()
+
+    def spawn(i):
+        process = multiprocessing.Process(target=run_worker, args=(f"{host}:{os.getpid()}:{i}", stop), daemon=True)
+        process.start()
+        return process
+
+    processes = [spawn(i) for i in range(workers)]
+    print(f"Uruchomiono {workers} workerów zadań")
+
+    while not stopping:
+        time.sleep(1)
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not stopping:
+                # Worker padł - podnieś nowy na jego miejsce
+                processes[i] = spawn(i)
+
+    stop.set()
+    for process in processes:
+        process.join(timeout=JOB_TIMEOUT_SECONDS)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    args = parser.parse_args()
+    main(args.workers)
@@ -0,0 +1,63 @@
+"""
+Zmiana statusu zlecenia w jednym miejscu.
+
+Endpointy i zadania w tle ustawiają status i stanowisko przez
+set_order_state / set_order_status, a nie bezpośrednio - skutki uboczne
+zmiany zapisują się wtedy w tej samej transakcji co sam status:
+
+- powiadomienia z outboxa,
+- started_at / completed_at,
+- wpis w dzienniku order_status_events (raporty: services.reports).
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models.base import utc_now
+from models.order import Order, OrderStatus
+from models.order_event import OrderStatusEvent
+from services import outbox
+
+# Wartość domyślna work_station_id w set_order_state - stanowisko bez zmian
+UNCHANGED = object()
+
+def status_value(status) -> Optional[str]:
+    if isinstance(status, OrderStatus):
+        return status.value
+    return status.lower() if status else None
+
+def set_order_state(db: Session, order: Order, status=None, work_station_id=UNCHANGED):
+    # Bez commita - robi go wywołujący. status=None - status bez zmian.
+    previous = status_value(order.status)
+    current = status_value(status) or previous
+    station = order.work_station_id if work_station_id is UNCHANGED else work_station_id
+    if current == previous and station == order.work_station_id:
+        return
+
+    now = utc_now()
+    # Zamykany odcinek: poprzedni status i stanowisko od status_changed_at do teraz
+    db.add(OrderStatusEvent(
+        branch_id=order.branch_id,
+        order_id=order.id,
+        from_status=order.status,
+        to_status=OrderStatus(current),
+        from_work_station_id=order.work_station_id,
+        to_work_station_id=station,
+        from_at=order.status_changed_at or order.completed_at or order.started_at or order.created_at,
+        occurred_at=now
+    ))
+
+    order.status = OrderStatus(current)
+    order.work_station_id = station
+    order.status_changed_at = now
+
+    if current == "in_progress" and not order.started_at:
+        order.started_at = now
+    if current == "completed" and not order.completed_at:
+        order.completed_at = now
+
+    if current == "completed" and previous != "completed":
+        outbox.add_order_completed(db, order)
+
+def set_order_status(db: Session, order: Order, status):
+    set_order_state(db, order, status)
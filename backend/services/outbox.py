@@ -0,0 +1,282 @@
+"""
+Transakcyjny outbox powiadomień dla klientów.
+
+Zmiana statusu zlecenia na "completed" zapisuje wiadomości (SMS na
+Customer.phone, e-mail na Customer.email) do outbox_messages w tej samej
+transakcji - jeśli zmiana się nie zatwierdzi, nie ma też powiadomienia,
+a żądanie API nigdy nie czeka na dostawcę.
+
+Dispatcher (python -m services.outbox) pobiera paczki oczekujących
+wiadomości (FOR UPDATE SKIP LOCKED + dzierżawa przez next_attempt_at),
+wysyła je przez dostawcę z limitem wiadomości na sekundę i ponawia
+nieudane z wykładniczym opóźnieniem. Domyślny dostawca "stub" tylko
+zapisuje wiadomości do pliku JSONL - do testów i lokalnego uruchomienia.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.order import Order
+from models.outbox import OutboxChannel, OutboxMessage, OutboxStatus
+
+OUTBOX_PROVIDER = os.getenv("OUTBOX_PROVIDER", "stub")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_RATE_PER_SECOND = float(os.getenv("OUTBOX_RATE_PER_SECOND", "10"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Wiadomość pobrana przez dispatcher, który potem padł, wraca do kolejki po tym czasie
+OUTBOX_LEASE_SECONDS = 60
+BACKOFF_BASE_SECONDS = 10
+BACKOFF_MAX_SECONDS = 3600
+LAG_SAMPLE_SIZE = 1000
+
+STUB_LOG_PATH = os.getenv("OUTBOX_STUB_LOG", "logs/outbox_stub.jsonl")
+STUB_FAIL_RATE = float(os.getenv("OUTBOX_STUB_FAIL_RATE", "0"))
+STUB_LATENCY_SECONDS = float(os.getenv("OUTBOX_STUB_LATENCY_MS", "50")) / 1000
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+# --- Zapis (w transakcji żądania) ---
+
+def _completed_text(order: Order) -> str:
+    vehicle = f"{order.vehicle.brand} {order.vehicle.model}" if order.vehicle else "pojazd"
+    return f"Zlecenie #{order.id} ({vehicle}) zostało zakończone. Zapraszamy po odbiór."
+
+def add_order_completed(db: Session, order: Order) -> list[OutboxMessage]:
+    # Bez commita - wiadomości zapisują się razem ze zmianą statusu
+    customer = order.customer
+    if customer is None:
+        return []
+
+    payload = {"order_id": order.id, "customer_name": customer.name, "text": _completed_text(order)}
+    messages = []
+    if customer.phone:
+        messages.append(OutboxMessage(
+            event="order_completed", order_id=order.id, channel=OutboxChannel.SMS,
+            recipient=customer.phone, payload=payload
+        ))
+    if customer.email:
+        messages.append(OutboxMessage(
+            event="order_completed", order_id=order.id, channel=OutboxChannel.EMAIL,
+            recipient=customer.email, payload={**payload, "subject": f"Zlecenie #{order.id} zakończone"}
+        ))
+
+    db.add_all(messages)
+    return messages
+
+# --- Dostawcy ---
+
+class StubProvider:
+    # Udaje bramkę SMS/e-mail: opóźnienie, losowe błędy, zapis do pliku
+    async def send(self, messages: list[dict]) -> dict[int, Optional[str]]:
+        await asyncio.sleep(STUB_LATENCY_SECONDS)
+
+        results = {}
+        delivered = []
+        for message in messages:
+            if random.random() < STUB_FAIL_RATE:
+                results[message["id"]] = "stub: provider unavailable"
+            else:
+                results[message["id"]] = None
+                delivered.append({**message, "delivered_at": _now().isoformat()})
+
+        if delivered:
+            os.makedirs(os.path.dirname(STUB_LOG_PATH) or ".", exist_ok=True)
+            with open(STUB_LOG_PATH, "a", encoding="utf-8") as f:
+                for message in delivered:
+                    f.write(json.dumps(message, ensure_ascii=False) + "\n")
+        return results
+
+PROVIDERS = {
+    "stub": StubProvider,
+}
+
+class RateLimiter:
+    # Token bucket - dostawcy SMS zwykle limitują liczbę wiadomości na sekundę
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, count: int = 1):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= count:
+                self.tokens -= count
+                return
+            await asyncio.sleep((count - self.tokens) / self.rate)
+
+# --- Dispatcher ---
+
+def backoff(attempts: int) -> float:
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+def claim_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> list[dict]:
+    now = _now()
+    messages = db.execute(
+        select(OutboxMessage).where(
+            OutboxMessage.status == OutboxStatus.PENDING,
+            OutboxMessage.next_attempt_at <= now
+        ).order_by(OutboxMessage.next_attempt_at, OutboxMessage.id).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    claimed = []
+    for message in messages:
+        message.attempts += 1
+        message.next_attempt_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        claimed.append({
+            "id": message.id,
+            "event": message.event,
+            "channel": message.channel.value,
+            "recipient": message.recipient,
+            "payload": message.payload,
+        })
+    db.commit()
+    return claimed
+
+def record_results(db: Session, results: dict[int, Optional[str]]):
+    now = _now()
+    messages = db.execute(select(OutboxMessage).where(OutboxMessage.id.in_(list(results)))).scalars().all()
+
+    for message in messages:
+        error = results[message.id]
+        if error is None:
+            message.status = OutboxStatus.SENT
+            message.sent_at = now
+            message.last_error = None
+        elif message.attempts >= OUTBOX_MAX_ATTEMPTS:
+            message.status = OutboxStatus.FAILED
+            message.last_error = error
+        else:
+            message.next_attempt_at = now + timedelta(seconds=backoff(message.attempts))
+            message.last_error = error
+    db.commit()
+
+async def dispatch_once(session_factory, provider, limiter: RateLimiter) -> int:
+    def claim():
+        db = session_factory()
+        try:
+            return claim_batch(db)
+        finally:
+            db.close()
+
+    batch = await asyncio.to_thread(claim)
+    if not batch:
+        return 0
+
+    # Osobne wywołania dostawcy per kanał, w porcjach nie większych niż pojemność limitu
+    async def send(channel_messages):
+        results = {}
+        step = int(limiter.capacity)
+        for start in range(0, len(channel_messages), step):
+            chunk = channel_messages[start:start + step]
+            await limiter.acquire(len(chunk))
+            try:
+                results.update(await provider.send(chunk))
+            except Exception as e:
+                results.update({message["id"]: f"{type(e).__name__}: {e}" for message in chunk})
+        return results
+
+    by_channel = {}
+    for message in batch:
+        by_channel.setdefault(message["channel"], []).append(message)
+
+    results = {}
+    for channel_results in await asyncio.gather(*(send(messages) for messages in by_channel.values())):
+        results.update(channel_results)
+
+    def record():
+        db = session_factory()
+        try:
+            record_results(db, results)
+        finally:
+            db.close()
+
+    await asyncio.to_thread(record)
+    return len(batch)
+
+async def dispatch_forever(session_factories: list, stop: Optional[asyncio.Event] = None):
+    # Jedna fabryka sesji na bazę (główna i instancje oddziałów) - dostawca i limit wysyłki są wspólne
+    provider = PROVIDERS[OUTBOX_PROVIDER]()
+    limiter = RateLimiter(OUTBOX_RATE_PER_SECOND)
+    stop = stop or asyncio.Event()
+
+    while not stop.is_set():
+        sent = 0
+        for session_factory in session_factories:
+            try:
+                sent += await dispatch_once(session_factory, provider, limiter)
+            except Exception as e:
+                # Np. chwilowy brak jednej z baz - dispatcher ma działać dalej
+                print(f"Outbox: błąd wysyłki: {e}")
+
+        if not sent:
+            try:
+                await asyncio.wait_for(stop.wait(), OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+# --- Metryki ---
+
+def outbox_stats(db: Session) -> dict:
+    now = _now()
+    counts = dict(db.execute(
+        select(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status)
+    ).all())
+    oldest_pending = db.execute(
+        select(func.min(OutboxMessage.created_at)).where(OutboxMessage.status == OutboxStatus.PENDING)
+    ).scalar()
+
+    # Opóźnienie wysyłki = sent_at - created_at dla ostatnich wysłanych wiadomości
+    recent = db.execute(
+        select(OutboxMessage.created_at, OutboxMessage.sent_at).where(
+            OutboxMessage.status == OutboxStatus.SENT
+        ).order_by(OutboxMessage.sent_at.desc()).limit(LAG_SAMPLE_SIZE)
+    ).all()
+    lags = sorted((sent_at - created_at).total_seconds() for created_at, sent_at in recent)
+
+    return {
+        "pending": counts.get(OutboxStatus.PENDING, 0),
+        "sent": counts.get(OutboxStatus.SENT, 0),
+        "failed": counts.get(OutboxStatus.FAILED, 0),
+        "oldest_pending_seconds": (now - oldest_pending).total_seconds() if oldest_pending else 0,
+        "lag_seconds": {
+            "samples": len(lags),
+            "p50": statistics.median(lags) if lags else None,
+            "p95": lags[max(int(len(lags) * 0.95) - 1, 0)] if lags else None,
+            "max": lags[-1] if lags else None
+        }
+    }
+
+if __name__ == "__main__":
+    import signal
+    from functools import partial
+    from models.base import SessionLocal, branch_engines, engine
+
+    # Wiadomości oddziałów na osobnej instancji (BRANCH_DATABASE_URLS) leżą w ich outbox_messages
+    engines = [engine, *branch_engines()]
+    for target in engines:
+        target.echo = False
+
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"Outbox: dispatcher uruchomiony (dostawca {OUTBOX_PROVIDER})")
+        await dispatch_forever([partial(SessionLocal, bind=target) for target in engines], stop)
+
+    asyncio.run(main())
@@ -0,0 +1,318 @@
+"""
+Dane referencyjne współdzielone przez workery gunicorna.
+
+Zamiast żeby każdy z workerów osobno pytał bazę o oddziały, stanowiska,
+katalog części i słowniki statusów (i trzymał własną kopię), snapshot
+budowany jest raz -
+przez proces nadrzędny gunicorna (gunicorn.conf.py) - do REFDATA_DIR
+(domyślnie /dev/shm, czyli pamięć współdzielona):
+
+- parts-<generacja>.npy - tablica strukturalna NumPy (branch_id, id, code,
+  price, stock_quantity) posortowana po (branch_id, id); workery mapują ją
+  przez mmap tylko do odczytu, więc wszystkie korzystają z tych samych
+  stron pamięci,
+- current.json - wskaźnik na aktualną generację plus małe słowniki
+  (oddziały, stanowiska, statusy), podmieniany atomowo przez os.replace.
+
+Części i stanowiska oddziałów z BRANCH_DATABASE_URLS są czytane z ich
+instancji. Wątek odświeżający co REFDATA_REFRESH_SECONDS sprawdza
+table_versions dla branches / parts / work_stations w każdej bazie i przy
+zmianie buduje nową generację. Czytelnicy co
+REFDATA_CHECK_SECONDS patrzą na inode wskaźnika i przełączają się na nową
+generację; stare pliki są usuwane po REFDATA_KEEP_GENERATIONS generacjach
+(zamapowany plik pozostaje czytelny po usunięciu). Stan magazynu w
+snapshocie może więc być o kilka sekund starszy niż w bazie.
+
+NumPy ładowany jest dopiero przy dostępie do części - stanowiska i statusy
+go nie potrzebują.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import NullPool
+
+from models import base
+from models.base import DATABASE_URL
+from models.branch import Branch
+from models.order import OrderStatus
+from models.part import Part
+from models.table_version import TableVersion
+from models.work_station import WorkStation
+
+_default_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+REFDATA_DIR = os.getenv("REFDATA_DIR", os.path.join(_default_dir, "autoservice-refdata"))
+REFDATA_REFRESH_SECONDS = float(os.getenv("REFDATA_REFRESH_SECONDS", "5"))
+REFDATA_CHECK_SECONDS = 1.0
+REFDATA_KEEP_GENERATIONS = 3
+CODE_LENGTH = 50
+
+POINTER_FILE = "current.json"
+LOCK_FILE = "build.lock"
+TRACKED_TABLES = ["branches", "parts", "work_stations"]
+
+_engines: dict = {}
+_lock = threading.Lock()
+_state = {"inode": None, "checked": 0.0, "meta": None, "parts": None}
+_refresher: Optional[threading.Thread] = None
+
+def parts_dtype():
+    import numpy as np
+    return np.dtype([("branch_id", "<i4"), ("id", "<i8"), ("code", f"S{CODE_LENGTH}"), ("price", "<f8"), ("stock_quantity", "<i8")])
+
+def _get_engine(url: str = DATABASE_URL):
+    # Własne silniki bez puli - build() działa też w procesie nadrzędnym gunicorna przed fork()
+    if url not in _engines:
+        _engines[url] = create_engine(url, poolclass=NullPool)
+    return _engines[url]
+
+def _database_urls() -> list[str]:
+    return [DATABASE_URL, *base.branch_router.database_urls()]
+
+def _located_in(branch_id: int, url: str) -> bool:
+    # Wiersz oddziału liczy się tylko z instancji, na którą router kieruje ten oddział
+    return (base.branch_router.database_url(branch_id) or DATABASE_URL) == url
+
+def _path(name: str) -> str:
+    return os.path.join(REFDATA_DIR, name)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _read_pointer() -> Optional[dict]:
+    try:
+        with open(_path(POINTER_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+# --- Budowanie ---
+
+def _table_versions(connection) -> dict:
+    rows = connection.execute(
+        select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(TRACKED_TABLES))
+    ).all()
+    versions = dict(rows)
+    return {table: versions.get(table, 0) for table in TRACKED_TABLES}
+
+def _write_atomic(name: str, write):
+    fd, tmp = tempfile.mkstemp(dir=REFDATA_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, _path(name))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _cleanup(generation: int):
+    for name in os.listdir(REFDATA_DIR):
+        if name.startswith("parts-") and name.endswith(".npy"):
+            if int(name[len("parts-"):-len(".npy")]) <= generation - REFDATA_KEEP_GENERATIONS:
+                os.remove(_path(name))
+
+def build(force: bool = True) -> int:
+    # Zwraca numer generacji; force=False buduje tylko, gdy branches/parts/work_stations zmieniły się od ostatniej
+    import numpy as np
+
+    os.makedirs(REFDATA_DIR, exist_ok=True)
+    with open(_path(LOCK_FILE), "w") as lock_file:
+        # Kilka procesów może próbować jednocześnie (np. workery bez gunicorna) - buduje jeden naraz
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            current = _read_pointer()
+            urls = _database_urls()
+            connections = [_get_engine(url).connect() for url in urls]
+            try:
+                versions = [_table_versions(connection) for connection in connections]
+                if not force and current is not None and current.get("versions") == versions:
+                    return current["generation"]
+
+                branches = connections[0].execute(
+                    select(Branch.id, Branch.code, Branch.name, Branch.is_active).order_by(Branch.id)
+                ).all()
+                parts, stations = [], []
+                for url, connection in zip(urls, connections):
+                    parts += [row for row in connection.execute(
+                        select(Part.branch_id, Part.id, Part.code, Part.price, Part.stock_quantity)
+                    ) if _located_in(row.branch_id, url)]
+                    stations += [row for row in connection.execute(
+                        select(WorkStation.branch_id, WorkStation.id, WorkStation.name, WorkStation.is_active)
+                    ) if _located_in(row.branch_id, url)]
+            finally:
+                for connection in connections:
+                    connection.close()
+
+            generation = (current["generation"] if current else 0) + 1
+
+            # Oddziały na osobnych instancjach mają własne sekwencje id - klucz to (branch_id, id)
+            parts.sort(key=lambda row: (row.branch_id, row.id))
+            stations.sort(key=lambda row: (row.branch_id, row.id))
+
+            array = np.zeros(len(parts), dtype=parts_dtype())
+            if parts:
+                branch_ids, ids, codes, prices, stock = zip(*parts)
+                array["branch_id"] = branch_ids
+                array["id"] = ids
+                array["code"] = [code.encode("utf-8")[:CODE_LENGTH] for code in codes]
+                array["price"] = prices
+                array["stock_quantity"] = [quantity or 0 for quantity in stock]
+            parts_file = f"parts-{generation}.npy"
+            _write_atomic(parts_file, lambda f: np.save(f, array, allow_pickle=False))
+
+            pointer = {
+                "generation": generation,
+                "built_at": _now(),
+                "versions": versions,
+                "parts_file": parts_file,
+                "parts_count": len(parts),
+                "branches": [
+                    {"id": branch_id, "code": code, "name": name, "is_active": bool(is_active)}
+                    for branch_id, code, name, is_active in branches
+                ],
+                "stations": [
+                    {"branch_id": branch_id, "id": station_id, "name": name, "is_active": bool(is_active)}
+                    for branch_id, station_id, name, is_active in stations
+                ],
+                "statuses": [status.value for status in OrderStatus],
+            }
+            _write_atomic(POINTER_FILE, lambda f: f.write(json.dumps(pointer).encode("utf-8")))
+            _cleanup(generation)
+            return generation
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _refresh_loop(stop: threading.Event):
+    while not stop.wait(REFDATA_REFRESH_SECONDS):
+        try:
+            build(force=False)
+        except Exception as e:
+            # Np. baza jeszcze nie wstała - czytelnicy korzystają z poprzedniej generacji
+            print(f"Refdata: błąd odświeżania: {e}")
+
+def start_refresher(stop: Optional[threading.Event] = None) -> threading.Event:
+    global _refresher
+    stop = stop or threading.Event()
+    if _refresher is None or not _refresher.is_alive():
+        _refresher = threading.Thread(target=_refresh_loop, args=(stop,), name="refdata-refresher", daemon=True)
+        _refresher.start()
+    return stop
+
+# --- Odczyt (workery) ---
+
+def _load() -> dict:
+    now = time.monotonic()
+    state = _state
+    if state["meta"] is not None and now - state["checked"] < REFDATA_CHECK_SECONDS:
+        return state
+
+    with _lock:
+        if state["meta"] is not None and now - state["checked"] < REFDATA_CHECK_SECONDS:
+            return state
+        try:
+            inode = os.stat(_path(POINTER_FILE)).st_ino
+        except FileNotFoundError:
+            # Brak snapshotu (np. uvicorn bez gunicorna) - zbuduj go w tym procesie
+            build(force=False)
+            inode = os.stat(_path(POINTER_FILE)).st_ino
+
+        if inode != state["inode"]:
+            state["meta"] = _read_pointer()
+            state["parts"] = None
+            state["inode"] = inode
+        state["checked"] = now
+    return state
+
+def ensure():
+    _load()
+
+def invalidate():
+    # Następny odczyt od razu sprawdzi wskaźnik (np. po build() w tym procesie), bez czekania REFDATA_CHECK_SECONDS
+    _state["checked"] = 0.0
+
+def generation() -> int:
+    return _load()["meta"]["generation"]
+
+def meta() -> dict:
+    data = dict(_load()["meta"])
+    data.pop("versions", None)
+    return data
+
+def branches(active_only: bool = True) -> list[dict]:
+    return [branch for branch in _load()["meta"]["branches"] if branch["is_active"] or not active_only]
+
+def branch_ids(active_only: bool = True) -> set[int]:
+    return {branch["id"] for branch in branches(active_only)}
+
+def stations(branch_id: int, active_only: bool = True) -> list[dict]:
+    return [
+        station for station in _load()["meta"]["stations"]
+        if station["branch_id"] == branch_id and (station["is_active"] or not active_only)
+    ]
+
+def station_ids(branch_id: int, active_only: bool = True) -> list[int]:
+    return [station["id"] for station in stations(branch_id, active_only)]
+
+def statuses() -> list[str]:
+    return list(_load()["meta"]["statuses"])
+
+def parts():
+    # Tablica tylko do odczytu zamapowana z pliku - bez kopiowania do pamięci procesu
+    import numpy as np
+
+    state = _load()
+    parts_array = state["parts"]
+    if parts_array is None:
+        with _lock:
+            if state["parts"] is None:
+                try:
+                    state["parts"] = np.load(_path(state["meta"]["parts_file"]), mmap_mode="r", allow_pickle=False)
+                except FileNotFoundError:
+                    # Generacja zdążyła zostać usunięta - przy następnym odczycie weź aktualny wskaźnik
+                    state["inode"] = None
+                    state["checked"] = 0.0
+                    raise
+            parts_array = state["parts"]
+    return parts_array
+
+def branch_parts(branch_id: int):
+    # Części oddziału to ciągły fragment tablicy (sortowanie po branch_id) - widok bez kopiowania
+    import numpy as np
+
+    array = parts()
+    start, end = np.searchsorted(array["branch_id"], [branch_id, branch_id + 1])
+    return array[start:end]
+
+def part_rows(branch_id: int, ids: Optional[list[int]] = None) -> list[dict]:
+    import numpy as np
+
+    array = branch_parts(branch_id)
+    if ids is not None:
+        positions = np.searchsorted(array["id"], ids)
+        positions = [
+            position for position, part_id in zip(positions, ids)
+            if position < len(array) and array["id"][position] == part_id
+        ]
+        array = array[positions]
+
+    return [
+        {
+            "id": int(row["id"]),
+            "code": row["code"].decode("utf-8", errors="replace"),
+            "price": float(row["price"]),
+            "stock_quantity": int(row["stock_quantity"]),
+        }
+        for row in array
+    ]
+
+if __name__ == "__main__":
+    from models.base import engine
+    engine.echo = False
+    print(f"Refdata: zbudowano generację {build()} w {REFDATA_DIR}")
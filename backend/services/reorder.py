@@ -0,0 +1,142 @@
+"""
+Silnik punktów ponownego zamówienia części.
+
+Zużycie części (order_parts) jest ładowane wsadowo i agregowane w NumPy do
+macierzy części x dni. Z niej liczymy tempo zużycia w kilku oknach
+kroczących, a następnie punkt zamówienia:
+
+    reorder_point = tempo * czas_dostawy + z * odchylenie * sqrt(czas_dostawy)
+
+Wyniki trafiają do part_reorder_stats, skąd serwuje je
+/api/parts/reorder-suggestions. Pełne przeliczenie zleca
+POST /api/parts/reorder-suggestions/rebuild (zadanie "reorder" w services.jobs)
+albo skrypt:
+
+    python -m services.reorder
+"""
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from models.base import utc_now
+from models.branch import session_branch
+from models.order import Order
+from models.order_part import OrderPart
+from models.part import Part
+from models.part_reorder import PartReorderStat
+
+WINDOW_DAYS = int(os.getenv("REORDER_WINDOW_DAYS", "90"))
+ROLLING_WINDOWS = (7, 28, WINDOW_DAYS)
+LEAD_TIME_DAYS = float(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+REVIEW_PERIOD_DAYS = float(os.getenv("REORDER_REVIEW_PERIOD_DAYS", "14"))
+SERVICE_LEVEL_Z = float(os.getenv("REORDER_SERVICE_LEVEL_Z", "1.65"))
+
+def load_consumption(db: Session, since: datetime, part_ids: Optional[Iterable[int]] = None):
+    query = select(
+        OrderPart.part_id,
+        Order.created_at,
+        OrderPart.quantity
+    ).join(
+        Order, Order.id == OrderPart.order_id
+    ).where(
+        Order.created_at >= since
+    )
+
+    if part_ids is not None:
+        query = query.where(OrderPart.part_id.in_(list(part_ids)))
+
+    rows = db.execute(query).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.int64)
+
+    part_col, time_col, quantity_col = zip(*rows)
+    return (
+        np.fromiter(part_col, dtype=np.int64, count=len(rows)),
+        np.array(time_col, dtype="datetime64[D]"),
+        np.fromiter(quantity_col, dtype=np.int64, count=len(rows))
+    )
+
+def compute_stats(part_ids: np.ndarray, days: np.ndarray, quantities: np.ndarray, today: np.datetime64) -> list[dict]:
+    if part_ids.size == 0:
+        return []
+
+    unique_parts, part_index = np.unique(part_ids, return_inverse=True)
+
+    # Macierz dziennego zużycia: wiersz = część, kolumna = dzień okna (ostatnia kolumna = dziś)
+    day_index = (days - (today - (WINDOW_DAYS - 1))).astype(np.int64)
+    in_window = (day_index >= 0) & (day_index < WINDOW_DAYS)
+
+    usage = np.zeros((unique_parts.size, WINDOW_DAYS), dtype=np.float64)
+    np.add.at(usage, (part_index[in_window], day_index[in_window]), quantities[in_window])
+
+    # Tempo zużycia w kilku oknach kroczących - bierzemy najwyższe, żeby szybko reagować na wzrost popytu
+    rates = np.column_stack([usage[:, -window:].mean(axis=1) for window in ROLLING_WINDOWS])
+    daily_usage = rates.max(axis=1)
+    usage_std = usage.std(axis=1)
+
+    safety_stock = SERVICE_LEVEL_Z * usage_std * math.sqrt(LEAD_TIME_DAYS)
+    reorder_point = np.ceil(daily_usage * LEAD_TIME_DAYS + safety_stock).astype(np.int64)
+    order_up_to = np.ceil(daily_usage * (LEAD_TIME_DAYS + REVIEW_PERIOD_DAYS) + safety_stock).astype(np.int64)
+
+    return [
+        {
+            "part_id": int(unique_parts[i]),
+            "daily_usage": float(daily_usage[i]),
+            "usage_std": float(usage_std[i]),
+            "reorder_point": int(reorder_point[i]),
+            "order_up_to": int(order_up_to[i]),
+            "window_days": WINDOW_DAYS
+        }
+        for i in range(unique_parts.size)
+    ]
+
+def _store(db: Session, stats: list[dict], part_ids: Optional[list[int]] = None):
+    computed_at = utc_now()
+
+    if part_ids is None:
+        db.execute(delete(PartReorderStat))
+    else:
+        db.execute(delete(PartReorderStat).where(PartReorderStat.part_id.in_(part_ids)))
+
+    if stats:
+        db.execute(insert(PartReorderStat), [{**row, "computed_at": computed_at} for row in stats])
+
+def rebuild(db: Session) -> int:
+    # Bez commita - API zleca to zadaniem "reorder" bez part_ids, skrypt commituje sam
+    now = utc_now()
+    since = now - timedelta(days=WINDOW_DAYS)
+
+    stats = compute_stats(*load_consumption(db, since), today=np.datetime64(now.date(), "D"))
+
+    part_ids = None
+    if session_branch(db) is not None:
+        # Sesja oddziału przelicza tylko jego części (zapytania są zawężone) - statystyki innych zostają
+        part_ids = db.execute(select(Part.id)).scalars().all()
+    _store(db, stats, part_ids)
+    return len(stats)
+
+def refresh_parts(db: Session, part_ids: Iterable[int]):
+    # Przyrostowa aktualizacja po zmianie order_parts - przeliczamy tylko dotknięte części.
+    # Bez commita - woła to zadanie "reorder" (services.jobs), wynik zapisuje się z jego statusem
+    part_ids = list(set(part_ids))
+    now = utc_now()
+    since = now - timedelta(days=WINDOW_DAYS)
+
+    stats = compute_stats(*load_consumption(db, since, part_ids), today=np.datetime64(now.date(), "D"))
+    _store(db, stats, part_ids)
+
+if __name__ == "__main__":
+    from models.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        db.commit()
+        print(f"Przeliczono punkty zamówienia dla {count} części")
+    finally:
+        db.close()
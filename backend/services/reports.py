@@ -0,0 +1,268 @@
+"""
+Raport obciążenia stanowisk i czasów zleceń per okres (dzień, tydzień, miesiąc).
+
+Źródłem są odcinki stanu zlecenia - status i stanowisko w przedziale czasu:
+
+- zamknięte: wiersze order_status_events (from_* od from_at do occurred_at),
+- otwarte: bieżący stan zleceń (od orders.status_changed_at do teraz).
+
+Każdy rodzaj odcinków nachodzących na okres to jedno zapytanie. Przycięcie
+do okresu to max/min na całych tablicach NumPy, a sumy per stanowisko x status
+liczy jeden np.bincount. Wynik:
+
+- stations: czas IN_PROGRESS (utilization = ten czas / długość okresu), czas
+  zajęcia stanowiska w dowolnym statusie (occupancy), zlecenia zakończone na
+  stanowisku i ich czas cyklu (od przyjęcia do COMPLETED),
+- statuses: łączny czas zleceń w statusie i rozkład długości odcinków
+  zakończonych w okresie,
+- throughput: zlecenia zakończone w okresie.
+
+Dziennik jest tylko dopisywany, więc wynik zamkniętego okresu się nie zmienia
+(poza usunięciem zlecenia w toku) i trafia do cache workera
+(REPORT_CACHE_SIZE okresów). Bieżący okres jest liczony przy każdym żądaniu.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.archive import OrderArchive
+from models.order import Order, OrderStatus
+from models.order_event import OrderStatusEvent
+from services import refdata
+
+# Te same okresy co w api.routes.reports
+PERIODS = ("day", "week", "month")
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+
+STATUSES = list(OrderStatus)
+STATUS_INDEX = {status: index for index, status in enumerate(STATUSES)}
+IN_PROGRESS = STATUS_INDEX[OrderStatus.IN_PROGRESS]
+HOUR = 3600.0
+
+_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+def period_bounds(period: str, day: date) -> tuple[datetime, datetime]:
+    # Granice okresu w UTC (naiwne datetime - tak jak kolumny DateTime w bazie)
+    if period == "day":
+        start = day
+        end = day + timedelta(days=1)
+    elif period == "week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+    elif period == "month":
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+
+def _seconds(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+def _epoch(moment: datetime) -> int:
+    return int(np.datetime64(moment, "s").astype(np.int64))
+
+def _station_values(stations) -> np.ndarray:
+    return np.fromiter((-1 if station is None else station for station in stations), dtype=np.int64,
+                       count=len(stations))
+
+def _station_rows(station_ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Stanowisko -> wiersz macierzy wyników; bez stanowiska albo spoza oddziału -> wiersz len(station_ids)
+    if station_ids.size == 0:
+        return np.zeros(values.size, dtype=np.int64)
+    order = np.argsort(station_ids)
+    position = order[np.minimum(np.searchsorted(station_ids, values, sorter=order), station_ids.size - 1)]
+    return np.where(station_ids[position] == values, position, station_ids.size)
+
+def load_intervals(db: Session, start: datetime, end: datetime, now: datetime) -> dict:
+    """Odcinki stanu nachodzące na [start, end): początek i koniec (s od epoki), status, stanowisko (-1 = brak)."""
+    closed = db.execute(
+        select(
+            OrderStatusEvent.from_at,
+            OrderStatusEvent.occurred_at,
+            OrderStatusEvent.from_status,
+            OrderStatusEvent.from_work_station_id
+        ).where(
+            OrderStatusEvent.occurred_at > start,
+            OrderStatusEvent.from_at < end
+        )
+    ).all()
+
+    since = func.coalesce(Order.status_changed_at, Order.completed_at, Order.started_at, Order.created_at)
+    # Zafakturowane zlecenie już nie czeka - jego ostatni stan nie jest otwartym odcinkiem
+    open_rows = db.execute(
+        select(since, Order.status, Order.work_station_id).where(
+            Order.status != OrderStatus.INVOICED,
+            since < end
+        )
+    ).all()
+
+    # Otwarte odcinki kończą się teraz - ten sam kształt co zamknięte
+    rows = closed + [(since_at, now, status, station) for since_at, status, station in open_rows]
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return {"starts": empty, "ends": empty, "statuses": empty, "stations": empty, "closed": np.empty(0, dtype=bool)}
+
+    starts, ends, statuses, stations = zip(*rows)
+    return {
+        "starts": _seconds(starts),
+        "ends": _seconds(ends),
+        "statuses": np.fromiter((STATUS_INDEX[status] for status in statuses), dtype=np.int64, count=len(rows)),
+        "stations": _station_values(stations),
+        "closed": np.arange(len(rows)) < len(closed),
+    }
+
+def load_completions(db: Session, start: datetime, end: datetime) -> dict:
+    """Przejścia do COMPLETED w [start, end): stanowisko i czas cyklu w sekundach (NaN, gdy brak zlecenia)."""
+    rows = db.execute(
+        select(
+            OrderStatusEvent.order_id,
+            OrderStatusEvent.occurred_at,
+            func.coalesce(OrderStatusEvent.from_work_station_id, OrderStatusEvent.to_work_station_id)
+        ).where(
+            OrderStatusEvent.occurred_at >= start,
+            OrderStatusEvent.occurred_at < end,
+            OrderStatusEvent.to_status == OrderStatus.COMPLETED,
+            OrderStatusEvent.from_status != OrderStatus.COMPLETED
+        )
+    ).all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return {"stations": empty, "cycle": np.empty(0, dtype=np.float64)}
+
+    order_ids, completed_at, stations = zip(*rows)
+    # Moment przyjęcia - zlecenie mogło już trafić do archiwum
+    created = {}
+    for model in (Order, OrderArchive):
+        created.update(db.execute(select(model.id, model.created_at).where(model.id.in_(set(order_ids)))).all())
+
+    created_at = np.array([created.get(order_id) or "NaT" for order_id in order_ids], dtype="datetime64[s]")
+    cycle = (np.array(completed_at, dtype="datetime64[s]") - created_at).astype("timedelta64[s]").astype(np.float64)
+    cycle[np.isnat(created_at)] = np.nan
+    return {"stations": _station_values(stations), "cycle": cycle}
+
+def _hours(seconds) -> float:
+    return round(float(seconds) / HOUR, 2)
+
+def _distribution(durations: np.ndarray) -> dict:
+    if durations.size == 0:
+        return {"avg_hours": None, "p50_hours": None, "p90_hours": None}
+    p50, p90 = np.percentile(durations, [50, 90])
+    return {"avg_hours": _hours(durations.mean()), "p50_hours": _hours(p50), "p90_hours": _hours(p90)}
+
+def compute_report(intervals: dict, completions: dict, station_list: list[dict], start: int, end: int) -> dict:
+    """Czysta arytmetyka na tablicach - start/end to granice okresu (s od epoki), end już przycięty do teraz."""
+    span = max(end - start, 1)
+    station_ids = np.array([station["id"] for station in station_list], dtype=np.int64)
+    n_stations, n_statuses = station_ids.size, len(STATUSES)
+
+    # Część wspólna każdego odcinka z okresem
+    overlap = np.clip(np.minimum(intervals["ends"], end) - np.maximum(intervals["starts"], start), 0, None)
+    row = _station_rows(station_ids, intervals["stations"])
+
+    matrix = np.bincount(
+        row * n_statuses + intervals["statuses"], weights=overlap, minlength=(n_stations + 1) * n_statuses
+    ).reshape(n_stations + 1, n_statuses)
+
+    # Czas w statusie: łącznie w okresie i rozkład odcinków, które się w nim zakończyły
+    status_totals = matrix.sum(axis=0)
+    ended = intervals["closed"] & (intervals["ends"] > start) & (intervals["ends"] <= end)
+    durations = (intervals["ends"] - intervals["starts"]).astype(np.float64)
+    statuses = {}
+    for index, status in enumerate(STATUSES):
+        mask = ended & (intervals["statuses"] == index)
+        statuses[status.value] = {
+            "hours": _hours(status_totals[index]),
+            "finished_intervals": int(mask.sum()),
+            **_distribution(durations[mask])
+        }
+
+    # Zakończenia per stanowisko
+    done_row = _station_rows(station_ids, completions["stations"])
+    completed = np.bincount(done_row, minlength=n_stations + 1)
+
+    stations = []
+    for index, station in enumerate(station_list):
+        busy = matrix[index, IN_PROGRESS]
+        occupied = matrix[index].sum()
+        cycle = completions["cycle"][(done_row == index) & ~np.isnan(completions["cycle"])]
+        stations.append({
+            "id": station["id"],
+            "name": station["name"],
+            "busy_hours": _hours(busy),
+            "occupied_hours": _hours(occupied),
+            "utilization": round(float(busy / span), 4),
+            "occupancy": round(float(occupied / span), 4),
+            "completed": int(completed[index]),
+            "cycle_avg_hours": _hours(cycle.mean()) if cycle.size else None,
+            "cycle_p50_hours": _hours(np.median(cycle)) if cycle.size else None,
+        })
+
+    cycle = completions["cycle"][~np.isnan(completions["cycle"])]
+    return {
+        "hours": _hours(span),
+        "stations": stations,
+        "statuses": statuses,
+        "throughput": {
+            "completed": int(completions["cycle"].size),
+            "completed_per_day": round(completions["cycle"].size / (span / (24 * HOUR)), 2),
+            "cycle_avg_hours": _hours(cycle.mean()) if cycle.size else None,
+            "cycle_p50_hours": _hours(np.median(cycle)) if cycle.size else None,
+        },
+    }
+
+def station_report(db: Session, branch_id: int, period: str, day: date, now: Optional[datetime] = None) -> dict:
+    # Sesja musi być zawężona do branch_id (get_read_db / branch_session) - zapytania ORM nie filtrują go same
+    start, end = period_bounds(period, day)
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    closed = end <= now
+    key = (branch_id, period, start)
+
+    if closed:
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+                _cache_stats["hits"] += 1
+                return cached
+            _cache_stats["misses"] += 1
+
+    if start >= now:
+        raise ValueError("Period has not started yet")
+
+    until = min(end, now)
+    intervals = load_intervals(db, start, until, now)
+    completions = load_completions(db, start, until)
+    station_list = refdata.stations(branch_id, active_only=False)
+
+    report = {
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "closed": closed,
+        **compute_report(intervals, completions, station_list, _epoch(start), _epoch(until)),
+        "computed_at": now.isoformat(),
+    }
+
+    if closed:
+        with _cache_lock:
+            _cache[key] = report
+            while len(_cache) > REPORT_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return report
+
+def report_cache_stats() -> dict:
+    with _cache_lock:
+        return {"size": len(_cache), "max_size": REPORT_CACHE_SIZE, **_cache_stats}
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,60 @@
+"""
+Testy backendu - domyślnie na SQLite w katalogu tymczasowym.
+
+Baza z .env (DATABASE_URL) nie jest używana nigdy - inną bazę testową
+(np. pustą bazę MariaDB) podaje się w TEST_DATABASE_URL. Schemat powstaje
+z modeli (create_all), nie z migracji.
+
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import os
+import tempfile
+
+_tmp_dir = tempfile.mkdtemp(prefix="autoservice-tests-")
+
+# Przed importem modeli - models.base czyta zmienne przy imporcie
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_tmp_dir}/test.db")
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["BRANCH_DATABASE_URLS"] = ""
+os.environ["REFDATA_DIR"] = os.path.join(_tmp_dir, "refdata")
+os.environ["JOB_RESULTS_DIR"] = os.path.join(_tmp_dir, "jobs")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import models
+from models.base import Base, SessionLocal, engine
+from models.branch import Branch
+from models.work_station import WorkStation
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    engine.echo = False
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add_all([Branch(id=1, code="main", name="Main"), Branch(id=2, code="second", name="Second")])
+    db.flush()
+    db.add_all([
+        WorkStation(id=1, branch_id=1, name="Stanowisko 1"),
+        WorkStation(id=2, branch_id=1, name="Stanowisko 2"),
+        WorkStation(id=3, branch_id=2, name="Stanowisko 3"),
+    ])
+    db.commit()
+    db.close()
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+    return TestClient(app)
@@ -0,0 +1,70 @@
+"""
+Weryfikacja tokenów JWT - w szczególności brak SECRET_KEY nie może otwierać dostępu.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from api import auth
+from models.base import SessionLocal
+from models.user import User
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    auth.principal_cache.clear()
+    yield "test-secret"
+    auth.principal_cache.clear()
+
+@pytest.fixture
+def user(db):
+    suffix = uuid.uuid4().hex[:8]
+    user = User(username=f"user-{suffix}", email=f"{suffix}@example.com",
+                hashed_password=auth.hash_password("haslo", iterations=1000), branch_id=1)
+    db.add(user)
+    db.commit()
+    return user
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def _forged_admin(key: str) -> str:
+    # Ręcznie - nowsze PyJWT nie podpisze pustym kluczem, starsze i inne biblioteki tak
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    claims = _b64url(json.dumps({"sub": "1", "branch_id": 2, "is_admin": True, "exp": 4102444800}).encode())
+    signature = hmac.new(key.encode(), f"{header}.{claims}".encode(), hashlib.sha256).digest()
+    return f"{header}.{claims}.{_b64url(signature)}"
+
+def test_valid_token_is_accepted(client, secret, user):
+    token, _ = auth.create_access_token(user)
+    response = client.get("/api/orders", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+
+def test_token_signed_with_other_key_is_rejected(client, secret, user):
+    response = client.get("/api/orders", headers={"Authorization": f"Bearer {_forged_admin('')}"})
+    assert response.status_code == 401
+
+def test_empty_secret_key_rejects_all_tokens(client, monkeypatch, user):
+    monkeypatch.setattr(auth, "SECRET_KEY", "")
+    auth.principal_cache.clear()
+
+    # Token podpisany pustym kluczem - bez sprawdzenia przeszedłby jako administrator
+    response = client.get("/api/orders", headers={"Authorization": f"Bearer {_forged_admin('')}"})
+    assert response.status_code == 503
+
+    with pytest.raises(HTTPException) as error:
+        auth.create_access_token(user)
+    assert error.value.status_code == 503
+
+def test_cached_token_is_rejected_after_secret_is_cleared(client, secret, user, monkeypatch):
+    token, _ = auth.create_access_token(user)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/orders", headers=headers).status_code == 200
+
+    monkeypatch.setattr(auth, "SECRET_KEY", "")
+    assert client.get("/api/orders", headers=headers).status_code == 503
@@ -0,0 +1,116 @@
+"""
+Zakres oddziału w API: dane i zadania w tle jednego oddziału nie są widoczne z innego.
+"""
+import csv
+import io
+import uuid
+
+import pytest
+
+from models.base import BRANCH_HEADER, SessionLocal
+from models.job import Job
+from models.order import Order
+from models.part import Part
+from services import jobs
+
+MAIN = {BRANCH_HEADER: "1"}
+SECOND = {BRANCH_HEADER: "2"}
+
+def _ok(response, code=200):
+    assert response.status_code == code, response.text
+    return response.json()
+
+@pytest.fixture
+def vehicle(client):
+    suffix = uuid.uuid4().hex[:6].upper()
+    customer = _ok(client.post("/api/customers", json={"name": f"Klient {suffix}", "phone": "600400500"}))
+    return _ok(client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Opel", "model": "Astra", "registration_number": f"BR {suffix}"
+    }))
+
+def _order(client, vehicle, headers) -> dict:
+    return _ok(client.post("/api/orders", headers=headers, json={
+        "customer_id": vehicle["customer_id"], "vehicle_id": vehicle["id"], "description": "Diagnostyka"
+    }))
+
+def test_orders_are_listed_only_in_their_branch(client, vehicle):
+    main = _order(client, vehicle, MAIN)
+    second = _order(client, vehicle, SECOND)
+
+    main_ids = {row["id"] for row in _ok(client.get("/api/orders", headers=MAIN, params={"limit": 1000}))}
+    second_ids = {row["id"] for row in _ok(client.get("/api/orders", headers=SECOND, params={"limit": 1000}))}
+
+    assert main["id"] in main_ids and main["id"] not in second_ids
+    assert second["id"] in second_ids and second["id"] not in main_ids
+
+def test_order_of_another_branch_cannot_use_its_station(client, vehicle):
+    order = _order(client, vehicle, MAIN)
+    # Stanowisko 3 należy do oddziału 2
+    response = client.put(f"/api/orders/{order['id']}", headers=MAIN, json={"work_station_id": 3})
+    assert response.status_code == 404
+
+def test_part_removal_from_another_branch_is_404(client, vehicle):
+    code = f"BR-{uuid.uuid4().hex[:6].upper()}"
+    part = _ok(client.post("/api/parts", headers=MAIN, json={"code": code, "name": "Klocki", "price": 50.0,
+                                                              "stock_quantity": 10}))
+    order = _order(client, vehicle, MAIN)
+    order_part = _ok(client.post(f"/api/orders/{order['id']}/parts", headers=MAIN,
+                                 json={"part_id": part["id"], "quantity": 2}))
+
+    url = f"/api/orders/{order['id']}/parts/{order_part['id']}"
+    assert client.delete(url, headers=SECOND).status_code == 404
+
+    db = SessionLocal()
+    try:
+        assert db.get(Part, part["id"]).stock_quantity == 8
+    finally:
+        db.close()
+
+    _ok(client.delete(url, headers=MAIN))
+    db = SessionLocal()
+    try:
+        assert db.get(Part, part["id"]).stock_quantity == 10
+    finally:
+        db.close()
+
+def test_jobs_are_visible_and_executed_only_in_their_branch(client, vehicle):
+    second_orders = {_order(client, vehicle, SECOND)["id"] for _ in range(2)}
+    _order(client, vehicle, MAIN)
+
+    job = _ok(client.post("/api/jobs", headers=SECOND, json={"kind": "export", "payload": {"entity": "orders"}}), 202)
+
+    assert client.get(f"/api/jobs/{job['id']}", headers=MAIN).status_code == 404
+    _ok(client.get(f"/api/jobs/{job['id']}", headers=SECOND))
+
+    db = SessionLocal()
+    try:
+        assert db.get(Job, job["id"]).branch_id == 2
+        # Worker bez oddziału w sesji - zakres bierze z zadania
+        jobs.run_pending(db, "test")
+    finally:
+        db.close()
+
+    status = _ok(client.get(f"/api/jobs/{job['id']}", headers=SECOND))
+    assert status["status"] == "succeeded", status
+    assert client.get(f"/api/jobs/{job['id']}/result", headers=MAIN).status_code == 404
+
+    db = SessionLocal()
+    try:
+        expected = db.query(Order).filter(Order.branch_id == 2).count()
+    finally:
+        db.close()
+    assert status["result"]["rows"] == expected
+
+    rows = list(csv.DictReader(io.StringIO(client.get(f"/api/jobs/{job['id']}/result", headers=SECOND).text)))
+    assert {int(row["id"]) for row in rows} >= second_orders
+    assert {row["branch_id"] for row in rows} == {"2"}
+
+def test_branch_header_falls_back_to_database_without_snapshot(client, monkeypatch):
+    from services import refdata
+
+    def unavailable(active_only=True):
+        raise OSError("snapshot unavailable")
+
+    monkeypatch.setattr(refdata, "branch_ids", unavailable)
+    _ok(client.get("/api/orders", headers=SECOND))
+    assert client.get("/api/orders", headers={BRANCH_HEADER: "99"}).status_code == 404
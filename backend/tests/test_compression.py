@@ -0,0 +1,62 @@
+"""
+CompressionMiddleware: kompresja i Vary: Accept-Encoding dla cache pośrednich.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.middleware import CompressionMiddleware
+
+LARGE = {"items": ["x" * 50] * 100}
+
+@pytest.fixture(scope="module")
+def compressed_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(LARGE, headers={"Vary": "Origin"})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 2000, b"b" * 2000]), media_type="text/plain")
+
+    @app.get("/binary")
+    def binary():
+        return PlainTextResponse(b"\0" * 2000, media_type="application/pdf")
+
+    return TestClient(app)
+
+def _vary(response) -> list[str]:
+    return [item.strip().lower() for item in response.headers.get("vary", "").split(",") if item.strip()]
+
+def test_compressed_response_varies_on_accept_encoding(compressed_client):
+    response = compressed_client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == LARGE
+    assert _vary(response) == ["origin", "accept-encoding"]
+
+@pytest.mark.parametrize("path, accept", [
+    ("/large", "identity"),   # klient bez kompresji - inny dostałby gzip
+    ("/small", "gzip"),       # poniżej progu
+    ("/small", "identity"),
+])
+def test_uncompressed_compressible_response_varies_on_accept_encoding(compressed_client, path, accept):
+    response = compressed_client.get(path, headers={"Accept-Encoding": accept})
+
+    assert "content-encoding" not in response.headers
+    assert _vary(response).count("accept-encoding") == 1
+
+@pytest.mark.parametrize("path", ["/stream", "/binary"])
+def test_never_compressed_response_has_no_vary(compressed_client, path):
+    response = compressed_client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" not in _vary(response)
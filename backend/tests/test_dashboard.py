@@ -0,0 +1,58 @@
+"""
+Statystyki dashboardu - treść odpowiedzi po serializacji (orjson).
+"""
+import json
+
+from models.base import branch_session
+from models.order import Order, OrderStatus, Priority
+
+def _pairs(body: bytes) -> list:
+    # Lista par zamiast słownika - zdublowany klucz byłby widoczny
+    return json.loads(body, object_pairs_hook=lambda pairs: pairs)
+
+def test_priority_stats_have_one_key_per_priority(client):
+    # Dashboard bez X-Branch-Id liczy oddział domyślny
+    db = branch_session(1)
+    try:
+        active = {
+            priority.value: db.query(Order).filter(
+                Order.priority == priority, Order.status.in_([OrderStatus.NEW, OrderStatus.IN_PROGRESS,
+                                                              OrderStatus.WAITING_FOR_PARTS])
+            ).count()
+            for priority in Priority
+        }
+    finally:
+        db.close()
+
+    customer = client.post("/api/customers", json={"name": "Dashboard Test", "phone": "600800900"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Mazda", "model": "3", "registration_number": "DB 10001"
+    }).json()
+    for priority in ("high", "high", "urgent"):
+        response = client.post("/api/orders", json={
+            "customer_id": customer["id"], "vehicle_id": vehicle["id"], "description": "x", "priority": priority
+        })
+        assert response.status_code == 200, response.text
+    active["high"] += 2
+    active["urgent"] += 1
+
+    response = client.get("/api/dashboard/stats")
+    assert response.status_code == 200
+
+    priority_stats = dict(_pairs(response.content))["priority_stats"]
+    assert [key for key, _ in priority_stats] == ["normal", "high", "urgent"]
+    assert dict(priority_stats) == active
+
+def test_etags_follow_stations_from_snapshot(client, monkeypatch):
+    # Listy stanowisk pochodzą ze snapshotu refdata - ETag musi się zmienić razem z nimi
+    from services import refdata
+
+    for path in ("/api/queue", "/api/dashboard/stats"):
+        before = client.get(path)
+        monkeypatch.setattr(refdata, "station_ids", lambda branch_id, active_only=True: [1])
+        after = client.get(path, headers={"If-None-Match": before.headers["ETag"]})
+        monkeypatch.undo()
+
+        assert after.status_code == 200, path
+        assert after.headers["ETag"] != before.headers["ETag"], path
+        assert "station_2" not in after.text, path
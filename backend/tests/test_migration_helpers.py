@@ -0,0 +1,194 @@
+"""
+Pomocnicze funkcje migracji na osobnej bazie SQLite - bez modeli aplikacji.
+
+Sprawdzane jest to, na czym opiera się wznawianie migracji: przerwany
+backfill zostawia postęp i kolejne uruchomienie kończy od tego miejsca, a
+zapisy równoległe do backfillu przechodzą i ich wiersze są w tabeli.
+Pomiar na dużej tabeli MariaDB: benchmarks.migration.
+"""
+import random
+import threading
+import time
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.pool import StaticPool
+
+import migration_helpers
+from migration_helpers import (
+    add_column_online, backfill, clear_progress, create_index_online, drop_column_online, drop_index_online,
+    migration_progress
+)
+
+ROWS = 1000
+
+@pytest.fixture
+def connection():
+    engine = sa.create_engine("sqlite://", poolclass=StaticPool)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(sa.text("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER, doubled INTEGER)"))
+        connection.execute(
+            sa.text("INSERT INTO items (id, value) VALUES (:id, :value)"),
+            [{"id": i, "value": i} for i in range(1, ROWS + 1)]
+        )
+        yield connection
+    engine.dispose()
+
+def _progress(connection, name):
+    return connection.execute(
+        sa.select(migration_progress).where(migration_progress.c.name == name)
+    ).mappings().first()
+
+def _filled(connection) -> int:
+    return connection.execute(sa.text("SELECT COUNT(*) FROM items WHERE doubled = value * 2")).scalar()
+
+def _run(connection, **kwargs) -> int:
+    return backfill("items", "doubled = value * 2", name="items.doubled", chunk_size=100, pause=0,
+                    connection=connection, **kwargs)
+
+def test_interrupted_backfill_keeps_progress(connection):
+    processed = _run(connection, max_rows=300)
+
+    progress = _progress(connection, "items.doubled")
+    assert 300 <= processed < ROWS
+    assert progress["finished_at"] is None
+    assert progress["rows_done"] == processed
+    assert progress["last_key"] == processed
+    # Zmienione dokładnie wiersze do last_key
+    assert _filled(connection) == processed
+    assert connection.execute(sa.text("SELECT MAX(id) FROM items WHERE doubled IS NOT NULL")).scalar() == processed
+
+def test_backfill_resumes_from_last_key(connection):
+    first = _run(connection, max_rows=300)
+    # Wiersz już zrobiony zmieniony po przerwaniu - wznowienie go nie przelicza
+    connection.execute(sa.text("UPDATE items SET doubled = -1 WHERE id = 1"))
+
+    second = _run(connection)
+
+    progress = _progress(connection, "items.doubled")
+    assert first + second == ROWS
+    assert progress["rows_done"] == ROWS
+    assert progress["last_key"] == ROWS
+    assert progress["finished_at"] is not None
+    assert _filled(connection) == ROWS - 1
+    assert connection.execute(sa.text("SELECT doubled FROM items WHERE id = 1")).scalar() == -1
+
+def test_finished_backfill_is_skipped(connection):
+    assert _run(connection) == ROWS
+    connection.execute(sa.text("UPDATE items SET value = value + 1"))
+
+    assert _run(connection) == 0
+    assert _filled(connection) == 0
+
+def test_clear_progress_restarts_backfill(connection):
+    _run(connection)
+    clear_progress("items.doubled", connection=connection)
+    assert _progress(connection, "items.doubled") is None
+
+    connection.execute(sa.text("UPDATE items SET value = value + 1"))
+    assert _run(connection) == ROWS
+    assert _filled(connection) == ROWS
+
+def test_backfill_where_limits_rows(connection):
+    connection.execute(sa.text("UPDATE items SET doubled = 0 WHERE id > 500"))
+
+    backfill("items", "doubled = value * 2", where="doubled IS NULL", name="items.partial", chunk_size=100,
+             pause=0, connection=connection)
+
+    assert _filled(connection) == 500
+    assert connection.execute(sa.text("SELECT COUNT(*) FROM items WHERE doubled = 0")).scalar() == 500
+
+def test_schema_changes_are_idempotent(connection):
+    column = sa.Column("extra", sa.Integer(), nullable=True)
+    add_column_online("items", column, connection=connection)
+    add_column_online("items", sa.Column("extra", sa.Integer(), nullable=True), connection=connection)
+    create_index_online("ix_items_extra", "items", ["extra"], connection=connection)
+    create_index_online("ix_items_extra", "items", ["extra"], connection=connection)
+
+    inspector = sa.inspect(connection)
+    assert "extra" in {c["name"] for c in inspector.get_columns("items")}
+    assert "ix_items_extra" in {i["name"] for i in inspector.get_indexes("items")}
+
+    drop_index_online("ix_items_extra", "items", connection=connection)
+    drop_index_online("ix_items_extra", "items", connection=connection)
+    drop_column_online("items", "extra", connection=connection)
+    drop_column_online("items", "extra", connection=connection)
+    assert "extra" not in {c["name"] for c in sa.inspect(connection).get_columns("items")}
+
+LARGE_ROWS = 10000
+
+class Writers:
+    # Zapisy jak z API w trakcie migracji: każdy w osobnej krótkiej transakcji
+    def __init__(self, engine, first_id: int):
+        self.engine = engine
+        self.next_id = first_id
+        self.inserted = []
+        self.updated = 0
+        self.errors = []
+        self.during = 0
+        self.migrating = threading.Event()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run)
+
+    def _run(self):
+        while not self.stop.is_set():
+            try:
+                with self.engine.begin() as connection:
+                    # Nowa wersja aplikacji zapisuje już nową kolumnę
+                    value = random.randint(1, 1000)
+                    connection.execute(
+                        sa.text("INSERT INTO items (id, value, doubled) VALUES (:id, :value, :doubled)"),
+                        {"id": self.next_id, "value": value, "doubled": value * 2}
+                    )
+                    row_id = random.randint(1, LARGE_ROWS)
+                    connection.execute(
+                        sa.text("UPDATE items SET value = :value, doubled = :doubled WHERE id = :id"),
+                        {"id": row_id, "value": value, "doubled": value * 2}
+                    )
+                self.inserted.append(self.next_id)
+                self.updated += 1
+                self.next_id += 1
+                if self.migrating.is_set():
+                    self.during += 1
+            except Exception as e:
+                self.errors.append(e)
+            time.sleep(0.002)
+
+def test_backfill_with_concurrent_writes(tmp_path, monkeypatch):
+    # Plik, nie pamięć - backfill i zapisy idą osobnymi połączeniami
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'large.db'}", connect_args={"timeout": 30})
+    with engine.begin() as connection:
+        connection.execute(sa.text("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER, doubled INTEGER)"))
+        connection.execute(
+            sa.text("INSERT INTO items (id, value) VALUES (:id, :value)"),
+            [{"id": i, "value": i} for i in range(1, LARGE_ROWS + 1)]
+        )
+    # Małe paczki - backfill trwa dość długo, żeby zapisy na pewno na niego trafiły
+    monkeypatch.setattr(migration_helpers, "MAX_CHUNK_SIZE", 500)
+
+    writers = Writers(engine, LARGE_ROWS + 1)
+    writers.thread.start()
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            add_column_online("items", sa.Column("extra", sa.Integer(), nullable=True), connection=connection)
+            writers.migrating.set()
+            backfill("items", "doubled = value * 2", name="items.large", chunk_size=100, pause=0.01,
+                     connection=connection)
+            writers.migrating.clear()
+            create_index_online("ix_items_doubled", "items", ["doubled"], connection=connection)
+    finally:
+        writers.stop.set()
+        writers.thread.join()
+
+    with engine.connect() as connection:
+        assert not writers.errors, writers.errors[:3]
+        assert writers.during > 0
+        # Wiersze dodane w trakcie są w tabeli, a każdy wiersz ma wypełnioną kolumnę
+        assert connection.execute(sa.text("SELECT COUNT(*) FROM items")).scalar() == LARGE_ROWS + len(writers.inserted)
+        stored = connection.execute(
+            sa.text("SELECT COUNT(*) FROM items WHERE id > :last"), {"last": LARGE_ROWS}
+        ).scalar()
+        assert stored == len(writers.inserted)
+        assert connection.execute(sa.text("SELECT COUNT(*) FROM items WHERE doubled IS NULL OR doubled != value * 2")).scalar() == 0
+        assert _progress(connection, "items.large")["finished_at"] is not None
+    engine.dispose()
@@ -0,0 +1,18 @@
+"""
+Punkty zamówienia części: pełne przeliczenie idzie przez kolejkę zadań.
+"""
+from services import jobs
+
+def test_rebuild_is_queued_as_job(client, db):
+    response = client.post("/api/parts/reorder-suggestions/rebuild")
+
+    assert response.status_code == 202, response.text
+    job = response.json()
+    assert job["kind"] == "reorder" and job["status"] == "queued"
+    assert response.headers["Location"] == f"/api/jobs/{job['id']}"
+
+    jobs.run_pending(db, "test")
+
+    status = client.get(f"/api/jobs/{job['id']}").json()
+    assert status["status"] == "succeeded", status
+    assert isinstance(status["result"]["parts"], int)
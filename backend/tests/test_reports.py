@@ -0,0 +1,115 @@
+"""
+Raport stanowisk (services.reports): arytmetyka na tablicach i cache zamkniętych okresów.
+"""
+import uuid
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from models.base import branch_session, utc_now
+from models.order import OrderStatus
+from services import refdata, reports
+
+H = int(reports.HOUR)
+STATIONS = [{"id": 1, "name": "S1"}, {"id": 2, "name": "S2"}]
+
+def _status(status: OrderStatus) -> int:
+    return reports.STATUS_INDEX[status]
+
+def _intervals(rows) -> dict:
+    starts, ends, statuses, stations, closed = zip(*rows)
+    return {
+        "starts": np.array(starts, dtype=np.int64),
+        "ends": np.array(ends, dtype=np.int64),
+        "statuses": np.array([_status(status) for status in statuses], dtype=np.int64),
+        "stations": np.array(stations, dtype=np.int64),
+        "closed": np.array(closed, dtype=bool),
+    }
+
+def test_compute_report_on_known_intervals():
+    # Okres [0, 10 h)
+    intervals = _intervals([
+        (0, 4 * H, OrderStatus.IN_PROGRESS, 1, True),
+        (4 * H, 6 * H, OrderStatus.WAITING_FOR_PARTS, 1, True),
+        (-2 * H, 3 * H, OrderStatus.IN_PROGRESS, 2, True),   # przycięty do 3 h
+        (1 * H, 12 * H, OrderStatus.NEW, -1, False),         # otwarty, bez stanowiska - 9 h
+        (11 * H, 12 * H, OrderStatus.IN_PROGRESS, 1, True),  # poza okresem
+    ])
+    completions = {"stations": np.array([1, 2], dtype=np.int64), "cycle": np.array([2.0 * H, np.nan])}
+
+    report = reports.compute_report(intervals, completions, STATIONS, 0, 10 * H)
+
+    first, second = report["stations"]
+    assert report["hours"] == 10.0
+    assert (first["busy_hours"], first["occupied_hours"]) == (4.0, 6.0)
+    assert (first["utilization"], first["occupancy"]) == (0.4, 0.6)
+    assert (first["completed"], first["cycle_avg_hours"]) == (1, 2.0)
+    assert (second["busy_hours"], second["utilization"]) == (3.0, 0.3)
+    assert (second["completed"], second["cycle_avg_hours"]) == (1, None)
+
+    in_progress = report["statuses"]["in_progress"]
+    assert in_progress["hours"] == 7.0
+    # Odcinki zakończone w okresie: 4 h i 5 h (pełna długość, nie przycięta)
+    assert in_progress["finished_intervals"] == 2
+    assert in_progress["avg_hours"] == 4.5
+    assert report["statuses"]["waiting_for_parts"]["hours"] == 2.0
+    assert report["statuses"]["new"] == {
+        "hours": 9.0, "finished_intervals": 0, "avg_hours": None, "p50_hours": None, "p90_hours": None
+    }
+
+    assert report["throughput"]["completed"] == 2
+    assert report["throughput"]["completed_per_day"] == 4.8
+    assert report["throughput"]["cycle_avg_hours"] == 2.0
+
+def test_compute_report_without_data():
+    empty = np.empty(0, dtype=np.int64)
+    intervals = {"starts": empty, "ends": empty, "statuses": empty, "stations": empty, "closed": np.empty(0, dtype=bool)}
+    completions = {"stations": empty, "cycle": np.empty(0, dtype=np.float64)}
+
+    report = reports.compute_report(intervals, completions, STATIONS, 0, 24 * H)
+
+    assert [station["utilization"] for station in report["stations"]] == [0.0, 0.0]
+    assert report["throughput"]["completed"] == 0
+
+@pytest.fixture
+def stations_snapshot():
+    refdata.build()
+    refdata.invalidate()
+    reports.clear_cache()
+    yield
+    reports.clear_cache()
+
+def test_closed_period_is_cached(client, stations_snapshot):
+    suffix = uuid.uuid4().hex[:6].upper()
+    customer = client.post("/api/customers", json={"name": f"Klient {suffix}", "phone": "600500600"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Kia", "model": "Ceed", "registration_number": f"RP {suffix}"
+    }).json()
+    order = client.post("/api/orders", json={
+        "customer_id": customer["id"], "vehicle_id": vehicle["id"], "description": "Rozrząd"
+    }).json()
+    assert client.put(f"/api/orders/{order['id']}", json={"status": "in_progress", "work_station_id": 1}).status_code == 200
+
+    today = utc_now().date()
+    # Dzień zamknięty z perspektywy "jutra"
+    later = utc_now() + timedelta(days=1)
+
+    db = branch_session(1, read=True)
+    try:
+        before = reports.report_cache_stats()
+        first = reports.station_report(db, 1, "day", today, now=later)
+        second = reports.station_report(db, 1, "day", today, now=later)
+        stats = reports.report_cache_stats()
+        # Bieżący okres liczony za każdym razem, bez cache
+        current = reports.station_report(db, 1, "day", today)
+    finally:
+        db.close()
+
+    assert first["closed"] and not current["closed"]
+    assert second is first
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+    assert reports.report_cache_stats()["size"] == stats["size"] == 1
+    assert first["start"] == f"{today.isoformat()}T00:00:00"
+    assert [station["id"] for station in first["stations"]] == [1, 2]
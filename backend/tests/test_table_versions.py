@@ -0,0 +1,47 @@
+"""
+Liczniki table_versions (ETagi list) - podbijane w tej samej transakcji co zmiana.
+"""
+import pytest
+
+from models import table_version
+from models.customer import Customer
+from models.table_version import TableVersion
+
+def _version(db, table: str) -> int:
+    db.expire_all()
+    row = db.get(TableVersion, table)
+    return row.version if row else 0
+
+def test_commit_bumps_version_of_changed_table(db):
+    before = _version(db, "customers")
+    db.add(Customer(name="Licznik Wersji", phone="600700800"))
+    db.commit()
+
+    assert _version(db, "customers") == before + 1
+
+def test_failed_bump_rolls_back_the_write(db, monkeypatch):
+    def fail(connection, tables):
+        raise RuntimeError("table_versions unavailable")
+
+    before = _version(db, "customers")
+    monkeypatch.setattr(table_version, "increment_versions", fail)
+    db.add(Customer(name="Bez Licznika", phone="600700801"))
+    with pytest.raises(RuntimeError):
+        db.commit()
+    db.rollback()
+    monkeypatch.undo()
+
+    # Zmiana bez nowego ETagu nie może zostać zatwierdzona
+    assert db.query(Customer).filter(Customer.name == "Bez Licznika").count() == 0
+    assert _version(db, "customers") == before
+
+def test_list_etag_changes_after_write(client):
+    # /api/orders: ETag z orders, customers i vehicles
+    first = client.get("/api/orders")
+    assert client.get("/api/orders", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.post("/api/customers", json={"name": "Nowy Klient", "phone": "600700802"})
+
+    second = client.get("/api/orders", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
@@ -0,0 +1,101 @@
+"""
+Liczba zapytań endpointów zapisu (benchmarks.write_queries) i postać dat w odpowiedziach.
+"""
+import pytest
+from sqlalchemy import event
+
+from benchmarks.write_queries import MAX_QUERIES, QueryCounter, cleanup, run
+from models.base import engine
+
+@pytest.fixture
+def counter():
+    counter = QueryCounter()
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter._count)
+
+def test_write_endpoints_stay_within_query_limits(counter):
+    created = {"customers": [], "vehicles": [], "parts": [], "orders": []}
+    try:
+        # Pierwszy przebieg zakłada wiersze table_versions - mierzony jest drugi
+        run(counter, created)
+        results = run(counter, created)
+    finally:
+        cleanup(created)
+
+    assert set(results) == set(MAX_QUERIES)
+    over = {name: count for name, count in results.items() if count > MAX_QUERIES[name]}
+    assert not over, over
+
+def test_write_responses_use_same_datetime_format_as_reads(client):
+    customer = client.post("/api/customers", json={"name": "Anna Nowak", "phone": "600200300"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Skoda", "model": "Fabia", "registration_number": "WQ 10001"
+    }).json()
+
+    created = client.post("/api/orders", json={
+        "customer_id": customer["id"], "vehicle_id": vehicle["id"], "description": "Wymiana oleju", "priority": "high"
+    })
+    assert created.status_code == 200, created.text
+    order = created.json()
+    assert order["priority"] == "high"
+
+    updated = client.put(f"/api/orders/{order['id']}", json={"status": "in_progress", "work_station_id": 1})
+    assert updated.status_code == 200, updated.text
+    patched = client.patch(f"/api/orders/{order['id']}", json={"status": "completed", "work_station_id": None})
+    assert patched.status_code == 200, patched.text
+    read = next(row for row in client.get("/api/orders", params={"limit": 1000}).json() if row["id"] == order["id"])
+
+    for field in ("created_at", "started_at"):
+        assert updated.json()[field] == read[field], field
+    for field in ("created_at", "started_at", "completed_at", "updated_at"):
+        assert patched.json()[field] == read[field], field
+    # Naiwny UTC jak przy odczycie - bez "+00:00" i "Z"
+    for value in (order["created_at"], updated.json()["updated_at"], patched.json()["completed_at"]):
+        assert not value.endswith(("+00:00", "Z")), value
+
+def test_invalid_priority_is_rejected(client):
+    customer = client.post("/api/customers", json={"name": "Piotr Wiśniewski", "phone": "600300400"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Fiat", "model": "Panda", "registration_number": "WQ 10002"
+    }).json()
+
+    response = client.post("/api/orders", json={
+        "customer_id": customer["id"], "vehicle_id": vehicle["id"], "description": "x", "priority": "asap"
+    })
+    assert response.status_code == 400
+
+def test_order_vehicle_must_belong_to_customer(client):
+    owner = client.post("/api/customers", json={"name": "Jan Kowalski", "phone": "600400500"}).json()
+    other = client.post("/api/customers", json={"name": "Ewa Zielińska", "phone": "600500600"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": owner["id"], "brand": "Opel", "model": "Astra", "registration_number": "WQ 10003"
+    }).json()
+
+    response = client.post("/api/orders", json={
+        "customer_id": other["id"], "vehicle_id": vehicle["id"], "description": "Przegląd"
+    })
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Vehicle does not belong to customer"
+
+    missing = client.post("/api/orders", json={
+        "customer_id": owner["id"], "vehicle_id": vehicle["id"] + 1000, "description": "Przegląd"
+    })
+    assert missing.status_code == 404
+    assert missing.json()["detail"] == "Vehicle not found"
+
+def test_update_order_accepts_costs_as_strings(client):
+    customer = client.post("/api/customers", json={"name": "Marek Lis", "phone": "600600700"}).json()
+    vehicle = client.post("/api/vehicles", json={
+        "customer_id": customer["id"], "brand": "Kia", "model": "Ceed", "registration_number": "WQ 10004"
+    }).json()
+    order = client.post("/api/orders", json={
+        "customer_id": customer["id"], "vehicle_id": vehicle["id"], "description": "Hamulce"
+    }).json()
+
+    updated = client.put(f"/api/orders/{order['id']}", json={"estimated_cost": "450.50", "final_cost": "480"})
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["estimated_cost"] == 450.5
+    assert updated.json()["final_cost"] == 480.0
+
+    invalid = client.put(f"/api/orders/{order['id']}", json={"final_cost": "dużo"})
+    assert invalid.status_code == 400
@@ -0,0 +1,78 @@
+"""
+Sprawdza, czy orders.parts_total / parts_count zgadzają się z order_parts.
+
+    python verify_order_totals.py         # tylko raport
+    python verify_order_totals.py --fix   # raport + poprawienie rozbieżności
+"""
+import sys
+
+from sqlalchemy import func
+
+from models.base import SessionLocal, utc_now
+from models.order import Order
+from models.order_part import OrderPart
+from models.table_version import bump_versions
+
+TOLERANCE = 0.005
+
+def find_drift(db):
+    totals = db.query(
+        OrderPart.order_id.label("order_id"),
+        func.sum(OrderPart.quantity * OrderPart.unit_price).label("total"),
+        func.count(OrderPart.id).label("lines")
+    ).group_by(OrderPart.order_id).subquery()
+
+    rows = db.query(
+        Order.id,
+        Order.parts_total,
+        Order.parts_count,
+        func.coalesce(totals.c.total, 0),
+        func.coalesce(totals.c.lines, 0)
+    ).outerjoin(totals, totals.c.order_id == Order.id).all()
+
+    return [
+        (order_id, stored_total, stored_count, float(actual_total), int(actual_count))
+        for order_id, stored_total, stored_count, actual_total, actual_count in rows
+        if abs((stored_total or 0) - float(actual_total)) > TOLERANCE or stored_count != actual_count
+    ]
+
+def fix_drift(db, drift):
+    # Bez commita - wołane też z zadania "reconcile" (services.jobs).
+    # updated_at razem z poprawką - inaczej klienci /api/orders/changes nie dostaną nowych sum
+    now = utc_now()
+    for order_id, _, _, actual_total, actual_count in drift:
+        db.query(Order).filter(Order.id == order_id).update({
+            Order.parts_total: actual_total,
+            Order.parts_count: actual_count,
+            Order.version: Order.version + 1,
+            Order.updated_at: now
+        }, synchronize_session=False)
+
+    if drift:
+        bump_versions(db, ["orders"])
+
+if __name__ == "__main__":
+    fix = "--fix" in sys.argv
+    db = SessionLocal()
+
+    try:
+        drift = find_drift(db)
+
+        for order_id, stored_total, stored_count, actual_total, actual_count in drift:
+            print(f"Zlecenie #{order_id}: zapisano {stored_total:.2f} ({stored_count} poz.), "
+                  f"order_parts {actual_total:.2f} ({actual_count} poz.)")
+
+        if fix and drift:
+            fix_drift(db, drift)
+            db.commit()
+            print(f"Poprawiono {len(drift)} zleceń")
+        elif not drift:
+            print("Brak rozbieżności")
+    except Exception as e:
+        print(f"Błąd: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+    sys.exit(1 if drift and not fix else 0)